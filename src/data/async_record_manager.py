@@ -0,0 +1,131 @@
+"""
+Async Record Manager
+asyncio front end for RecordManager, for servers and asyncio-driven GUI bridges.
+
+Records, indexes and snapshots are those of the wrapped RecordManager. Only file I/O and
+JSON encoding and decoding run on an executor; records are changed and indexes updated on
+the event loop thread, so reads never see a half-applied change. Writers are serialized by
+an asyncio.Lock, and each write waits for its save before the next writer starts.
+"""
+import asyncio
+import functools
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from src.data.columnar import ColumnTable
+from src.data.ordering import OrderBy, RecordPage
+from src.data.record_manager import RecordManager
+from src.data.search import filter_records, search_records
+from src.data.snapshot import RecordSnapshot
+
+
+class AsyncRecordManager:
+    """Async versions of the RecordManager operations, sharing the records of one RecordManager."""
+
+    RECORD_TYPES = RecordManager.RECORD_TYPES
+
+    def __init__(self, record_manager: Optional[RecordManager] = None, executor: Optional[Executor] = None,
+                 **settings: Any):
+        """Wrap a RecordManager, or create one from `settings` without loading its records.
+
+        Call `await load_records()` to load the records of a new manager. `executor` runs
+        the file I/O (defaults to the event loop's default executor).
+        """
+        if record_manager is None:
+            record_manager = RecordManager(auto_load=False, **settings)
+        self.record_manager = record_manager
+        self.executor = executor
+        self._lock: Optional[asyncio.Lock] = None
+
+    @property
+    def records(self) -> Dict[str, List[Dict[str, Any]]]:
+        """The record lists of the wrapped RecordManager."""
+        return self.record_manager.records
+
+    def _get_lock(self) -> asyncio.Lock:
+        """Get the writer lock, created on the running event loop (required before Python 3.10)."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    async def _run(self, function: Callable, *args: Any) -> Any:
+        """Run a blocking function on the executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(function, *args))
+
+    async def _write(self, method: Callable, *args: Any) -> Any:
+        """Apply a mutation in memory, then do its file writes on the executor."""
+        async with self._get_lock():
+            with self.record_manager.deferred_writes():
+                result = method(*args)
+            await self._run(self.record_manager.flush_writes)
+            return result
+
+    async def load_records(self) -> None:
+        """Read and decode the stored records on the executor, then publish them."""
+        async with self._get_lock():
+            loaded = await self._run(self.record_manager._read_stored_records)
+            self.record_manager._publish_loaded_records(loaded)
+
+    async def save_records(self) -> None:
+        """Save all records on the executor."""
+        async with self._get_lock():
+            await self._run(self.record_manager.save_records)
+
+    def snapshot(self, record_type: str) -> RecordSnapshot:
+        """Get an immutable point-in-time view of a record type in O(1)."""
+        return self.record_manager.snapshot(record_type)
+
+    def get_catalog(self, name: str) -> List[Any]:
+        """Get the sorted distinct values of a catalog, kept up to date on every mutation."""
+        return self.record_manager.get_catalog(name)
+
+    def get_record(self, record_type: str, record_id: Any) -> Optional[Dict[str, Any]]:
+        """Get a record by ID from the ID index."""
+        return self.record_manager.get_record(record_type, record_id)
+
+    def page(self, record_type: str, order_by: OrderBy = "id", after: Optional[Iterable[Any]] = None,
+             limit: int = 100, descending: bool = False) -> RecordPage:
+        """Get a page of records ordered by a field, starting after the cursor of the previous page."""
+        return self.record_manager.page(record_type, order_by, after, limit, descending)
+
+    def window(self, record_type: str, order_by: OrderBy = "id", start: int = 0, count: int = 100,
+               descending: bool = False) -> RecordPage:
+        """Get the records at positions `start` to `start + count` of an order."""
+        return self.record_manager.window(record_type, order_by, start, count, descending)
+
+    def columns(self, record_type: str) -> ColumnTable:
+        """Get the records of a type as NumPy columns, cached until they change."""
+        return self.record_manager.columns(record_type)
+
+    async def query(self, record_type: str, where: Optional[Callable[[Dict[str, Any]], bool]] = None,
+                    **filters: Any) -> List[Dict[str, Any]]:
+        """Get the records of a snapshot matching a predicate and/or exact field values."""
+        records = self.snapshot(record_type)
+        return await self._run(lambda: list(filter_records(records, where, filters)))
+
+    async def search(self, record_type: str, text: str, fields: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """Get the records of a snapshot containing `text` in any of the given fields, ignoring case."""
+        records = self.snapshot(record_type)
+        fields = list(fields) if fields is not None else None
+        return await self._run(lambda: list(search_records(records, text, fields)))
+
+    async def add_record(self, record_type: str, new_record: Dict[str, Any]) -> None:
+        """Add a record."""
+        await self._write(self.record_manager.add_record, record_type, new_record)
+
+    async def add_records(self, record_type: str, new_records: List[Dict[str, Any]],
+                          validate: Optional[bool] = None) -> None:
+        """Add many records at once with a single save."""
+        await self._write(self.record_manager.add_records, record_type, new_records, validate)
+
+    async def update_record(self, record_type: str, record_id: Any, updated_record: Dict[str, Any]) -> None:
+        """Update a record by ID."""
+        await self._write(self.record_manager.update_record, record_type, record_id, updated_record)
+
+    async def patch_record(self, record_type: str, record_id: Any, changes: Dict[str, Any]) -> Dict[str, Any]:
+        """Change some fields of a record by ID and return the updated record."""
+        return await self._write(self.record_manager.patch_record, record_type, record_id, changes)
+
+    async def delete_record(self, record_type: str, record_id: Any) -> None:
+        """Delete record by ID."""
+        await self._write(self.record_manager.delete_record, record_type, record_id)
@@ -0,0 +1,180 @@
+"""
+Catalogs Module
+Sorted distinct values of record fields, such as client names and countries, kept up to date
+on every mutation so forms can offer them without scanning the records.
+"""
+import threading
+from bisect import bisect_left
+from typing import Any, Dict, List, Set, Tuple
+from src.data.indexes import RecordIndex
+from src.data.ordering import text_key
+
+# Catalogs and the (record type, field) pairs whose values each one holds
+CATALOGS = {
+    'client_names': (('client', 'name'),),
+    'airline_names': (('airline', 'company_name'),),
+    'flight_cities': (('flight', 'departure'), ('flight', 'destination')),
+    'countries': (('client', 'country'), ('airline', 'country')),
+}
+
+
+class Catalog:
+    """
+    Distinct values sorted ignoring case, each counted by the records holding it.
+
+    Values gained or lost are collected and applied to the sorted list on the next read,
+    by bisection, or by sorting once after a bulk import. The list is then replaced rather than changed, so a list
+    handed out is never modified.
+    """
+
+    # Values gained or lost beyond which the list is sorted again rather than changed in place
+    MAX_INSERTS = 100
+
+    def __init__(self):
+        # Sorted values and their sort keys, position by position
+        self._values: List[Any] = []
+        self._keys: List[Tuple[str, str]] = []
+        self._counts: Dict[Any, int] = {}
+        # Values gained and lost since the sorted list was last built
+        self._added: Set[Any] = set()
+        self._removed: Set[Any] = set()
+        # Readers may share the record manager's lock, so they merge the changes one at a time
+        self._merge_lock = threading.Lock()
+
+    @staticmethod
+    def sort_key(value: Any) -> Tuple[str, str]:
+        """Sort ignoring case, then by case so equal-looking values keep one order."""
+        return text_key(value), str(value)
+
+    def add(self, value: Any, times: int = 1) -> None:
+        """Count a value (`times` times)."""
+        if value is None or value == "":
+            return
+        count = self._counts.get(value, 0)
+        self._counts[value] = count + times
+        if not count:
+            if value in self._removed:
+                self._removed.discard(value)
+            else:
+                self._added.add(value)
+
+    def remove(self, value: Any) -> None:
+        """Uncount a value, dropping it once no record holds it."""
+        count = self._counts.get(value)
+        if not count:
+            return
+        if count > 1:
+            self._counts[value] = count - 1
+            return
+        del self._counts[value]
+        if value in self._added:
+            self._added.discard(value)
+        else:
+            self._removed.add(value)
+
+    def load(self, counts: Dict[Any, int]) -> None:
+        """Replace every value and count at once."""
+        self._counts = {value: count for value, count in counts.items() if count and value not in (None, "")}
+        self._set_sorted(self._counts)
+        self._added, self._removed = set(), set()
+
+    def _set_sorted(self, values) -> None:
+        """Sort values and their keys from scratch."""
+        pairs = sorted((self.sort_key(value), value) for value in values)
+        self._keys = [key for key, _ in pairs]
+        self._values = [value for _, value in pairs]
+
+    @property
+    def values(self) -> List[Any]:
+        """The distinct values, sorted."""
+        with self._merge_lock:
+            if len(self._added) + len(self._removed) > self.MAX_INSERTS:
+                self._set_sorted(self._counts)
+            elif self._added or self._removed:
+                keys, values = list(self._keys), list(self._values)
+                for value in self._removed:
+                    position = bisect_left(keys, self.sort_key(value))
+                    del keys[position], values[position]
+                for value in self._added:
+                    key = self.sort_key(value)
+                    position = bisect_left(keys, key)
+                    keys.insert(position, key)
+                    values.insert(position, value)
+                self._keys, self._values = keys, values
+            self._added, self._removed = set(), set()
+            return self._values
+
+
+class CatalogIndex(RecordIndex):
+    """Keep every catalog in CATALOGS up to date with the records."""
+
+    fields = frozenset(field for sources in CATALOGS.values() for _, field in sources)
+
+    def __init__(self):
+        self.catalogs = {name: Catalog() for name in CATALOGS}
+        # Per catalog: how often each value occurs in each record type, to rebuild one type alone
+        self._type_counts: Dict[str, Dict[str, Dict[Any, int]]] = {name: {} for name in CATALOGS}
+        # Per record type: the catalogs it feeds, with the fields they take from it
+        self._sources: Dict[str, List[Tuple[str, List[str]]]] = {}
+        for name, sources in CATALOGS.items():
+            for record_type in dict.fromkeys(source_type for source_type, _ in sources):
+                self._sources.setdefault(record_type, []).append(
+                    (name, [field for source_type, field in sources if source_type == record_type]))
+
+    def rebuild(self, record_type, records):
+        for name, fields in self._sources.get(record_type, ()):
+            counts: Dict[Any, int] = {}
+            for record in records:
+                for field in fields:
+                    value = record.get(field)
+                    counts[value] = counts.get(value, 0) + 1
+            type_counts = self._type_counts[name]
+            type_counts[record_type] = counts
+
+            total: Dict[Any, int] = {}
+            for counts in type_counts.values():
+                for value, count in counts.items():
+                    total[value] = total.get(value, 0) + count
+            self.catalogs[name].load(total)
+
+    def on_add(self, record_type, position, record):
+        for name, fields in self._sources.get(record_type, ()):
+            for field in fields:
+                self._count(name, record_type, record.get(field), 1)
+
+    def on_add_records(self, record_type, position, records):
+        for name, fields in self._sources.get(record_type, ()):
+            added: Dict[Any, int] = {}
+            for record in records:
+                for field in fields:
+                    value = record.get(field)
+                    added[value] = added.get(value, 0) + 1
+            counts = self._type_counts[name].setdefault(record_type, {})
+            for value, count in added.items():
+                counts[value] = counts.get(value, 0) + count
+                self.catalogs[name].add(value, count)
+
+    def on_update(self, record_type, position, old_record, new_record):
+        for name, fields in self._sources.get(record_type, ()):
+            for field in fields:
+                old_value, new_value = old_record.get(field), new_record.get(field)
+                if old_value != new_value:
+                    self._count(name, record_type, old_value, -1)
+                    self._count(name, record_type, new_value, 1)
+
+    def _count(self, name: str, record_type: str, value: Any, change: int) -> None:
+        """Count a value in or out of a catalog."""
+        counts = self._type_counts[name].setdefault(record_type, {})
+        counts[value] = counts.get(value, 0) + change
+        if change > 0:
+            self.catalogs[name].add(value)
+        else:
+            if not counts[value]:
+                del counts[value]
+            self.catalogs[name].remove(value)
+
+    def get(self, name: str) -> List[Any]:
+        """Get the sorted distinct values of a catalog."""
+        if name not in self.catalogs:
+            raise ValueError(f"Catalog '{name}' is not supported.")
+        return self.catalogs[name].values
@@ -0,0 +1,161 @@
+"""
+Columnar Module
+Optional NumPy column cache of the records of one type, for vectorized filters and group-by counts.
+"""
+import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from src.data.ordering import DATE_FIELDS, date_ordinal, record_number
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; without it queries loop over the records instead
+    np = None
+
+
+def numpy_available() -> bool:
+    """Check whether NumPy is installed, so column caches can be used."""
+    return np is not None
+
+
+class ColumnTable:
+    """
+    The records of one version of a record type, stored column by column in NumPy arrays.
+
+    IDs are stored as int32 numbers, dates as int32 day numbers (0 when missing) and every
+    other field as int32 codes into the list of its distinct values. Each column is built
+    the first time it is used.
+
+    Filters return boolean masks with one element per record, combined with `&`, `|` and `~`.
+    """
+
+    def __init__(self, records: Sequence[Dict[str, Any]], version: Optional[int] = None):
+        if np is None:
+            raise ImportError("Column filters need NumPy: pip install numpy")
+        self.records = records
+        self.version = version
+        self._columns: Dict[str, "np.ndarray"] = {}
+        # Distinct values of each coded field, and the code of each value
+        self._categories: Dict[str, Tuple[List[Any], Dict[Any, int]]] = {}
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def column(self, field: str) -> "np.ndarray":
+        """Get the int32 array of a field: ID numbers, day numbers or value codes."""
+        array = self._columns.get(field)
+        if array is None:
+            records = self.records
+            if field == 'id':
+                array = np.fromiter((record_number(record.get('id')) for record in records),
+                                    dtype=np.int32, count=len(records))
+            else:
+                # Values repeat (dates, airlines, countries), so each distinct value is converted once
+                values, codes, record_codes = [], {}, []
+                for record in records:
+                    value = record.get(field)
+                    code = codes.get(value)
+                    if code is None:
+                        code = codes[value] = len(values)
+                        values.append(value)
+                    record_codes.append(code)
+                array = np.array(record_codes, dtype=np.int32)
+                if field in DATE_FIELDS:
+                    days = np.array([int(date_ordinal(value)) for value in values], dtype=np.int32)
+                    array = days[array]
+                else:
+                    self._categories[field] = (values, codes)
+            self._columns[field] = array
+        return array
+
+    def categories(self, field: str) -> List[Any]:
+        """Get the distinct values of a coded field, by code."""
+        if field == 'id' or field in DATE_FIELDS:
+            raise ValueError(f"Field '{field}' is not stored as codes.")
+        self.column(field)
+        return self._categories[field][0]
+
+    def _number(self, field: str, value: Any) -> int:
+        """Get the stored number of an ID or date, from its text or a date."""
+        if field == 'id':
+            return value if isinstance(value, int) else record_number(value)
+        if isinstance(value, datetime.date):
+            return value.toordinal()
+        return value if isinstance(value, int) else int(date_ordinal(value))
+
+    def equals(self, field: str, value: Any) -> "np.ndarray":
+        """Get the mask of the records whose field equals `value`."""
+        column = self.column(field)
+        if field == 'id' or field in DATE_FIELDS:
+            return column == self._number(field, value)
+        code = self._categories[field][1].get(value)
+        if code is None:
+            return np.zeros(len(column), dtype=bool)
+        return column == code
+
+    def isin(self, field: str, values: Iterable[Any]) -> "np.ndarray":
+        """Get the mask of the records whose field is one of `values`."""
+        column = self.column(field)
+        if field == 'id' or field in DATE_FIELDS:
+            return np.isin(column, [self._number(field, value) for value in values])
+        categories, codes = self._categories[field]
+        # Look the codes up in a table with one entry per distinct value
+        wanted = np.zeros(len(categories), dtype=bool)
+        wanted[[codes[value] for value in values if value in codes]] = True
+        return wanted[column]
+
+    def between(self, field: str, low: Any = None, high: Any = None) -> "np.ndarray":
+        """Get the mask of the records whose ID or date is from `low` to `high`, both included."""
+        if field != 'id' and field not in DATE_FIELDS:
+            raise ValueError(f"Field '{field}' has no order; use equals() or isin().")
+        column = self.column(field)
+        mask = np.ones(len(column), dtype=bool)
+        if low is not None:
+            mask &= column >= self._number(field, low)
+        if high is not None:
+            mask &= column <= self._number(field, high)
+        return mask
+
+    def mask(self, between: Optional[Dict[str, Tuple[Any, Any]]] = None, **values: Any) -> "np.ndarray":
+        """
+        Get the mask of the records matching every condition.
+
+        `between` maps ID or date fields to (low, high) ranges, either end None for no bound.
+        Other keywords are field values; a list, tuple or set matches any of its values.
+        """
+        mask = np.ones(len(self.records), dtype=bool)
+        for field, (low, high) in (between or {}).items():
+            mask &= self.between(field, low, high)
+        for field, value in values.items():
+            if isinstance(value, (list, tuple, set, frozenset)):
+                mask &= self.isin(field, value)
+            else:
+                mask &= self.equals(field, value)
+        return mask
+
+    def select(self, mask: "np.ndarray") -> List[Dict[str, Any]]:
+        """Get the records of a mask, in their stored order."""
+        records = self.records
+        return [records[position] for position in np.flatnonzero(mask).tolist()]
+
+    def filter(self, between: Optional[Dict[str, Tuple[Any, Any]]] = None, **values: Any) -> List[Dict[str, Any]]:
+        """Get the records matching every condition (see `mask`)."""
+        return self.select(self.mask(between, **values))
+
+    def count_by(self, field: str, mask: Optional["np.ndarray"] = None) -> Dict[Any, int]:
+        """
+        Count the records of each value of a field, only those of `mask` if given.
+
+        Dates are counted by day, keyed by `datetime.date` (None when missing).
+        """
+        column = self.column(field)
+        if mask is not None:
+            column = column[mask]
+        if field == 'id' or field in DATE_FIELDS:
+            numbers, counts = np.unique(column, return_counts=True)
+            if field == 'id':
+                return dict(zip(numbers.tolist(), counts.tolist()))
+            return {datetime.date.fromordinal(number) if number > 0 else None: count
+                    for number, count in zip(numbers.tolist(), counts.tolist())}
+        categories = self._categories[field][0]
+        counts = np.bincount(column, minlength=len(categories))
+        return {categories[code]: count for code, count in enumerate(counts.tolist()) if count}
@@ -0,0 +1,106 @@
+"""
+Export Module
+Writes records to CSV or JSONL files from a generator pipeline.
+
+Records are encoded into chunks of text that are written one at a time, so the
+complete output is never built in memory.
+"""
+import csv
+import io
+import json
+import os
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+EXPORT_FORMATS = ['csv', 'jsonl']
+
+# Columns written to CSV exports for each record type
+RECORD_FIELDS = {
+    "client": ["id", "type", "name", "phone", "email", "address_line1", "address_line2", "address_line3",
+               "city", "state", "zip_code", "country", "created_at"],
+    "flight": ["id", "type", "client", "airline", "departure", "destination", "depart_date", "return_date",
+               "created_at"],
+    "airline": ["id", "type", "company_name", "country", "created_at"]
+}
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def iter_jsonl_chunks(records: Iterable[Dict[str, Any]], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[tuple]:
+    """Encode records as JSON lines, yielding (text chunk, records in chunk)."""
+    encode = json.JSONEncoder().encode
+    lines = []
+    for record in records:
+        lines.append(encode(record))
+        if len(lines) >= chunk_size:
+            yield '\n'.join(lines) + '\n', len(lines)
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n', len(lines)
+
+
+def iter_csv_chunks(records: Iterable[Dict[str, Any]], fields: List[str],
+                    chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[tuple]:
+    """Encode records as CSV rows after a header row, yielding (text chunk, records in chunk)."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction='ignore')
+    writer.writeheader()
+    count = 0
+    for record in records:
+        writer.writerow(record)
+        count += 1
+        if count >= chunk_size:
+            yield buffer.getvalue(), count
+            buffer.seek(0)
+            buffer.truncate()
+            count = 0
+    if count or buffer.tell():
+        yield buffer.getvalue(), count
+
+
+def detect_format(file_path: str) -> str:
+    """Detect the export format from the file extension."""
+    extension = os.path.splitext(file_path)[1].lower().lstrip('.')
+    if extension not in EXPORT_FORMATS:
+        raise ValueError(f"Export format '{extension}' is not supported.")
+    return extension
+
+
+def export_records(records: Iterable[Dict[str, Any]], file_path: str, file_format: Optional[str] = None,
+                   fields: Optional[List[str]] = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                   progress_callback: Optional[Callable[[int], None]] = None) -> int:
+    """
+    Export records to a CSV or JSONL file and return the number of exported records.
+
+    `fields` selects the CSV columns (defaults to the keys of the first record).
+    `progress_callback` is called with the running record count after each chunk.
+    """
+    file_format = file_format or detect_format(file_path)
+    records = iter(records)
+
+    if file_format == 'jsonl':
+        chunks = iter_jsonl_chunks(records, chunk_size)
+    elif file_format == 'csv':
+        if fields is None:
+            first_record = next(records, None)
+            fields = list(first_record) if first_record else []
+            if first_record is not None:
+                records = _prepend(first_record, records)
+        chunks = iter_csv_chunks(records, fields, chunk_size)
+    else:
+        raise ValueError(f"Export format '{file_format}' is not supported.")
+
+    exported = 0
+    with open(file_path, 'w', encoding='utf-8', newline='') as file:
+        for text, count in chunks:
+            file.write(text)
+            exported += count
+            if progress_callback:
+                progress_callback(exported)
+
+    return exported
+
+
+def _prepend(first: Dict[str, Any], rest: Iterator[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """Yield a record that was already taken from an iterator, then the rest."""
+    yield first
+    yield from rest
@@ -0,0 +1,190 @@
+"""
+Facets Module
+Bitmap indexes over fields with few distinct values, for faceted filters and live counts.
+"""
+import threading
+from contextlib import nullcontext
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+from src.data.indexes import RecordIndex
+
+# Fields of each record type with few distinct values, filtered by facets
+FACET_FIELDS = {
+    'flight': ('airline', 'destination'),
+    'client': ('country',),
+    'airline': ('country',),
+}
+
+# Chosen values of each facet field; no values (or a missing field) means any value
+Selections = Mapping[str, Iterable[Any]]
+
+# Positions of the bits set in each byte value, for reading the positions of a bitmap
+_BYTE_BITS = [tuple(bit for bit in range(8) if byte >> bit & 1) for byte in range(256)]
+
+
+def popcount(bitmap: int) -> int:
+    """Count the bits set in a bitmap."""
+    return bitmap.bit_count() if hasattr(bitmap, 'bit_count') else bin(bitmap).count('1')
+
+
+def bit_positions(bitmap: int) -> Iterator[int]:
+    """Yield the positions of the bits set in a bitmap, in increasing order."""
+    for offset, byte in enumerate(bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little')):
+        if byte:
+            base = offset * 8
+            for bit in _BYTE_BITS[byte]:
+                yield base + bit
+
+
+class FacetIndex(RecordIndex):
+    """
+    One bitmap per value of each facet field, with bit `n` set for the record at position `n`.
+
+    Bitmaps are Python ints, so a filter is a few big-int ANDs and ORs: values of one field
+    are ORed, fields are ANDed. Counts are popcounts of the bitmaps, without reading records.
+
+    Registered with the record manager (`register_index`), the bitmaps follow every add and
+    edit, added records being set in one pass on the next read; deletions shift positions,
+    so they are rebuilt. Unregistered, they are built again whenever the records change.
+    """
+
+    fields = frozenset(field for fields in FACET_FIELDS.values() for field in fields)
+
+    def __init__(self, record_manager):
+        self.record_manager = record_manager
+        self.registered = False
+        self._versions: Dict[str, int] = {}
+        # Per record type and facet field: the bitmap of each value
+        self._bitmaps: Dict[str, Dict[str, Dict[Any, int]]] = {}
+        # Per record type: the bitmap with a bit for every record, and records added since the bitmaps were set
+        self._all: Dict[str, int] = {}
+        self._pending: Dict[str, List[Tuple[int, Dict[str, Any]]]] = {}
+        # Readers share the record manager's lock, so they set the added records one at a time
+        self._pending_lock = threading.Lock()
+
+    def rebuild(self, record_type, records):
+        self.registered = True
+        self._load(record_type, records)
+
+    def on_add(self, record_type, position, record):
+        if record_type in FACET_FIELDS:
+            # Setting one bit copies a whole bitmap, so added records are set together on the next read
+            self._pending.setdefault(record_type, []).append((position, record))
+
+    def on_update(self, record_type, position, old_record, new_record):
+        if record_type not in FACET_FIELDS:
+            return
+        self._apply_pending(record_type)
+        bit = 1 << position
+        for field, bitmaps in self._bitmaps[record_type].items():
+            old_value, new_value = old_record.get(field), new_record.get(field)
+            if old_value == new_value:
+                continue
+            bitmaps[old_value] &= ~bit
+            if not bitmaps[old_value]:
+                del bitmaps[old_value]
+            bitmaps[new_value] = bitmaps.get(new_value, 0) | bit
+
+    def _load(self, record_type: str, records: Iterable[Dict[str, Any]]) -> None:
+        """Build the bitmaps of a record type from scratch."""
+        if record_type not in FACET_FIELDS:
+            return
+        self._all[record_type] = 0
+        self._bitmaps[record_type] = {field: {} for field in FACET_FIELDS[record_type]}
+        self._pending[record_type] = list(enumerate(records))
+        self._apply_pending(record_type)
+
+    def _apply_pending(self, record_type: str) -> None:
+        """Set the bits of the records added since the bitmaps were last set."""
+        with self._pending_lock:
+            pending = self._pending.get(record_type)
+            if pending:
+                self._pending[record_type] = []
+                self._set_bits(record_type, pending)
+
+    def _set_bits(self, record_type: str, pending: List[Tuple[int, Dict[str, Any]]]) -> None:
+        """Set the bits of records at their positions."""
+        size = (max(position for position, _ in pending) + 8) // 8
+        added = bytearray(size)
+        for position, _ in pending:
+            added[position >> 3] |= 1 << (position & 7)
+        self._all[record_type] |= int.from_bytes(added, 'little')
+
+        for field, bitmaps in self._bitmaps[record_type].items():
+            # Set the bits in a byte array per value, then OR each into its bitmap once
+            bits: Dict[Any, bytearray] = {}
+            for position, record in pending:
+                value = record.get(field)
+                value_bits = bits.get(value)
+                if value_bits is None:
+                    value_bits = bits[value] = bytearray(size)
+                value_bits[position >> 3] |= 1 << (position & 7)
+            for value, value_bits in bits.items():
+                bitmaps[value] = bitmaps.get(value, 0) | int.from_bytes(value_bits, 'little')
+
+    def _read(self, record_type: str):
+        """Keep writers out while the bitmaps and the records they describe are read together."""
+        if record_type not in FACET_FIELDS:
+            raise ValueError(f"Record type '{record_type}' has no facets.")
+        lock = getattr(self.record_manager, 'lock', None)
+        return lock.reading() if lock is not None else nullcontext()
+
+    def _snapshot(self, record_type: str):
+        """Get the records the bitmaps describe, building the bitmaps again if unregistered and out of date."""
+        snapshot = self.record_manager.snapshot(record_type)
+        if not self.registered and self._versions.get(record_type) != snapshot.version:
+            self._load(record_type, snapshot)
+            self._versions[record_type] = snapshot.version
+        self._apply_pending(record_type)
+        return snapshot
+
+    def _mask(self, record_type: str, selections: Selections, skip_field: Optional[str] = None) -> int:
+        """AND the ORed bitmaps of the chosen values of each field, ignoring `skip_field`."""
+        mask = self._all[record_type]
+        for field, values in selections.items():
+            if field == skip_field:
+                continue
+            if field not in self._bitmaps[record_type]:
+                raise ValueError(f"Field '{field}' is not a facet of '{record_type}'.")
+            bitmaps, values = self._bitmaps[record_type][field], list(values)
+            if not values:
+                continue
+            field_mask = 0
+            for value in values:
+                field_mask |= bitmaps.get(value, 0)
+            mask &= field_mask
+        return mask
+
+    def select(self, record_type: str, selections: Selections) -> List[Dict[str, Any]]:
+        """Get the records with one of the chosen values of every facet field, in their stored order."""
+        with self._read(record_type):
+            snapshot = self._snapshot(record_type)
+            return [snapshot[position] for position in bit_positions(self._mask(record_type, selections))]
+
+    def count(self, record_type: str, selections: Selections) -> int:
+        """Count the records with one of the chosen values of every facet field."""
+        with self._read(record_type):
+            self._snapshot(record_type)
+            return popcount(self._mask(record_type, selections))
+
+    def counts(self, record_type: str, field: str, selections: Selections) -> List[Tuple[Any, int]]:
+        """
+        Count the records of each value of a facet field, by value.
+
+        The choices of the other fields apply, but not those of `field` itself, so each
+        count is the number of records shown when that value is chosen too.
+        """
+        with self._read(record_type):
+            self._snapshot(record_type)
+            mask = self._mask(record_type, selections, skip_field=field)
+            counts = [(value, popcount(bitmap & mask)) for value, bitmap in self._bitmaps[record_type][field].items()]
+        return sorted(((value, count) for value, count in counts if count),
+                      key=lambda item: str(item[0]).casefold())
+
+    @staticmethod
+    def matches(record: Dict[str, Any], selections: Selections) -> bool:
+        """Check whether a record has one of the chosen values of every facet field."""
+        for field, values in selections.items():
+            values = list(values)
+            if values and record.get(field) not in values:
+                return False
+        return True
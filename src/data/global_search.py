@@ -0,0 +1,230 @@
+"""
+Global Search Module
+One token-prefix index over every record type and its main fields, for searching all records at once.
+"""
+import re
+from bisect import bisect_left, insort
+from contextlib import nullcontext
+from typing import Any, Dict, List, Optional, Tuple
+from src.data.indexes import RecordIndex
+from src.data.ordering import record_number
+from src.data.search import search_key
+
+# Fields searched per record type, and how much a match in each counts towards the rank of a hit
+SEARCH_FIELDS = {
+    'client': {'id': 3, 'name': 3, 'email': 2, 'phone': 2, 'city': 1, 'country': 1},
+    'airline': {'id': 3, 'company_name': 3, 'country': 1},
+    'flight': {'id': 3, 'client': 2, 'airline': 2, 'destination': 2, 'departure': 1},
+}
+
+# Extra rank of a search word matching a whole word rather than its start
+EXACT_MATCH_BONUS = 1
+
+# Records of each type looked at per search; very short words stop there, taking whole-word matches first
+MAX_CANDIDATES = 1000
+
+WORD_PATTERN = re.compile(r'\w+')
+
+
+def field_tokens(value: Any) -> List[str]:
+    """Get the words a field value is found by: its words, the whole value, and runs of its number groups."""
+    key = search_key(value)
+    words = WORD_PATTERN.findall(key)
+    tokens = list(words)
+    if len(words) > 1:
+        tokens.append(key)
+        # Phone numbers are typed without their spaces, with or without the country code
+        groups = [word for word in words if word.isdigit()]
+        tokens += [''.join(groups[start:]) for start in range(len(groups) - 1)]
+    return tokens
+
+
+class SearchHit:
+    """A record found by a global search, with its rank and the field that matched best."""
+
+    __slots__ = ('record_type', 'record', 'score', 'field')
+
+    def __init__(self, record_type: str, record: Dict[str, Any], score: int, field: str):
+        self.record_type = record_type
+        self.record = record
+        self.score = score
+        self.field = field
+
+    def __repr__(self) -> str:
+        return f"SearchHit({self.record_type!r}, {self.record.get('id')!r}, score={self.score}, field={self.field!r})"
+
+
+class GlobalSearchIndex(RecordIndex):
+    """
+    Index of the words in the searched fields of every record, sorted for prefix lookups.
+
+    A record is found when every word of the search is the start of one of its words. Hits
+    are ranked by the weight of the fields that matched, whole words counting more.
+
+    Registered with the record manager (`register_index`), the index follows every add,
+    edit and deletion. Unregistered, it is built again whenever the records change.
+    It depends on every field (`fields` is None), so hits always hold the current record.
+    """
+
+    def __init__(self, record_manager):
+        self.record_manager = record_manager
+        self.registered = False
+        self._versions: Dict[str, int] = {}
+        # Sorted distinct words, and the records of each type holding each with the weight and field of the match
+        self._tokens: List[str] = []
+        self._postings: Dict[str, Dict[str, Dict[Tuple[str, Any], Tuple[int, str]]]] = {}
+        # Words and current record of each (record type, ID)
+        self._record_tokens: Dict[Tuple[str, Any], Dict[str, Tuple[int, str]]] = {}
+        self._records: Dict[Tuple[str, Any], Dict[str, Any]] = {}
+
+    def rebuild(self, record_type, records):
+        self.registered = True
+        self._load(record_type, records)
+
+    def on_add(self, record_type, position, record):
+        self._add(record_type, record, sort=True)
+
+    def on_update(self, record_type, position, old_record, new_record):
+        key = (record_type, new_record.get('id'))
+        if key in self._records and old_record.get('id') == new_record.get('id') and \
+                all(old_record.get(field) == new_record.get(field) for field in SEARCH_FIELDS.get(record_type, ())):
+            # Same words; only hits need the current record
+            self._records[key] = new_record
+            return
+        self._remove((record_type, old_record.get('id')))
+        self._add(record_type, new_record, sort=True)
+
+    def on_delete(self, record_type, records):
+        remaining = {record.get('id') for record in records}
+        for key in [key for key in self._records if key[0] == record_type and key[1] not in remaining]:
+            self._remove(key)
+
+    def _load(self, record_type: str, records: List[Dict[str, Any]]) -> None:
+        """Index the records of a type from scratch."""
+        if record_type not in SEARCH_FIELDS:
+            return
+        for key in [key for key in self._records if key[0] == record_type]:
+            self._remove(key, sort=False)
+        for record in records:
+            self._add(record_type, record, sort=False)
+        self._tokens = sorted(self._postings)
+
+    def _add(self, record_type: str, record: Dict[str, Any], sort: bool) -> None:
+        """Index the words of a record, keeping the word list sorted if `sort`."""
+        if record_type not in SEARCH_FIELDS:
+            return
+        key = (record_type, record.get('id'))
+        if key in self._records:
+            self._remove(key, sort)
+
+        tokens = {}
+        for field, weight in SEARCH_FIELDS[record_type].items():
+            for token in field_tokens(record.get(field)):
+                if token not in tokens or tokens[token][0] < weight:
+                    tokens[token] = (weight, field)
+        self._record_tokens[key] = tokens
+        self._records[key] = record
+
+        for token, match in tokens.items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                if sort:
+                    insort(self._tokens, token)
+            postings.setdefault(record_type, {})[key] = match
+
+    def _remove(self, key: Tuple[str, Any], sort: bool = True) -> None:
+        """Remove a record from the index."""
+        self._records.pop(key, None)
+        for token in self._record_tokens.pop(key, {}):
+            postings = self._postings[token]
+            type_postings = postings[key[0]]
+            del type_postings[key]
+            if not type_postings:
+                del postings[key[0]]
+            if not postings:
+                del self._postings[token]
+                if sort:
+                    del self._tokens[bisect_left(self._tokens, token)]
+
+    def _refresh(self) -> None:
+        """Build the index again for record types that changed, when no hooks keep it up to date."""
+        for record_type in SEARCH_FIELDS:
+            snapshot = self.record_manager.snapshot(record_type)
+            if self._versions.get(record_type) != snapshot.version:
+                self._load(record_type, snapshot)
+                self._versions[record_type] = snapshot.version
+
+    def search(self, text: str, limit: Optional[int] = 10) -> Dict[str, List[SearchHit]]:
+        """
+        Find the records matching every word of `text` (ignoring case and accents).
+
+        Returns the hits of each record type, best first, at most `limit` per type.
+        """
+        words = WORD_PATTERN.findall(search_key(text))
+        if not words:
+            return {}
+
+        # Read the index while no writer changes it
+        lock = getattr(self.record_manager, 'lock', None)
+        with lock.reading() if lock is not None else nullcontext():
+            if not self.registered:
+                self._refresh()
+
+            # Start from the word matching the fewest distinct words, likely the fewest records
+            ranges = [(word, bisect_left(self._tokens, word), bisect_left(self._tokens, word + '\uffff'))
+                      for word in words]
+            word, start, end = min(ranges, key=lambda item: item[2] - item[1])
+
+            hits = {}
+            for record_type in SEARCH_FIELDS:
+                matches = []
+                for key, (score, field) in self._candidates(record_type, word, start, end).items():
+                    tokens = self._record_tokens[key]
+                    for other_word in words:
+                        if other_word is word:
+                            continue
+                        match = self._best_match(other_word, tokens)
+                        if match is None:
+                            break
+                        score += match[0]
+                    else:
+                        matches.append((-score, record_number(key[1]), field, key))
+
+                if matches:
+                    matches.sort()
+                    hits[record_type] = [SearchHit(record_type, self._records[key], -score, field)
+                                         for score, _, field, key in matches[:limit]]
+        return hits
+
+    def _candidates(self, record_type: str, word: str, start: int,
+                    end: int) -> Dict[Tuple[str, Any], Tuple[int, str]]:
+        """Get the records of a type with a word starting with `word`, and the rank and field of their best match."""
+        candidates = {}
+        # Words are sorted, so a whole-word match comes first and is kept when a short word matches too many
+        for position in range(start, end):
+            token = self._tokens[position]
+            postings = self._postings[token].get(record_type)
+            if not postings:
+                continue
+            bonus = EXACT_MATCH_BONUS if token == word else 0
+            for key, (weight, field) in postings.items():
+                score = weight + bonus
+                if key not in candidates:
+                    if len(candidates) >= MAX_CANDIDATES:
+                        return candidates
+                    candidates[key] = (score, field)
+                elif candidates[key][0] < score:
+                    candidates[key] = (score, field)
+        return candidates
+
+    @staticmethod
+    def _best_match(word: str, tokens: Dict[str, Tuple[int, str]]) -> Optional[Tuple[int, str]]:
+        """Get the rank and field of a record's best word starting with `word`, or None."""
+        best = None
+        for token, (weight, field) in tokens.items():
+            if token.startswith(word):
+                score = weight + (EXACT_MATCH_BONUS if token == word else 0)
+                if best is None or score > best[0]:
+                    best = (score, field)
+        return best
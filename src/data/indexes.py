@@ -0,0 +1,76 @@
+"""
+Record Indexes
+Indexes that RecordManager keeps in sync with its records on every mutation.
+"""
+from typing import Any, Dict, List, Optional
+
+
+class RecordIndex:
+    """
+    Base class for indexes maintained by RecordManager.
+
+    Subclasses override the hooks below. `fields` lists the record fields the index
+    depends on, so updates that do not touch those fields can skip the index.
+    """
+
+    # Fields the index depends on (None means every field)
+    fields: Optional[frozenset] = None
+
+    def rebuild(self, record_type: str, records: List[Dict[str, Any]]) -> None:
+        """Rebuild the index of a record type from scratch."""
+        raise NotImplementedError
+
+    def on_add(self, record_type: str, position: int, record: Dict[str, Any]) -> None:
+        """Update the index after a record was appended at `position`."""
+        raise NotImplementedError
+
+    def on_add_records(self, record_type: str, position: int, records: List[Dict[str, Any]]) -> None:
+        """Update the index after records were appended from `position` on (one `on_add` each by default)."""
+        for offset, record in enumerate(records):
+            self.on_add(record_type, position + offset, record)
+
+    def on_update(self, record_type: str, position: int,
+                  old_record: Dict[str, Any], new_record: Dict[str, Any]) -> None:
+        """Update the index after the record at `position` was replaced."""
+        raise NotImplementedError
+
+    def on_delete(self, record_type: str, records: List[Dict[str, Any]]) -> None:
+        """Update the index after records were deleted (positions shift, so rebuild by default)."""
+        self.rebuild(record_type, records)
+
+    def depends_on(self, changed_fields) -> bool:
+        """Check whether a change to the given fields affects the index."""
+        return self.fields is None or not self.fields.isdisjoint(changed_fields)
+
+
+class IdIndex(RecordIndex):
+    """Map record IDs to their position in the record list (first occurrence wins)."""
+
+    fields = frozenset({'id'})
+
+    def __init__(self):
+        self.positions: Dict[str, Dict[Any, int]] = {}
+
+    def rebuild(self, record_type, records):
+        positions = self.positions[record_type] = {}
+        for position, record in enumerate(records):
+            positions.setdefault(record.get('id'), position)
+
+    def on_add(self, record_type, position, record):
+        self.positions.setdefault(record_type, {}).setdefault(record.get('id'), position)
+
+    def on_add_records(self, record_type, position, records):
+        add = self.positions.setdefault(record_type, {}).setdefault
+        for offset, record in enumerate(records):
+            add(record.get('id'), position + offset)
+
+    def on_update(self, record_type, position, old_record, new_record):
+        positions = self.positions.setdefault(record_type, {})
+        if positions.get(old_record.get('id')) == position:
+            del positions[old_record.get('id')]
+        if positions.get(new_record.get('id'), position) >= position:
+            positions[new_record.get('id')] = position
+
+    def get(self, record_type: str, record_id: Any) -> Optional[int]:
+        """Get the position of a record by ID."""
+        return self.positions.get(record_type, {}).get(record_id)
@@ -0,0 +1,278 @@
+"""
+Integrity Module
+Verifies record files against their per-record CRC32 checksums and salvages the valid
+records of damaged files.
+
+Every record file written by RecordManager has a '.crc' file alongside it, holding the
+checksum of each record. Verification checks each record type in a separate process.
+
+Usage:
+    python -m src.data.integrity --folder src/record --format json
+"""
+import argparse
+import json
+import lzma
+import os
+import re
+import sys
+import zlib
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from src.data.storage import (FILE_FORMATS, COMPRESSIONS, open_record_file, record_crc,
+                              get_checksum_path, read_checksums, iter_pickle_batches)
+
+WHITESPACE = re.compile(r'\s*')
+
+# Start of a top-level record in a JSON array written with indent=4
+JSON_RECORD_START = '\n    {'
+
+# Errors raised while reading a cut off or damaged compressed stream
+DECOMPRESSION_ERRORS = (EOFError, OSError, zlib.error, lzma.LZMAError)
+
+
+class VerificationResult:
+    """Result of verifying one record file."""
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.records = 0  # Records that could be parsed
+        self.valid = 0  # Parsed records matching a checksum
+        self.corrupt = 0  # Parsed records without a matching checksum, or unreadable records
+        self.missing = 0  # Checksums without a matching record
+        self.has_checksums = True
+        self.error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        """Whether the file is complete and undamaged."""
+        return self.error is None and self.corrupt == 0 and self.missing == 0
+
+    def __repr__(self) -> str:
+        return (f"VerificationResult({self.file_path!r}, records={self.records}, valid={self.valid}, "
+                f"corrupt={self.corrupt}, missing={self.missing}, error={self.error!r})")
+
+
+def _scan_json_array(text: str) -> Tuple[List[Any], int]:
+    """Parse the records of a JSON array, skipping damaged records where possible."""
+    decoder = json.JSONDecoder()
+    records, damaged = [], 0
+    position = WHITESPACE.match(text, 0).end()
+    if not text.startswith('[', position):
+        return records, 1
+    position += 1
+
+    while True:
+        position = WHITESPACE.match(text, position).end()
+        if position >= len(text):
+            # The array was cut off
+            return records, damaged + 1 if records else damaged
+        if text[position] == ']':
+            return records, damaged
+
+        try:
+            record, position = decoder.raw_decode(text, position)
+            records.append(record)
+            position = WHITESPACE.match(text, position).end()
+            if text.startswith(',', position):
+                position += 1
+                continue
+            if text.startswith(']', position):
+                return records, damaged
+            raise ValueError("Expected ',' or ']'")
+        except ValueError:
+            # Resume at the start of the next record
+            damaged += 1
+            next_record = text.find(JSON_RECORD_START, position + 1)
+            if next_record == -1:
+                return records, damaged
+            position = next_record
+
+
+def scan_records(file_path: str, file_format: str,
+                 compression: Optional[str] = None) -> Tuple[List[Any], int, Optional[str]]:
+    """
+    Parse as many records of a file as possible.
+
+    Returns the parsed records, the number of damaged records that were skipped, and an
+    error message if the file could not be read at all.
+    """
+    try:
+        if file_format == 'jsonl':
+            records, damaged = [], 0
+            with open_record_file(file_path, 'r', compression) as file:
+                try:
+                    for line in file:
+                        if line.strip():
+                            try:
+                                records.append(json.loads(line))
+                            except ValueError:
+                                damaged += 1
+                except DECOMPRESSION_ERRORS + (UnicodeDecodeError,):
+                    # Compressed stream cut off, keep the lines read so far
+                    damaged += 1
+            return records, damaged, None
+
+        if file_format == 'json':
+            with open_record_file(file_path, 'r', compression) as file:
+                try:
+                    text = file.read()
+                except DECOMPRESSION_ERRORS + (UnicodeDecodeError,):
+                    return [], 1, "Compressed data is damaged"
+            records, damaged = _scan_json_array(text)
+            return records, damaged, None
+
+        if file_format == 'pickle':
+            records = []
+            try:
+                with open_record_file(file_path, 'rb', compression) as file:
+                    for record in iter_pickle_batches(file):
+                        records.append(record)
+                return records, 0, None
+            except Exception as e:
+                # A damaged batch cannot be partially read, and the batches after it cannot be found
+                return records, 1, f"Pickle data is damaged: {e}"
+
+    except OSError as e:
+        return [], 0, str(e)
+
+    raise ValueError(f"File format '{file_format}' is not supported.")
+
+
+def _match_checksums(records: List[Any], checksums: Optional[List[int]]) -> Tuple[List[Any], int, int]:
+    """Split records into those matching a stored checksum, returning (valid records, corrupt, unmatched checksums)."""
+    if checksums is None:
+        return records, 0, 0
+
+    remaining = Counter(checksums)
+    valid_records, corrupt = [], 0
+    for record in records:
+        try:
+            checksum = record_crc(record)
+        except (TypeError, ValueError):
+            checksum = None
+        if remaining[checksum] > 0:
+            remaining[checksum] -= 1
+            valid_records.append(record)
+        else:
+            corrupt += 1
+    return valid_records, corrupt, sum(remaining.values())
+
+
+def _verify_jsonl_lines(result: VerificationResult, compression: Optional[str], checksums: List[int]) -> None:
+    """Verify a JSON Lines file by checksumming its raw lines, decoding only lines that do not match."""
+    remaining = Counter(checksums)
+    try:
+        with open_record_file(result.file_path, 'r', compression) as file:
+            try:
+                for line in file:
+                    line = line.rstrip('\n')
+                    if not line.strip():
+                        continue
+                    checksum = zlib.crc32(line.encode('utf-8'))
+                    if remaining[checksum] > 0:
+                        remaining[checksum] -= 1
+                        result.valid += 1
+                        result.records += 1
+                        continue
+                    result.corrupt += 1
+                    try:
+                        json.loads(line)
+                        result.records += 1
+                    except ValueError:
+                        pass
+            except DECOMPRESSION_ERRORS + (UnicodeDecodeError,):
+                result.corrupt += 1
+    except OSError as e:
+        result.error = str(e)
+    result.missing = max(sum(remaining.values()) - result.corrupt, 0)
+
+
+def verify_file(file_path: str, file_format: str, compression: Optional[str] = None) -> VerificationResult:
+    """Verify every record of a file against its stored checksums."""
+    result = VerificationResult(file_path)
+    checksums = read_checksums(get_checksum_path(file_path))
+    result.has_checksums = checksums is not None
+    if file_format == 'jsonl' and checksums is not None:
+        _verify_jsonl_lines(result, compression, checksums)
+        return result
+
+    records, damaged, result.error = scan_records(file_path, file_format, compression)
+
+    valid_records, corrupt, unmatched = _match_checksums(records, checksums)
+    result.records = len(records)
+    result.valid = len(valid_records)
+    result.corrupt = corrupt + damaged
+    # Corrupt records also leave their checksum unmatched, count them once
+    result.missing = max(unmatched - result.corrupt, 0)
+    return result
+
+
+def salvage_records(file_path: str, file_format: str,
+                    compression: Optional[str] = None) -> Tuple[List[Any], int]:
+    """Recover the valid records of a damaged file, returning (records, number of dropped records)."""
+    records, damaged, _ = scan_records(file_path, file_format, compression)
+    checksums = read_checksums(get_checksum_path(file_path))
+    valid_records, corrupt, unmatched = _match_checksums(records, checksums)
+    return valid_records, max(unmatched, corrupt + damaged)
+
+
+def verify_record_type(settings: Dict[str, Any], record_type: str) -> List[VerificationResult]:
+    """Verify every file of a record type (runs in a worker process)."""
+    from src.data.record_manager import RecordManager
+    manager = RecordManager(auto_load=False, **settings)
+    return [verify_file(file_path, manager.file_format, manager.compression)
+            for file_path in manager.get_record_files(record_type)]
+
+
+def verify_records(settings: Dict[str, Any], record_types: Optional[List[str]] = None,
+                   workers: Optional[int] = None) -> Dict[str, List[VerificationResult]]:
+    """
+    Verify the files of each record type in parallel, one process per type.
+
+    `settings` holds the RecordManager arguments (data_folder, file_format, sharded,
+    compression) that locate the files.
+    """
+    from src.data.record_manager import RecordManager
+    record_types = record_types or RecordManager.RECORD_TYPES
+    workers = workers or len(record_types)
+
+    if workers == 1:
+        return {record_type: verify_record_type(settings, record_type) for record_type in record_types}
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {record_type: executor.submit(verify_record_type, settings, record_type)
+                   for record_type in record_types}
+        return {record_type: future.result() for record_type, future in futures.items()}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Verify record files against their checksums.")
+    parser.add_argument("--folder", required=True, help="Folder holding the records")
+    parser.add_argument("--format", required=True, choices=FILE_FORMATS)
+    parser.add_argument("--compression", choices=[c for c in COMPRESSIONS if c])
+    parser.add_argument("--sharded", action="store_true", help="Records use the sharded layout")
+    parser.add_argument("--workers", type=int, help="Number of worker processes")
+    args = parser.parse_args(argv)
+
+    settings = {"data_folder": args.folder, "file_format": args.format,
+                "compression": args.compression, "sharded": args.sharded}
+    results = verify_records(settings, workers=args.workers)
+
+    all_ok = True
+    for record_type, file_results in results.items():
+        for result in file_results:
+            all_ok = all_ok and result.ok
+            status = "OK" if result.ok else "DAMAGED"
+            if not result.has_checksums:
+                status += " (no checksums)"
+            print(f"{record_type}: {os.path.basename(result.file_path)} {status} - {result.valid} valid, "
+                  f"{result.corrupt} corrupt, {result.missing} missing"
+                  + (f", error: {result.error}" if result.error else ""))
+
+    return 0 if all_ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""
+Locks Module
+Reader-writer lock used by RecordManager's thread-safe mode.
+"""
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+
+class ReadWriteLock:
+    """
+    Lock that lets many readers in at once, or a single writer.
+
+    Waiting writers are preferred over new readers, so a steady stream of readers cannot
+    starve them. The lock is reentrant: a thread holding it may acquire it again, and a
+    writer may also read. A reader may not upgrade to writing, which would deadlock.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._waiting_writers = 0
+        self._writer = None
+        self._write_depth = 0
+        self._local = threading.local()
+
+    def acquire_read(self) -> None:
+        """Wait until no writer holds or waits for the lock, then hold it for reading."""
+        depth = getattr(self._local, 'read_depth', 0)
+        if depth or self._writer == threading.get_ident():
+            self._local.read_depth = depth + 1
+            return
+
+        with self._condition:
+            while self._writer is not None or self._waiting_writers:
+                self._condition.wait()
+            self._readers += 1
+        self._local.read_depth = 1
+        self._local.counted = True
+
+    def release_read(self) -> None:
+        """Release one read hold."""
+        self._local.read_depth -= 1
+        if self._local.read_depth or not getattr(self._local, 'counted', False):
+            return
+
+        self._local.counted = False
+        with self._condition:
+            self._readers -= 1
+            if not self._readers:
+                self._condition.notify_all()
+
+    def acquire_write(self) -> None:
+        """Wait until no other thread holds the lock, then hold it for writing."""
+        me = threading.get_ident()
+        if self._writer == me:
+            self._write_depth += 1
+            return
+        if getattr(self._local, 'read_depth', 0):
+            raise RuntimeError("A read lock cannot be upgraded to a write lock.")
+
+        with self._condition:
+            self._waiting_writers += 1
+            while self._writer is not None or self._readers:
+                self._condition.wait()
+            self._waiting_writers -= 1
+            self._writer = me
+            self._write_depth = 1
+
+    def release_write(self) -> None:
+        """Release one write hold."""
+        self._write_depth -= 1
+        if self._write_depth:
+            return
+
+        with self._condition:
+            self._writer = None
+            self._condition.notify_all()
+
+    @contextmanager
+    def reading(self) -> Iterator[None]:
+        """Hold the lock for reading inside a `with` block."""
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def writing(self) -> Iterator[None]:
+        """Hold the lock for writing inside a `with` block."""
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
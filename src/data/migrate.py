@@ -0,0 +1,125 @@
+"""
+Format Migration Tool
+Streams records from one storage backend (format, compression, sharded layout) into another.
+
+Records are streamed type by type and read and written one at a time, so memory stays
+constant in every format. Each migrated type is verified by comparing record counts and CRC32 checksums.
+Running the migration again is safe: types whose target already matches are skipped, and
+the source files are never modified.
+
+Usage:
+    python -m src.data.migrate --source-folder src/record --source-format json --target-format jsonl
+"""
+import argparse
+import json
+import os
+import sys
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from src.data.record_manager import RecordManager
+from src.data.storage import FILE_FORMATS, COMPRESSIONS
+
+
+class MigrationResult:
+    """Outcome of migrating one record type."""
+
+    def __init__(self, record_type: str, status: str, count: int = 0, checksum: int = 0, verified: bool = True):
+        self.record_type = record_type
+        self.status = status
+        self.count = count
+        self.checksum = checksum
+        self.verified = verified
+
+    def __repr__(self) -> str:
+        return (f"MigrationResult({self.record_type!r}, status={self.status!r}, count={self.count}, "
+                f"checksum={self.checksum:#010x}, verified={self.verified})")
+
+
+def record_checksum(records: Iterable[Dict[str, Any]]) -> Tuple[int, int]:
+    """Get the record count and a CRC32 over the records, independent of the storage format."""
+    encode = json.JSONEncoder(sort_keys=True, separators=(',', ':'), default=str).encode
+    count, checksum = 0, 0
+    for record in records:
+        checksum = zlib.crc32(encode(record).encode('utf-8'), checksum)
+        count += 1
+    return count, checksum
+
+
+def _same_backend(source: RecordManager, target: RecordManager) -> bool:
+    """Check whether two managers read and write the same files."""
+    return (os.path.abspath(source.data_folder) == os.path.abspath(target.data_folder)
+            and source.file_format == target.file_format
+            and source.compression == target.compression
+            and source.sharded == target.sharded)
+
+
+def migrate_records(source: RecordManager, target: RecordManager,
+                    record_types: Optional[List[str]] = None) -> List[MigrationResult]:
+    """
+    Migrate the stored records of each record type from source to target and verify them.
+
+    Both managers should be created with `auto_load=False`. Types without source records
+    are skipped so an existing target is never emptied.
+    """
+    if _same_backend(source, target):
+        raise ValueError("Source and target storage are the same.")
+
+    results = []
+    for record_type in record_types or RecordManager.RECORD_TYPES:
+        count, checksum = record_checksum(source.iter_stored_records(record_type))
+        if count == 0:
+            results.append(MigrationResult(record_type, "no source records"))
+            continue
+
+        # Skip types that an earlier run already migrated
+        if record_checksum(target.iter_stored_records(record_type)) == (count, checksum):
+            results.append(MigrationResult(record_type, "up to date", count, checksum))
+            continue
+
+        target.write_stored_records(record_type, source.iter_stored_records(record_type))
+        verified = record_checksum(target.iter_stored_records(record_type)) == (count, checksum)
+        results.append(MigrationResult(record_type, "migrated", count, checksum, verified))
+
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Migrate records between storage formats.")
+    parser.add_argument("--source-folder", required=True, help="Folder holding the source records")
+    parser.add_argument("--source-format", required=True, choices=FILE_FORMATS)
+    parser.add_argument("--source-compression", choices=[c for c in COMPRESSIONS if c])
+    parser.add_argument("--source-sharded", action="store_true", help="Source uses the sharded layout")
+    parser.add_argument("--target-folder", help="Folder for the migrated records (defaults to the source folder)")
+    parser.add_argument("--target-format", required=True, choices=FILE_FORMATS)
+    parser.add_argument("--target-compression", choices=[c for c in COMPRESSIONS if c])
+    parser.add_argument("--target-compression-level", type=int)
+    parser.add_argument("--target-sharded", action="store_true", help="Write the sharded layout")
+    parser.add_argument("--shard-size", type=int, default=1000, help="IDs per shard for a sharded target")
+    parser.add_argument("--types", nargs="+", choices=RecordManager.RECORD_TYPES, help="Record types to migrate")
+    args = parser.parse_args(argv)
+
+    source = RecordManager(data_folder=args.source_folder, file_format=args.source_format,
+                           sharded=args.source_sharded, compression=args.source_compression,
+                           auto_load=False)
+    target = RecordManager(data_folder=args.target_folder or args.source_folder, file_format=args.target_format,
+                           sharded=args.target_sharded, shard_size=args.shard_size,
+                           compression=args.target_compression, compression_level=args.target_compression_level,
+                           auto_load=False)
+
+    try:
+        results = migrate_records(source, target, args.types)
+    except (OSError, ValueError) as e:
+        print(f"Migration failed: {e}")
+        return 1
+
+    for result in results:
+        verification = "verified" if result.verified else "VERIFICATION FAILED"
+        print(f"{result.record_type}: {result.status}, {result.count} records, "
+              f"crc32 {result.checksum:#010x} ({verification})")
+
+    return 0 if all(result.verified for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
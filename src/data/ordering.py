@@ -0,0 +1,287 @@
+"""
+Ordering Module
+Typed sort keys for record fields, and keyset (cursor) pagination over records sorted by them.
+"""
+import datetime
+from bisect import bisect_left, bisect_right
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+# A field name, or (field, descending) pairs from the most to the least significant column
+OrderBy = Union[str, Sequence[Tuple[str, bool]]]
+
+# Fields holding dates ('DD/MM/YYYY') or timestamps (ISO 8601)
+DATE_FIELDS = frozenset({'depart_date', 'return_date', 'created_at'})
+
+# Display format used by the GUI tables ('16 Mar 2025')
+DISPLAY_DATE_FORMAT = "%d %b %Y"
+
+
+def record_number(record_id: Any) -> int:
+    """Get the numeric part of a record ID (e.g. 'F0012' -> 12)."""
+    text = str(record_id)
+    # Fast path for the usual one-letter prefix followed by digits
+    number = text[1:] if text[:1].isalpha() else text
+    if number.isdecimal():
+        return int(number)
+    digits = ''.join(char for char in text if char.isdigit())
+    return int(digits) if digits.isdecimal() else 0
+
+
+def date_ordinal(value: Any) -> float:
+    """Get the day number of a date or timestamp, with the time of day as a fraction (0 if missing)."""
+    if not value:
+        return 0.0
+    text = str(value)
+    try:
+        if '/' in text:
+            day, month, year = text.split('/')
+            return float(datetime.date(int(year), int(month), int(day)).toordinal())
+        moment = datetime.datetime.fromisoformat(text)
+    except ValueError:
+        try:
+            moment = datetime.datetime.strptime(text, DISPLAY_DATE_FORMAT)
+        except ValueError:
+            return 0.0
+    seconds = moment.hour * 3600 + moment.minute * 60 + moment.second + moment.microsecond / 1e6
+    return moment.toordinal() + seconds / 86400
+
+
+def text_key(value: Any) -> str:
+    """Get the case-insensitive sort key of a text value."""
+    return str(value).casefold() if value is not None else ""
+
+
+def value_key(field: str) -> Callable[[Any], Any]:
+    """Get the typed sort key function of a field's values: IDs by number, dates by day, text ignoring case."""
+    if field == 'id':
+        return record_number
+    if field in DATE_FIELDS:
+        return date_ordinal
+    return text_key
+
+
+def sort_key(field: str) -> Callable[[Dict[str, Any]], Any]:
+    """Get the typed sort key function of records by a field."""
+    key = value_key(field)
+    return lambda record: key(record.get(field))
+
+
+class RecordPage:
+    """One page of records and the cursor of the page after it."""
+
+    __slots__ = ('records', 'cursor', 'total')
+
+    def __init__(self, records: List[Dict[str, Any]], cursor: Optional[Tuple[Any, ...]], total: int):
+        self.records = records
+        self.cursor = cursor  # Pass as `after` to get the next page; None on the last page
+        self.total = total  # Records in every page together
+
+    def __repr__(self) -> str:
+        return f"RecordPage(records={len(self.records)}, cursor={self.cursor!r}, total={self.total})"
+
+
+class Ordering:
+    """
+    Records sorted by one field, or by several, ties broken by ID number, for keyset pagination.
+
+    A cursor is the sort key of each column of the last record of a page, then its ID number.
+    The next page starts at the first record after it, found by bisection, so it stays
+    correct while records before it are added or deleted.
+
+    Only the sorted positions of the records are built up front; the sorted record and key
+    lists are built the first time they are needed.
+    """
+
+    def __init__(self, records: Sequence[Dict[str, Any]], order_by: str = 'id', version: Optional[int] = None):
+        if order_by == 'id':
+            keys = [(number, number) for number in (record_number(record.get('id')) for record in records)]
+        else:
+            # Values repeat (dates, airlines, countries), so each distinct value is keyed once
+            key, value_keys = value_key(order_by), {}
+            keys = []
+            for record in records:
+                value = record.get(order_by)
+                try:
+                    value_sort_key = value_keys[value]
+                except KeyError:
+                    value_sort_key = value_keys[value] = key(value)
+                except TypeError:
+                    value_sort_key = key(value)
+                keys.append((value_sort_key, record_number(record.get('id'))))
+        self._set_order(records, order_by, keys, sorted(range(len(keys)), key=keys.__getitem__), version)
+
+    def _set_order(self, records: Sequence[Dict[str, Any]], order_by: Any,
+                   position_keys: Optional[List[Tuple[Any, int]]], positions: List[int],
+                   version: Optional[int]) -> None:
+        """Store the sorted positions of the records, given the key of the record at each original position."""
+        self.order_by = order_by
+        self.version = version
+        self.source = records
+        self.positions = positions
+        self._position_keys = position_keys
+        # Column orderings of an order by several columns, with their directions, and the ID ordering
+        self._columns: Optional[List[Tuple[Ordering, bool]]] = None
+        self._by_id: Optional[Ordering] = None
+        self._keys = None
+        self._records = None
+        self._ranks = None
+
+    @property
+    def position_keys(self) -> List[Tuple[Any, ...]]:
+        """The sort key of the record at each original position."""
+        if self._position_keys is None:
+            self._position_keys = [self.position_key(position) for position in range(len(self.positions))]
+        return self._position_keys
+
+    def position_key(self, position: int) -> Tuple[Any, ...]:
+        """Get the sort key of the record at an original position: its column keys, then its ID number."""
+        if self._position_keys is None:
+            return (*(column.position_keys[position][0] for column, _ in self._columns),
+                    self._by_id.position_keys[position][1])
+        return self._position_keys[position]
+
+    @property
+    def keys(self) -> List[Tuple[Any, int]]:
+        """The sort keys in sorted order."""
+        if self._keys is None:
+            position_keys = self.position_keys
+            self._keys = [position_keys[position] for position in self.positions]
+        return self._keys
+
+    @property
+    def records(self) -> List[Dict[str, Any]]:
+        """The records in sorted order."""
+        if self._records is None:
+            self._records = [self.source[position] for position in self.positions]
+        return self._records
+
+    @classmethod
+    def combine(cls, records: Sequence[Dict[str, Any]], columns: Sequence[Tuple["Ordering", bool]],
+                by_id: "Ordering", version: Optional[int] = None) -> "Ordering":
+        """
+        Order records by several columns, reusing the single-column orderings of the same records.
+
+        Each column contributes the rank of its key, counted down for descending columns,
+        to one composite integer key, so the records are sorted once by plain integers.
+        Ties are broken by ID number, taken from the ID ordering. Ranks change with the
+        records, so cursors hold the column keys themselves.
+        """
+        composite = None
+        for ordering, descending in columns:
+            ranks, count = ordering.ranks()
+            if composite is None:
+                composite = [count - 1 - rank for rank in ranks] if descending else ranks
+            elif descending:
+                composite = [value * count + count - 1 - rank for value, rank in zip(composite, ranks)]
+            else:
+                composite = [value * count + rank for value, rank in zip(composite, ranks)]
+
+        ordering = cls.__new__(cls)
+        # Sorting the ID order is stable, so equal composite keys stay in ID order
+        ordering._set_order(records, tuple((column.order_by, descending) for column, descending in columns),
+                            None, sorted(by_id.positions, key=composite.__getitem__), version)
+        ordering._columns = list(columns)
+        ordering._by_id = by_id
+        return ordering
+
+    def ranks(self) -> Tuple[List[int], int]:
+        """Get the dense rank of each record's sort key, by the record's original position, and the rank count."""
+        if self._ranks is None:
+            ranks = [0] * len(self.positions)
+            rank, previous = -1, None
+            position_keys = self.position_keys
+            for position in self.positions:
+                key = position_keys[position][0]
+                if rank < 0 or key != previous:
+                    rank, previous = rank + 1, key
+                ranks[position] = rank
+            self._ranks = (ranks, rank + 1)
+        return self._ranks
+
+    def page(self, after: Optional[Sequence[Any]] = None, limit: int = 100,
+             descending: bool = False) -> RecordPage:
+        """Get up to `limit` records following the cursor `after` (None for the first page)."""
+        if limit < 1:
+            raise ValueError("Page limit must be at least 1.")
+
+        total = len(self.positions)
+        if after is None:
+            position = total if descending else 0
+        elif self._columns is not None:
+            position = self._bisect(tuple(after), right=not descending)
+        elif descending:
+            position = bisect_left(self.keys, tuple(after))
+        else:
+            position = bisect_right(self.keys, tuple(after))
+
+        if descending:
+            return self.window(total - position, limit, descending=True)
+        return self.window(position, limit)
+
+    def _bisect(self, cursor: Tuple[Any, ...], right: bool) -> int:
+        """Find where a cursor falls in an order by several columns, comparing descending columns reversed."""
+        if len(cursor) != len(self._columns) + 1:
+            raise ValueError(f"Cursor {list(cursor)!r} does not match the order {list(self.order_by)!r}.")
+        directions = [descending for _, descending in self._columns] + [False]
+
+        low, high = 0, len(self.positions)
+        while low < high:
+            middle = (low + high) // 2
+            # The key comes before the cursor (-1), is equal to it (0) or comes after it (1)
+            order = 0
+            for value, bound, descending in zip(self.position_key(self.positions[middle]), cursor, directions):
+                if value != bound:
+                    order = 1 if (value > bound) != descending else -1
+                    break
+            if order < 0 or (right and order == 0):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def window(self, start: int, count: int, descending: bool = False) -> RecordPage:
+        """Get up to `count` records from position `start` of the order, for scrolling by offset."""
+        total = len(self.positions)
+        start = max(start, 0)
+        if descending:
+            end = max(total - start, 0)
+            start = max(end - count, 0)
+            positions = self.positions[start:end][::-1]
+            more = start > 0
+        else:
+            start = min(start, total)
+            end = min(start + count, total)
+            positions = self.positions[start:end]
+            more = end < total
+
+        cursor = self.position_key(positions[-1]) if more and positions else None
+        return RecordPage([self.source[position] for position in positions], cursor, total)
+
+
+class OrderingCache:
+    """Orderings of one record list, each built on first use, by one field or several."""
+
+    def __init__(self, records: Sequence[Dict[str, Any]], version: Optional[int] = None):
+        self.records = records
+        self.version = version
+        self._orderings: Dict[Any, Ordering] = {}
+
+    def get(self, order_by: OrderBy) -> Ordering:
+        """Get the ordering by a field, or by (field, descending) pairs."""
+        if not isinstance(order_by, str):
+            columns = tuple((field, bool(descending)) for field, descending in order_by)
+            if len(columns) == 1 and not columns[0][1]:
+                order_by = columns[0][0]
+            else:
+                order_by = columns
+
+        ordering = self._orderings.get(order_by)
+        if ordering is None:
+            if isinstance(order_by, str):
+                ordering = Ordering(self.records, order_by, self.version)
+            else:
+                ordering = Ordering.combine(self.records, [(self.get(field), descending)
+                                                           for field, descending in order_by],
+                                            self.get('id'), self.version)
+            self._orderings[order_by] = ordering
+        return ordering
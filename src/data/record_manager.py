@@ -4,26 +4,167 @@ This module manages the records for clients, flights, and airline companies.
 It handles CRUD operations and ensures file persistence for data integrity.
 """
 import datetime
-import os
+import functools
 import json
-import pickle
-from typing import List, Dict, Any, Optional, Literal
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import List, Dict, Any, Optional, Literal, Callable, ContextManager, Iterable, Iterator, Tuple
+from src.data.snapshot import RecordSnapshot
+from src.data.indexes import RecordIndex, IdIndex
+from src.data.locks import ReadWriteLock
+from src.data.ordering import Ordering, OrderBy, OrderingCache, RecordPage, record_number
+from src.data.columnar import ColumnTable
+from src.data.catalogs import CatalogIndex
+from src.data import exporter
+from src.data.schema import VALIDATORS, ValidationError
+from src.data.search import filter_records, search_records
+from src.data.storage import (FILE_FORMATS, COMPRESSIONS, get_compressed_path, get_checksum_path,
+                              open_record_file, write_records, read_records, iter_records, write_json,
+                              read_json, fsync_file, fsync_directory)
+from src.data.integrity import salvage_records
+
+FSYNC_POLICIES = ['always', 'batched', 'never']
+
+# Temporary files written by a save that has not been committed yet: '<file>.<generation>.tmp'
+TEMP_FILE = re.compile(r'\.(\d+)\.tmp$')
+
+
+def _read_locked(method: Callable) -> Callable:
+    """Hold the read lock around a method in thread-safe mode."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.lock is None:
+            return method(self, *args, **kwargs)
+        with self.lock.reading():
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def _write_locked(method: Callable) -> Callable:
+    """Hold the save lock and then the write lock around a method in thread-safe mode."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.lock is None:
+            return method(self, *args, **kwargs)
+        with self._save_lock, self.lock.writing():
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def _save_locked(method: Callable) -> Callable:
+    """Let only one thread at a time write files."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._save_lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def _mutation(method: Callable) -> Callable:
+    """Run a CRUD method under the write lock in thread-safe mode.
+    
+    The change is only collected while the lock is held; its file writes are done after
+    it is released, so readers and other writers are not blocked by file I/O.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.lock is None:
+            return method(self, *args, **kwargs)
+        
+        with self.lock.writing():
+            if self._deferring():
+                return method(self, *args, **kwargs)
+            with self.deferred_writes():
+                result = method(self, *args, **kwargs)
+        self.flush_writes()
+        return result
+    return wrapper
+
 
 class RecordManager:
-    """Manage records for client, flights and airline companies. Handles CRUD operations and File Persistence."""
+    """Manage records for client, flights and airline companies. Handles CRUD operations and File Persistence.
+
+    Record lists are copy-on-write: mutations always publish a new list instead of changing
+    the current one in place, so snapshots taken with `snapshot()` never change underneath
+    their readers. Records should therefore only be changed through the CRUD methods.
+    """
     
     RECORD_TYPES = ['client', 'flight', 'airline']
     
-    def __init__(self, data_folder: str = "records", file_format: str = "jsonl"):
-        """Initialize RecordManager with data folder and file format."""
+    # Journal entries written before a patch triggers a full save instead
+    JOURNAL_COMPACT_ENTRIES = 1000
+    
+    def __init__(self, data_folder: str = "records", file_format: str = "jsonl",
+                 sharded: bool = False, shard_size: int = 1000,
+                 compression: Optional[str] = None, compression_level: Optional[int] = None,
+                 auto_load: bool = True, validate: bool = True, checksums: bool = True,
+                 fsync: str = "always", fsync_interval_ms: int = 100, journal: bool = False,
+                 thread_safe: bool = False):
+        """Initialize RecordManager with data folder and file format.
+        
+        With `sharded=True` each record type is stored as a folder of id-range shard files
+        holding `shard_size` ids each, plus a `manifest.json` describing the shards.
+        
+        `compression` ('gzip', 'zlib' or 'lzma') compresses every record file while it is
+        streamed to and from disk, and adds the codec suffix to the file names.
+        
+        With `auto_load=False` no records are loaded, which lets tools such as the format
+        migration stream the stored records instead.
+        
+        With `validate=True` added and updated records are checked against the schemas in
+        `src.data.schema`, raising ValidationError for invalid records.
+        
+        With `checksums=True` every record file gets a '.crc' file holding the CRC32 of each
+        record, used by `src.data.integrity` to verify files and salvage damaged ones.
+        
+        Saves are atomic: every file is written to a temporary file and moved into place
+        only after `generation.json` has recorded the new generation, so the record types
+        of one save are always committed together. `fsync` sets when written files are
+        flushed to disk: 'always' before every commit, 'batched' at most once every
+        `fsync_interval_ms` milliseconds, or 'never' (left to the operating system).
+        
+        With `journal=True`, `patch_record` appends only the changed fields to
+        `journal.jsonl` instead of saving every record. The journal is replayed on load and
+        emptied by the next full save.
+        
+        With `thread_safe=True` the records may be used from several threads: reads share
+        a reader-writer lock, while mutations and loads hold it exclusively. File writes
+        are serialized by a separate save lock, always taken before the reader-writer
+        lock, and run without blocking readers. Records must then only be changed through
+        the CRUD methods.
+        """
         
         self.data_folder = data_folder
         self.file_format = file_format.lower()
+        self.sharded = sharded
+        self.shard_size = shard_size
+        self.compression = compression.lower() if compression else None
+        self.compression_level = compression_level
+        self.validate = validate
+        self.checksums = checksums
+        self.fsync = fsync.lower()
+        self.fsync_interval = fsync_interval_ms / 1000
+        self.journal = journal
+        self.lock = ReadWriteLock() if thread_safe else None
         
         # Check if file format is supported
-        if self.file_format not in ['jsonl', 'json', 'pickle']:
+        if self.file_format not in FILE_FORMATS:
             raise ValueError(f"File format '{self.file_format}' is not supported.")
         
+        # Check if compression is supported
+        if self.compression not in COMPRESSIONS:
+            raise ValueError(f"Compression '{self.compression}' is not supported.")
+        
+        if self.shard_size < 1:
+            raise ValueError("Shard size must be at least 1.")
+        
+        # Check if fsync policy is supported
+        if self.fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Fsync policy '{self.fsync}' is not supported.")
+        
         # Create data folder if it does not exist
         os.makedirs(self.data_folder, exist_ok=True)
         
@@ -34,97 +175,946 @@ class RecordManager:
             "airline": []
         }
         
+        # Version counter per record type, bumped on every mutation
+        self._versions = {record_type: 0 for record_type in self.RECORD_TYPES}
+        
+        # Record objects last written to each shard, used to find changed shards on save
+        self._saved_shards = {record_type: {} for record_type in self.RECORD_TYPES}
+        
+        # Indexes kept in sync with the records, and the list each one was built from
+        self.id_index = IdIndex()
+        # Sorted orders used by `page()`, per record type, rebuilt when the version changes
+        self._orderings: Dict[str, OrderingCache] = {}
+        # NumPy column caches used by `columns()`, per record type, rebuilt when the version changes
+        self._columns: Dict[str, ColumnTable] = {}
+        # Sorted distinct values of fields offered by the forms (client names, countries, ...)
+        self.catalogs = CatalogIndex()
+        self._indexes: List[RecordIndex] = [self.id_index, self.catalogs]
+        self._indexed_lists = {record_type: (self.records[record_type], 0) for record_type in self.RECORD_TYPES}
+        
+        # Files written to temporary files by the current save, and files to remove once it commits
+        self.generation = self._read_generation().get("generation", 0)
+        self._staged_files: Dict[str, None] = {}
+        self._staged_removals: List[str] = []
+        
+        # Committed files waiting for the next batched fsync
+        self._unsynced_files = set()
+        self._last_sync = time.monotonic()
+        self._sync_timer: Optional[threading.Timer] = None
+        self._sync_lock = threading.Lock()
+        
+        # Patches appended to the journal since the last full save
+        self._journal_entries = 0
+        
+        # Held while files are written, so saves from several threads do not interleave
+        self._save_lock = threading.RLock()
+        
+        # Writes collected while inside `deferred_writes()`, entered per thread
+        self._defer_writes = threading.local()
+        self._save_pending = False
+        self._pending_journal: List[Dict[str, Any]] = []
+        
         # Load records from files
-        self.load_records()
+        if auto_load:
+            self.load_records()
         
     def _get_file_path(self, record_type: str):
         """Get file path for record type."""
-        extention = self.file_format if self.file_format != 'jsonl' else 'json'
         # Return file path as formatted string using record type for file extension.
-        return os.path.join(self.data_folder, f"{record_type}.{extention}")
+        file_path = os.path.join(self.data_folder, f"{record_type}.{self.file_format}")
+        return get_compressed_path(file_path, self.compression)
+    
+    def _get_legacy_file_path(self, record_type: str) -> Optional[str]:
+        """Get the path of a JSON Lines file saved under the old '.json' name, if one exists."""
+        if self.file_format != 'jsonl':
+            return None
+        
+        file_path = get_compressed_path(os.path.join(self.data_folder, f"{record_type}.json"), self.compression)
+        if not os.path.exists(file_path):
+            return None
+        
+        # A JSON array file belongs to the 'json' format, JSON Lines start with an object
+        with open_record_file(file_path, 'r', self.compression) as file:
+            for line in file:
+                if line.strip():
+                    return file_path if line.lstrip().startswith('{') else None
+        return None
+    
+    def _resolve_file_path(self, record_type: str) -> Optional[str]:
+        """Get the existing file holding a record type (None if there is no file yet)."""
+        file_path = self._get_file_path(record_type)
+        if os.path.exists(file_path):
+            return file_path
+        return self._get_legacy_file_path(record_type)
+    
+    def _get_shard_folder(self, record_type: str) -> str:
+        """Get the folder holding the shard files of a record type."""
+        return os.path.join(self.data_folder, record_type)
+    
+    def _get_shard_path(self, record_type: str, shard_index: int) -> str:
+        """Get file path for one shard of a record type."""
+        shard_path = os.path.join(self._get_shard_folder(record_type), f"shard_{shard_index:05d}.{self.file_format}")
+        return get_compressed_path(shard_path, self.compression)
+    
+    def _get_manifest_path(self, record_type: str) -> str:
+        """Get file path of the shard manifest of a record type."""
+        return os.path.join(self._get_shard_folder(record_type), "manifest.json")
+    
+    def _get_generation_path(self) -> str:
+        """Get file path of the generation file, which commits each save."""
+        return os.path.join(self.data_folder, "generation.json")
+    
+    def _get_journal_path(self) -> str:
+        """Get file path of the journal holding patches made since the last full save."""
+        return os.path.join(self.data_folder, "journal.jsonl")
+    
+    def _get_temp_path(self, file_path: str) -> str:
+        """Get the temporary path a file is written to before the next generation commits it."""
+        return f"{file_path}.{self.generation + 1}.tmp"
+    
+    def _read_generation(self) -> Dict[str, Any]:
+        """Read the generation file (empty if nothing was committed yet)."""
+        generation_path = self._get_generation_path()
+        if not os.path.exists(generation_path):
+            return {}
+        return read_json(generation_path)
+    
+    def get_record_files(self, record_type: str) -> List[str]:
+        """Get the paths of the existing files holding a record type."""
+        if not self.sharded:
+            file_path = self._resolve_file_path(record_type)
+            return [file_path] if file_path else []
+        
+        shard_folder = self._get_shard_folder(record_type)
+        shards = self.load_shard_manifest(record_type)["shards"]
+        return [os.path.join(shard_folder, shards[shard_key]["file"]) for shard_key in sorted(shards, key=int)]
+    
+    @staticmethod
+    def _get_record_number(record_id: Any) -> int:
+        """Get the numeric part of a record ID (e.g. 'F0012' -> 12)."""
+        return record_number(record_id)
+    
+    def _get_shard_index(self, record: Dict[str, Any]) -> int:
+        """Get the index of the shard a record belongs to."""
+        return self._get_record_number(record.get('id')) // self.shard_size
+    
+    def _group_by_shard(self, records: List[Dict[str, Any]]) -> Dict[int, List[Dict[str, Any]]]:
+        """Group records by shard index, keeping their order within each shard."""
+        shards = {}
+        for record in records:
+            shards.setdefault(self._get_shard_index(record), []).append(record)
+        return shards
     
+    def load_shard_manifest(self, record_type: str) -> Dict[str, Any]:
+        """Load the shard manifest of a record type (empty manifest if none exists)."""
+        manifest_path = self._get_manifest_path(record_type)
+        if not os.path.exists(manifest_path):
+            return {"shard_size": self.shard_size, "file_format": self.file_format, "shards": {}}
+        return read_json(manifest_path)
+    
+    @_write_locked
     def load_records(self) -> None:
         """Load all records from files."""
+        self._publish_loaded_records(self._read_stored_records())
+    
+    def _read_stored_records(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Read the stored records of every record type that has files, without publishing them."""
+        self._recover_files()
+        
+        loaded = {}
         for record_type in self.records.keys():
-            if record_type:
-                file_path = self._get_file_path(record_type)
-                if not os.path.exists(file_path):
-                    continue
-            
             try:
-                if self.file_format == 'jsonl':
-                    self.records[record_type] = []
-                    with open(file_path, 'r') as file:
-                        for line in file:
-                            if line.strip(): # Check if line is not empty & strip whitespace
-                                self.records[record_type].append(json.loads(line))
-                
-                elif self.file_format == 'json':
-                    with open(file_path, 'r') as file:
-                        self.records[record_type] = json.load(file)
-                        
-                elif self.file_format == 'pickle':
-                    with open(file_path, 'rb') as file:
-                        self.records[record_type] = pickle.load(file)
+                if self.sharded:
+                    loaded_records = self._load_sharded_records(record_type)
+                else:
+                    file_path = self._resolve_file_path(record_type)
+                    if file_path is None:
+                        continue
+                    loaded_records, _ = self._read_records_safely(file_path)
             
             except Exception as e:
                 print(f"Error loading {record_type} records: {e}")
-                self.records[record_type] = []
+                loaded_records = []
+            
+            loaded[record_type] = loaded_records
+        return loaded
+    
+    def _publish_loaded_records(self, loaded: Dict[str, List[Dict[str, Any]]]) -> None:
+        """Publish records read by `_read_stored_records`, rebuild the indexes and replay the journal."""
+        for record_type, loaded_records in loaded.items():
+            self._replace_records(record_type, loaded_records)
+            self._rebuild_indexes(record_type)
+        
+        self._replay_journal()
+    
+    def _recover_files(self) -> None:
+        """Finish a committed save that was interrupted, and discard files of uncommitted saves."""
+        committed = self._read_generation()
+        self.generation = committed.get("generation", 0)
+        
+        # The generation file was written, so every listed file still waiting in a temp file belongs in place
+        for relative_path in committed.get("files", []):
+            file_path = os.path.join(self.data_folder, relative_path)
+            temp_path = f"{file_path}.{self.generation}.tmp"
+            if os.path.exists(temp_path):
+                os.replace(temp_path, file_path)
+        
+        for folder, _, file_names in os.walk(self.data_folder):
+            for file_name in file_names:
+                if TEMP_FILE.search(file_name):
+                    os.remove(os.path.join(folder, file_name))
+    
+    def _replay_journal(self) -> None:
+        """Apply the patches journaled on top of the committed generation."""
+        self._journal_entries = 0
+        for entry in self._read_journal(self.generation):
+            position = self._find_position(entry["type"], entry["id"])
+            if position is not None:
+                self._apply_patch(entry["type"], position, entry["changes"])
+                self._journal_entries += 1
+    
+    def _read_journal(self, generation: int) -> Iterator[Dict[str, Any]]:
+        """Yield the journaled patches made on top of a generation, oldest first."""
+        journal_path = self._get_journal_path()
+        if not os.path.exists(journal_path):
+            return
+        
+        with open(journal_path, 'r', encoding='utf-8') as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # The last entry may have been cut off by a crash
+                    continue
+                # Entries of an older generation are already part of the saved files
+                if entry.get("generation") == generation:
+                    yield entry
+    
+    def _load_sharded_records(self, record_type: str) -> List[Dict[str, Any]]:
+        """Load every shard of a record type listed in its manifest."""
+        manifest = self.load_shard_manifest(record_type)
+        loaded_records = []
+        self._saved_shards[record_type] = {}
+        
+        # An existing layout keeps the shard size it was written with
+        self.shard_size = manifest["shard_size"]
+        
+        for shard_key in sorted(manifest["shards"], key=int):
+            shard_index = int(shard_key)
+            shard_path = os.path.join(self._get_shard_folder(record_type), manifest["shards"][shard_key]["file"])
+            shard_records, salvaged = self._read_records_safely(shard_path)
+            # Salvaged shards are left out so the next save rewrites them
+            if not salvaged:
+                self._saved_shards[record_type][shard_index] = shard_records
+            loaded_records.extend(shard_records)
+        
+        return loaded_records
+    
+    def _read_records_safely(self, file_path: str) -> Tuple[List[Dict[str, Any]], bool]:
+        """Read a record file, salvaging its valid records if it is damaged.
+        
+        Returns the records and whether they were salvaged.
+        """
+        try:
+            return read_records(file_path, self.file_format, self.compression), False
+        except Exception as e:
+            print(f"Error loading {file_path}: {e}")
+        
+        records, dropped = salvage_records(file_path, self.file_format, self.compression)
+        print(f"Salvaged {len(records)} records from {file_path}, {dropped} dropped")
+        return records, True
+    
+    def load_shards(self, record_type: str, min_id: Optional[str] = None,
+                    max_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Load only the shards whose ID range overlaps [min_id, max_id], without changing the loaded records.
+        
+        The manifest's per-shard minimum and maximum IDs are used to skip shards, and the
+        records of the remaining shards are filtered to the requested range.
+        """
+        if record_type not in self.RECORD_TYPES:
+            raise ValueError(f"Record type '{record_type}' is not supported.")
+        
+        if not self.sharded:
+            raise ValueError("Shard loading requires a sharded RecordManager.")
+        
+        low = self._get_record_number(min_id) if min_id is not None else None
+        high = self._get_record_number(max_id) if max_id is not None else None
+        
+        shard_folder = self._get_shard_folder(record_type)
+        matched_records = []
+        for shard_key, shard_info in sorted(self.load_shard_manifest(record_type)["shards"].items(),
+                                            key=lambda item: int(item[0])):
+            # Prune shards whose ID range lies outside the requested range
+            if low is not None and self._get_record_number(shard_info["max_id"]) < low:
+                continue
+            if high is not None and self._get_record_number(shard_info["min_id"]) > high:
+                continue
+            
+            # The manifest names the shard file as committed; damaged shards are salvaged like on load
+            shard_records, _ = self._read_records_safely(os.path.join(shard_folder, shard_info["file"]))
+            for record in shard_records:
+                number = self._get_record_number(record.get('id'))
+                if (low is None or number >= low) and (high is None or number <= high):
+                    matched_records.append(record)
+        
+        return matched_records
                 
+    @_save_locked
     def save_records(self) -> None:
-        """Save all records to files."""
-        for record_type, records in self.records.items():
-            file_path = self._get_file_path(record_type)
+        """Save all records to files, committing every record type under one generation.
+        
+        If any record type cannot be written nothing is committed: the journal is kept, the
+        save stays pending for the next flush, and the error is raised.
+        """
+        # The saved lists include every change whose writes are still pending
+        with self._reading():
+            saved_records = dict(self.records)
+            pending_journal = self._pending_journal
+            self._save_pending, self._pending_journal = False, []
+        
+        try:
+            for record_type, records in saved_records.items():
+                try:
+                    if self.sharded:
+                        self._save_sharded_records(record_type, records)
+                    else:
+                        self._write_record_file(self._get_file_path(record_type), records)
+                except Exception as e:
+                    print(f"Error saving {record_type} records: {e}")
+                    raise
             
-            try:
-                if self.file_format == 'jsonl':
-                    with open(file_path, 'w') as file:
-                        for record in records:
-                            file.write(json.dumps(record) + '\n')
-                            
-                elif self.file_format == 'json':
-                    with open(file_path, 'w') as file:
-                        json.dump(records, file, indent=4)
-                
-                elif self.file_format == 'pickle':
-                    with open(file_path, 'wb') as file:
-                        pickle.dump(records, file)
-                
-            except Exception as e:
-                print(f"Error saving {record_type} records: {e}")
+            self._commit()
+        except Exception:
+            self._discard_staged_files()
+            self._staged_removals = []
+            # Forget the saved shards so the next save writes them again
+            self._saved_shards = {record_type: {} for record_type in self.RECORD_TYPES}
+            # A commit that failed after its commit point is finished by the next load
+            self.generation = self._read_generation().get("generation", 0)
+            with self._reading():
+                self._save_pending = True
+                self._pending_journal = pending_journal + self._pending_journal
+            raise
+        
+        self._clear_journal()
+    
+    @contextmanager
+    def deferred_writes(self) -> Iterator[None]:
+        """Make the CRUD methods only change the records in memory, collecting their writes.
+        
+        The collected writes are done by `flush_writes()`, which lets callers such as
+        AsyncRecordManager do the file I/O on another thread. Only the writes of the calling
+        thread are deferred.
+        """
+        deferring, self._defer_writes.active = self._deferring(), True
+        try:
+            yield
+        finally:
+            self._defer_writes.active = deferring
+    
+    def _deferring(self) -> bool:
+        """Check whether the current thread is inside `deferred_writes()`."""
+        return getattr(self._defer_writes, 'active', False)
+    
+    @_save_locked
+    def flush_writes(self) -> None:
+        """Do the writes collected by `deferred_writes()`: a full save, or the pending journal entries."""
+        with self._reading():
+            save_pending, pending_journal = self._save_pending, self._pending_journal
+            self._save_pending, self._pending_journal = False, []
+        
+        if save_pending:
+            self.save_records()
+        else:
+            for entry in pending_journal:
+                self._append_journal(entry)
+    
+    def _reading(self) -> ContextManager:
+        """Hold the read lock in thread-safe mode, keeping writers out."""
+        return self.lock.reading() if self.lock is not None else nullcontext()
+    
+    def _write_changes(self, journal_entry: Optional[Dict[str, Any]] = None) -> None:
+        """Persist a mutation: append its journal entry if given, otherwise save all records."""
+        if self._deferring():
+            # A pending full save already includes every journaled change
+            if journal_entry is not None and not self._save_pending:
+                self._pending_journal.append(journal_entry)
+            else:
+                self._save_pending = True
+                self._pending_journal = []
+        elif journal_entry is not None:
+            self._append_journal(journal_entry)
+        else:
+            self.save_records()
+    
+    def _clear_journal(self) -> None:
+        """Empty the journal once every patch in it is part of the saved files."""
+        if self._journal_entries or os.path.exists(self._get_journal_path()):
+            open(self._get_journal_path(), 'w').close()
+        self._journal_entries = 0
+    
+    def _append_journal(self, entry: Dict[str, Any]) -> None:
+        """Append one patch to the journal, flushing it according to the fsync policy."""
+        journal_path = self._get_journal_path()
+        with open(journal_path, 'a', encoding='utf-8') as file:
+            file.write(json.dumps(dict(entry, generation=self.generation)) + '\n')
+            if self.fsync == 'always':
+                file.flush()
+                os.fsync(file.fileno())
+        self._journal_entries += 1
+        if self.fsync == 'batched':
+            self._sync_committed([journal_path])
+    
+    def _save_sharded_records(self, record_type: str, records: List[Dict[str, Any]]) -> None:
+        """Rewrite only the shards whose records changed since they were last saved."""
+        shard_folder = self._get_shard_folder(record_type)
+        os.makedirs(shard_folder, exist_ok=True)
+        
+        saved_shards = self._saved_shards[record_type]
+        current_shards = self._group_by_shard(records)
+        manifest_path = self._get_manifest_path(record_type)
+        changed = not os.path.exists(manifest_path)
+        
+        for shard_index, shard_records in current_shards.items():
+            saved_records = saved_shards.get(shard_index)
+            # Records are replaced rather than modified, so identity shows whether a shard changed
+            if (saved_records is not None and len(saved_records) == len(shard_records)
+                    and all(saved is current for saved, current in zip(saved_records, shard_records))):
+                continue
+            
+            self._write_record_file(self._get_shard_path(record_type, shard_index), shard_records)
+            saved_shards[shard_index] = shard_records
+            changed = True
+        
+        # Remove shards that no longer hold any records
+        for shard_index in [index for index in saved_shards if index not in current_shards]:
+            self._remove_record_file(self._get_shard_path(record_type, shard_index))
+            del saved_shards[shard_index]
+            changed = True
+        
+        if changed:
+            self._write_shard_manifest(record_type, {
+                shard_index: self._get_shard_info(record_type, shard_index, shard_records)
+                for shard_index, shard_records in current_shards.items()
+            })
+    
+    def _write_record_file(self, file_path: str, records: Iterable[Dict[str, Any]]) -> None:
+        """Write a record file, with its checksum file if checksums are enabled, for the next commit."""
+        checksum_path = get_checksum_path(file_path) if self.checksums else None
+        # Staged before writing, so a failed save also removes a partly written temporary file
+        self._staged_files[file_path] = None
+        if checksum_path:
+            self._staged_files[checksum_path] = None
+        write_records(self._get_temp_path(file_path), records, self.file_format, self.compression,
+                      self.compression_level, checksum_path and self._get_temp_path(checksum_path))
+    
+    def _remove_record_file(self, file_path: str) -> None:
+        """Remove a record file and its checksum file once the next commit is done."""
+        self._staged_removals += [file_path, get_checksum_path(file_path)]
+    
+    def _discard_staged_files(self, start: int = 0) -> None:
+        """Delete the temporary files staged since the given position."""
+        for file_path in list(self._staged_files)[start:]:
+            del self._staged_files[file_path]
+            temp_path = self._get_temp_path(file_path)
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+    
+    def _commit(self) -> None:
+        """Move the staged files into place under a new generation.
+        
+        Writing the generation file is the commit point: a load after a crash moves the
+        files it lists into place, and discards the temporary files of an uncommitted save.
+        """
+        staged_files, self._staged_files = list(self._staged_files), {}
+        removals, self._staged_removals = self._staged_removals, []
+        if not staged_files and not removals:
+            return
+        
+        if self.fsync == 'always':
+            for file_path in staged_files:
+                fsync_file(self._get_temp_path(file_path))
+        
+        self._write_generation(staged_files)
+        self._move_staged_files(staged_files)
+        
+        for file_path in removals:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+        
+        self._sync_committed(staged_files)
+    
+    def _write_generation(self, staged_files: List[str]) -> None:
+        """Atomically record the next generation and the files it commits."""
+        generation_path = self._get_generation_path()
+        temp_path = generation_path + '.tmp'
+        write_json(temp_path, {
+            "generation": self.generation + 1,
+            "files": [os.path.relpath(file_path, self.data_folder) for file_path in staged_files]
+        })
+        if self.fsync == 'always':
+            fsync_file(temp_path)
+        os.replace(temp_path, generation_path)
+        if self.fsync == 'always':
+            fsync_directory(self.data_folder)
+    
+    def _move_staged_files(self, staged_files: List[str]) -> None:
+        """Replace each committed file with its temporary file."""
+        for file_path in staged_files:
+            os.replace(self._get_temp_path(file_path), file_path)
+        self.generation += 1
+    
+    def _sync_committed(self, committed_files: List[str]) -> None:
+        """Apply the fsync policy to the files of a finished commit."""
+        if self.fsync == 'always':
+            for folder in {os.path.dirname(file_path) for file_path in committed_files}:
+                fsync_directory(folder)
+        
+        elif self.fsync == 'batched':
+            with self._sync_lock:
+                self._unsynced_files.update(committed_files)
+                self._unsynced_files.add(self._get_generation_path())
+                delay = self._last_sync + self.fsync_interval - time.monotonic()
+                if delay > 0:
+                    # Group this commit with the others made before the timer fires
+                    if self._sync_timer is None:
+                        self._sync_timer = threading.Timer(delay, self.sync)
+                        self._sync_timer.daemon = True
+                        self._sync_timer.start()
+                    return
+            self.sync()
+    
+    def sync(self) -> None:
+        """Flush committed files that are still waiting for a batched fsync to disk."""
+        with self._sync_lock:
+            unsynced_files, self._unsynced_files = self._unsynced_files, set()
+            if self._sync_timer is not None:
+                self._sync_timer.cancel()
+                self._sync_timer = None
+            self._last_sync = time.monotonic()
+        
+        for file_path in unsynced_files:
+            if os.path.exists(file_path):
+                fsync_file(file_path)
+        for folder in {os.path.dirname(file_path) for file_path in unsynced_files}:
+            fsync_directory(folder)
+    
+    def _get_shard_info(self, record_type: str, shard_index: int,
+                        shard_records: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Describe one shard for the manifest."""
+        return {
+            "file": os.path.basename(self._get_shard_path(record_type, shard_index)),
+            "count": len(shard_records),
+            "min_id": min((r.get('id') for r in shard_records), key=self._get_record_number),
+            "max_id": max((r.get('id') for r in shard_records), key=self._get_record_number),
+        }
+    
+    def _write_shard_manifest(self, record_type: str, shard_infos: Dict[int, Dict[str, Any]]) -> None:
+        """Write the shard manifest of a record type for the next commit."""
+        manifest_path = self._get_manifest_path(record_type)
+        self._staged_files[manifest_path] = None
+        write_json(self._get_temp_path(manifest_path), {
+            "shard_size": self.shard_size,
+            "file_format": self.file_format,
+            "shards": {str(shard_index): shard_infos[shard_index] for shard_index in sorted(shard_infos)}
+        })
+    
+    def iter_stored_records(self, record_type: str) -> Iterator[Dict[str, Any]]:
+        """Stream the stored records of a type straight from the files, without loading them.
+        
+        Patches journaled since the last full save are merged into the records they change.
+        """
+        if record_type not in self.RECORD_TYPES:
+            raise ValueError(f"Record type '{record_type}' is not supported.")
+        
+        patches: Dict[Any, Dict[str, Any]] = {}
+        for entry in self._read_journal(self._read_generation().get("generation", 0)):
+            if entry["type"] == record_type:
+                patches.setdefault(entry["id"], {}).update(entry["changes"])
+        
+        for record in self._iter_record_files(record_type):
+            changes = patches.get(record.get('id'))
+            yield {**record, **changes} if changes else record
+    
+    def _iter_record_files(self, record_type: str) -> Iterator[Dict[str, Any]]:
+        """Stream the records of a type as they are in the files."""
+        if self.sharded:
+            manifest = self.load_shard_manifest(record_type)
+            for shard_key in sorted(manifest["shards"], key=int):
+                shard_path = os.path.join(self._get_shard_folder(record_type), manifest["shards"][shard_key]["file"])
+                yield from iter_records(shard_path, self.file_format, self.compression)
+        else:
+            file_path = self._resolve_file_path(record_type)
+            if file_path is not None:
+                yield from iter_records(file_path, self.file_format, self.compression)
+    
+    @_save_locked
+    def write_stored_records(self, record_type: str, records: Iterable[Dict[str, Any]]) -> None:
+        """Replace the stored records of a type with a stream of records, without loading them.
+        
+        The new files are committed as one generation once every record is written.
+        Sharded layouts hold at most one shard in memory as long as the records arrive in ID order.
+        The journal is shared by every format in the data folder, so its patches are carried
+        over to the new generation.
+        """
+        if record_type not in self.RECORD_TYPES:
+            raise ValueError(f"Record type '{record_type}' is not supported.")
+        
+        # Files of other managers may have committed since this one was created
+        self.generation = self._read_generation().get("generation", 0)
+        try:
+            if self.sharded:
+                self._write_stored_shards(record_type, records)
+            else:
+                self._write_record_file(self._get_file_path(record_type), records)
+        except BaseException:
+            self._discard_staged_files()
+            self._staged_removals = []
+            raise
+        
+        if self._staged_files or self._staged_removals:
+            self._carry_journal()
+        self._commit()
+    
+    def _carry_journal(self) -> None:
+        """Journal the patches of the committed generation again for the next one.
+        
+        The copies are appended before the commit, so a crash keeps one set or the other valid.
+        """
+        entries = list(self._read_journal(self.generation))
+        if not entries:
+            return
+        
+        with open(self._get_journal_path(), 'a', encoding='utf-8') as file:
+            for entry in entries:
+                file.write(json.dumps(dict(entry, generation=self.generation + 1)) + '\n')
+            if self.fsync == 'always':
+                file.flush()
+                os.fsync(file.fileno())
+    
+    def _write_stored_shards(self, record_type: str, records: Iterable[Dict[str, Any]]) -> None:
+        """Write a stream of records as the shards of a record type, for the next commit."""
+        os.makedirs(self._get_shard_folder(record_type), exist_ok=True)
+        shard_infos = {}
+        shard_index, shard_records = None, []
+        
+        def flush_shard():
+            shard_path = self._get_shard_path(record_type, shard_index)
+            # Records arriving out of ID order extend a shard that was already written
+            if shard_index in shard_infos:
+                shard_records[:0] = read_records(self._get_temp_path(shard_path), self.file_format, self.compression)
+            self._write_record_file(shard_path, shard_records)
+            shard_infos[shard_index] = self._get_shard_info(record_type, shard_index, shard_records)
+        
+        for record in records:
+            record_shard_index = self._get_shard_index(record)
+            if record_shard_index != shard_index:
+                if shard_records:
+                    flush_shard()
+                shard_index, shard_records = record_shard_index, []
+            shard_records.append(record)
+        if shard_records:
+            flush_shard()
+        
+        # Remove shards left over from the previous layout
+        for old_shard_key, old_shard_info in self.load_shard_manifest(record_type)["shards"].items():
+            if int(old_shard_key) not in shard_infos:
+                self._remove_record_file(os.path.join(self._get_shard_folder(record_type), old_shard_info["file"]))
+        
+        self._write_shard_manifest(record_type, shard_infos)
+        self._saved_shards[record_type] = {}
+    
+    def _replace_records(self, record_type: str, records: List[Dict[str, Any]]) -> None:
+        """Publish a new record list for a record type (copy-on-write)."""
+        self.records[record_type] = records
+        self._versions[record_type] += 1
+        self._indexed_lists[record_type] = (records, len(records))
+    
+    def _sync(self, record_type: str) -> None:
+        """Pick up changes made to a record list outside the CRUD methods and rebuild its indexes."""
+        records = self.records[record_type]
+        indexed_list, indexed_length = self._indexed_lists[record_type]
+        if records is not indexed_list or len(records) != indexed_length:
+            self._replace_records(record_type, records)
+            self._rebuild_indexes(record_type)
+    
+    def _rebuild_indexes(self, record_type: str) -> None:
+        """Rebuild every index of a record type."""
+        for index in self._indexes:
+            index.rebuild(record_type, self.records[record_type])
+    
+    @_write_locked
+    def register_index(self, index: RecordIndex) -> None:
+        """Register an index to be kept in sync with the records."""
+        self._indexes.append(index)
+        for record_type in self.RECORD_TYPES:
+            self._sync(record_type)
+            index.rebuild(record_type, self.records[record_type])
     
+    @_read_locked
+    def get_version(self, record_type: str) -> int:
+        """Get the current version of a record type."""
+        if record_type not in self.RECORD_TYPES:
+            raise ValueError(f"Record type '{record_type}' is not supported.")
+        
+        self._sync(record_type)
+        return self._versions[record_type]
+    
+    @_read_locked
+    def snapshot(self, record_type: str) -> RecordSnapshot:
+        """Get an immutable point-in-time view of a record type in O(1)."""
+        if record_type not in self.RECORD_TYPES:
+            raise ValueError(f"Record type '{record_type}' is not supported.")
+        
+        self._sync(record_type)
+        return RecordSnapshot(record_type, self._versions[record_type], self.records[record_type])
+    
+    @_read_locked
+    def snapshot_all(self) -> Dict[str, RecordSnapshot]:
+        """Get snapshots of every record type."""
+        return {record_type: self.snapshot(record_type) for record_type in self.RECORD_TYPES}
+    
+    def _find_position(self, record_type: str, record_id: Any) -> Optional[int]:
+        """Find the position of a record by ID using the ID index."""
+        self._sync(record_type)
+        return self.id_index.get(record_type, record_id)
+    
+    @_read_locked
+    def get_catalog(self, name: str) -> List[Any]:
+        """Get the sorted distinct values of a catalog, such as 'client_names' or 'countries'.
+        
+        Catalogs are kept up to date on every mutation, so this does not read the records.
+        The list must not be changed.
+        """
+        for record_type in self.RECORD_TYPES:
+            self._sync(record_type)
+        return self.catalogs.get(name)
+    
+    @_read_locked
+    def get_record(self, record_type: str, record_id: Any) -> Optional[Dict[str, Any]]:
+        """Get a record by ID."""
+        if record_type not in self.RECORD_TYPES:
+            raise ValueError(f"Record type '{record_type}' is not supported.")
+        
+        position = self._find_position(record_type, record_id)
+        return self.records[record_type][position] if position is not None else None
+    
+    @_read_locked
+    def page(self, record_type: str, order_by: OrderBy = "id", after: Optional[Iterable[Any]] = None,
+             limit: int = 100, descending: bool = False) -> RecordPage:
+        """Get a page of records ordered by a field, starting after a cursor.
+        
+        Keyset pagination: pass the `cursor` of the previous page as `after` to get the next
+        one. IDs sort by number and dates by day, ties are broken by ID. `order_by` is a field,
+        or (field, descending) pairs to sort by several. The sorted order is cached until the
+        records change, so each page costs O(log n + limit).
+        """
+        return self._get_ordering(record_type, order_by).page(after, limit, descending)
+    
+    @_read_locked
+    def window(self, record_type: str, order_by: OrderBy = "id", start: int = 0, count: int = 100,
+               descending: bool = False) -> RecordPage:
+        """Get the records at positions `start` to `start + count` of an order, for scrolling views.
+        
+        Unlike `page`, positions shift when records are added or deleted before them.
+        """
+        return self._get_ordering(record_type, order_by).window(start, count, descending)
+    
+    def _get_ordering(self, record_type: str, order_by: OrderBy) -> Ordering:
+        """Get the records of a type sorted by one or more fields, sorting them again only after they change.
+
+        Orders by several fields reuse the cached single-field orders, so a new combination
+        of columns only costs one sort by integer keys.
+        """
+        snapshot = self.snapshot(record_type)
+        orderings = self._orderings.get(record_type)
+        if orderings is None or orderings.version != snapshot.version:
+            orderings = self._orderings[record_type] = OrderingCache(snapshot, snapshot.version)
+        return orderings.get(order_by)
+    
+    @_read_locked
+    def columns(self, record_type: str) -> ColumnTable:
+        """Get the records of a type as NumPy columns, for vectorized filters and group-by counts.
+        
+        The columns are cached until the records change, then built again on first use.
+        Raises ImportError if NumPy is not installed.
+        """
+        snapshot = self.snapshot(record_type)
+        columns = self._columns.get(record_type)
+        if columns is None or columns.version != snapshot.version:
+            columns = self._columns[record_type] = ColumnTable(snapshot, snapshot.version)
+        return columns
+    
+    @_read_locked
+    def query(self, record_type: str, where: Optional[Callable[[Dict[str, Any]], bool]] = None,
+              **filters: Any) -> Iterator[Dict[str, Any]]:
+        """Iterate over a snapshot of the records matching a predicate and/or exact field values.
+        
+        The snapshot is taken when `query` is called, so later mutations do not affect the results.
+        """
+        return filter_records(self.snapshot(record_type), where, filters)
+    
+    @_read_locked
+    def search(self, record_type: str, text: str, fields: Optional[Iterable[str]] = None) -> Iterator[Dict[str, Any]]:
+        """Iterate over a snapshot of the records containing `text` in any of the given fields.
+        
+        Matching ignores case. Without `fields`, every field of a record is searched.
+        """
+        return search_records(self.snapshot(record_type), text, list(fields) if fields is not None else None)
+    
+    def export_records(self, record_type: str, file_path: str, file_format: Optional[str] = None,
+                       records: Optional[Iterable[Dict[str, Any]]] = None,
+                       progress_callback: Optional[Callable[[int], None]] = None) -> int:
+        """Export a record type, or the given query result, to a CSV or JSONL file.
+        
+        Records are streamed from a snapshot in chunks, so this is safe to run on a worker thread.
+        Returns the number of exported records.
+        """
+        if records is None:
+            records = self.snapshot(record_type)
+        
+        return exporter.export_records(records, file_path, file_format,
+                                       fields=exporter.RECORD_FIELDS.get(record_type),
+                                       progress_callback=progress_callback)
+    
+    def _validate_record(self, record_type: str, record: Dict[str, Any]) -> None:
+        """Validate a record against the schema of its type, if validation is enabled."""
+        if self.validate:
+            error = VALIDATORS[record_type](record)
+            if error:
+                raise ValidationError(record_type, error)
+    
+    def _next_record_number(self, record_type: str) -> int:
+        """Get the number of the next record ID, following the last record."""
+        last_record_id = self.records[record_type][-1]['id'] if self.records[record_type] else 'F0000'
+        return int(last_record_id[1:]) + 1
+    
+    def _append_records(self, record_type: str, new_records: List[Dict[str, Any]]) -> None:
+        """Assign IDs to new records, publish them and update the indexes."""
+        self._sync(record_type)
+        records = self.records[record_type]
+        next_number = self._next_record_number(record_type)
+        
+        for offset, new_record in enumerate(new_records):
+            new_record['id'] = f"{record_type.upper()[0]}{next_number + offset:04d}"
+        
+        self._replace_records(record_type, records + new_records)
+        for index in self._indexes:
+            index.on_add_records(record_type, len(records), new_records)
+    
+    @_mutation
     def add_record(self, record_type: str, new_record: Dict[str, Any]) -> None:
         """Add new records to existing records."""
         if record_type not in self.RECORD_TYPES:
             raise ValueError(f"Record type '{record_type}' is not supported.")
         
-        last_record_id = self.records[record_type][-1]['id'] if self.records[record_type] else 'F0000'
-        new_record_id = int(last_record_id[1:]) + 1
-        new_record['id'] = f"{record_type.upper()[0]}{new_record_id:04d}"
+        self._validate_record(record_type, new_record)
+        self._append_records(record_type, [new_record])
         new_record['created_at'] = datetime.datetime.now().isoformat()
         
-        new_records = [new_record]
+        self._write_changes()
+    
+    @_mutation
+    def add_records(self, record_type: str, new_records: List[Dict[str, Any]],
+                    validate: Optional[bool] = None) -> None:
+        """Add many records at once with a single save.
+        
+        Unlike `add_record`, an existing `created_at` value is kept so imported records
+        keep their original creation time. Nothing is added if any record is invalid.
+        `validate=False` skips validation for records that were already validated.
+        """
+        if record_type not in self.RECORD_TYPES:
+            raise ValueError(f"Record type '{record_type}' is not supported.")
+        
+        if not new_records:
+            return
+        
+        if self.validate if validate is None else validate:
+            validator = VALIDATORS[record_type]
+            for position, new_record in enumerate(new_records, start=1):
+                error = validator(new_record)
+                if error:
+                    raise ValidationError(record_type, f"Record {position}: {error}")
+        
+        created_at = datetime.datetime.now().isoformat()
+        self._append_records(record_type, new_records)
+        for new_record in new_records:
+            if not new_record.get('created_at'):
+                new_record['created_at'] = created_at
         
-        self.records[record_type].extend(new_records)
-        self.save_records()
+        self._write_changes()
         
+    @_mutation
     def update_record(self, record_type: str, record_id: int, updated_record: Dict[str, Any]) -> None:
         """Update a record by ID."""
         if record_type not in self.RECORD_TYPES:
             raise ValueError(f"Record type '{record_type}' is not supported.")
         
-        for i, record in enumerate(self.records[record_type]):
-            if record['id'] == record_id:
-                self.records[record_type][i] = updated_record
-                self.save_records()
-                return
+        position = self._find_position(record_type, record_id)
+        if position is None:
+            raise ValueError(f"Record with ID '{record_id}' not found in '{record_type}' records.")
         
-        raise ValueError(f"Record with ID '{record_id}' not found in '{record_type}' records.")    
+        self._validate_record(record_type, updated_record)
+        old_record = self.records[record_type][position]
+        new_records = list(self.records[record_type])
+        new_records[position] = updated_record
+        self._replace_records(record_type, new_records)
+        for index in self._indexes:
+            index.on_update(record_type, position, old_record, updated_record)
         
+        self._write_changes()
+        
+    def _apply_patch(self, record_type: str, position: int, changes: Dict[str, Any]) -> Dict[str, Any]:
+        """Publish a copy of the record at `position` with the changes merged in, updating affected indexes."""
+        old_record = self.records[record_type][position]
+        new_record = {**old_record, **changes}
+        new_records = list(self.records[record_type])
+        new_records[position] = new_record
+        self._replace_records(record_type, new_records)
+        
+        changed_fields = changes.keys()
+        for index in self._indexes:
+            if index.depends_on(changed_fields):
+                index.on_update(record_type, position, old_record, new_record)
+        return new_record
+    
+    @_mutation
+    def patch_record(self, record_type: str, record_id: Any, changes: Dict[str, Any]) -> Dict[str, Any]:
+        """Change some fields of a record by ID and return the updated record.
+        
+        Only indexes depending on the changed fields are updated. With the journal enabled
+        only the changes are written to disk; otherwise all records are saved.
+        """
+        if record_type not in self.RECORD_TYPES:
+            raise ValueError(f"Record type '{record_type}' is not supported.")
+        
+        position = self._find_position(record_type, record_id)
+        if position is None:
+            raise ValueError(f"Record with ID '{record_id}' not found in '{record_type}' records.")
+        
+        old_record = self.records[record_type][position]
+        changes = {field: value for field, value in changes.items() if old_record.get(field, object()) != value}
+        if not changes:
+            return old_record
+        
+        self._validate_record(record_type, {**old_record, **changes})
+        new_record = self._apply_patch(record_type, position, changes)
+        
+        if self.journal and self._journal_entries + len(self._pending_journal) < self.JOURNAL_COMPACT_ENTRIES:
+            self._write_changes({"type": record_type, "id": record_id, "changes": changes})
+        else:
+            self._write_changes()
+        return new_record
+    
+    @_mutation
     def delete_record(self, record_type: str, record_id: int) -> None:
         """Delete record by ID."""
         if record_type not in self.RECORD_TYPES:
             raise ValueError(f"Record type '{record_type}' is not supported.")
         
-        self.records[record_type] = [record for record in self.records[record_type] if record['id'] != record_id]
-        self.save_records()
\ No newline at end of file
+        new_records = [record for record in self.records[record_type] if record['id'] != record_id]
+        self._replace_records(record_type, new_records)
+        for index in self._indexes:
+            index.on_delete(record_type, new_records)
+        
+        self._write_changes()
\ No newline at end of file
@@ -0,0 +1,250 @@
+"""
+Remote Record Manager
+Client for the record server (`python -m src.server`) with the same interface as
+RecordManager, so the GUI can work against a shared server instead of a local folder.
+"""
+import http.client
+import json
+import select
+import threading
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import quote, urlencode, urlsplit
+from src.data import exporter
+from src.data.ordering import OrderBy, RecordPage
+from src.data.record_manager import RecordManager
+from src.data.schema import ValidationError
+from src.data.snapshot import RecordSnapshot
+
+# Header carrying the version of the snapshot a server response was read from
+VERSION_HEADER = "X-Record-Version"
+
+# Methods that leave the records the same whether they are applied once or twice, so safe to resend
+IDEMPOTENT_METHODS = frozenset({"GET", "PUT", "DELETE"})
+
+
+class RemoteRecords(Mapping):
+    """
+    Read-only mapping of record type to the server's current records, like RecordManager.records.
+
+    Each access checks the version with the server, downloading the records only when they changed.
+    """
+
+    def __init__(self, record_manager: "RemoteRecordManager"):
+        self.record_manager = record_manager
+
+    def __getitem__(self, record_type: str) -> List[Dict[str, Any]]:
+        return list(self.record_manager.snapshot(record_type))
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(RemoteRecordManager.RECORD_TYPES)
+
+    def __len__(self) -> int:
+        return len(RemoteRecordManager.RECORD_TYPES)
+
+
+class RemoteRecordManager:
+    """Manage the records held by a record server over HTTP."""
+
+    RECORD_TYPES = RecordManager.RECORD_TYPES
+
+    def __init__(self, url: str, timeout: float = 30):
+        """Connect to a record server at a URL such as 'http://127.0.0.1:8080'."""
+        parts = urlsplit(url)
+        if parts.scheme != "http" or not parts.hostname:
+            raise ValueError(f"Server URL '{url}' is not supported.")
+
+        self.url = url
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.timeout = timeout
+        self.records = RemoteRecords(self)
+
+        # One keep-alive connection, shared by the GUI and its worker threads
+        self._connection: Optional[http.client.HTTPConnection] = None
+        self._lock = threading.Lock()
+        # Last snapshot of each record type and its ETag, sent again only when the server's records changed
+        self._snapshots: Dict[str, Tuple[str, RecordSnapshot]] = {}
+
+    def _request(self, method: str, path: str, data: Any = None, record_type: Optional[str] = None,
+                 headers: Optional[Dict[str, str]] = None):
+        """Send a request and return the decoded JSON response (None for 304 Not Modified) and its headers."""
+        body = json.dumps(data).encode('utf-8') if data is not None else None
+        headers = dict(headers or {})
+        if body is not None:
+            headers["Content-Type"] = "application/json"
+
+        with self._lock:
+            # Retry once when the server closed an idle keep-alive connection
+            for attempt in range(2):
+                if self._connection is not None and self._connection_dropped():
+                    self._connection.close()
+                    self._connection = None
+                if self._connection is None:
+                    self._connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+                try:
+                    self._connection.request(method, path, body, headers)
+                except ConnectionError:
+                    # The request was not sent in full, so the server cannot have applied it
+                    self._connection.close()
+                    self._connection = None
+                    if attempt:
+                        raise
+                    continue
+                try:
+                    response = self._connection.getresponse()
+                    result = json.loads(response.read() or b'null')
+                    break
+                except (http.client.RemoteDisconnected, ConnectionError):
+                    self._connection.close()
+                    self._connection = None
+                    # The server may have applied a request it did not answer
+                    if attempt or method not in IDEMPOTENT_METHODS:
+                        raise
+
+        if response.status == 422:
+            raise ValidationError(record_type, result["error"])
+        if response.status >= 400:
+            raise ValueError(result.get("error") if isinstance(result, dict) else response.reason)
+        return result, response.headers
+
+    def _connection_dropped(self) -> bool:
+        """Check whether the server closed the idle keep-alive connection, before sending on it."""
+        sock = self._connection.sock
+        if sock is None:
+            return False
+        # An idle connection has nothing to read unless the server closed it
+        readable, _, _ = select.select([sock], [], [], 0)
+        return bool(readable)
+
+    @staticmethod
+    def _record_path(record_type: str, record_id: Any = None) -> str:
+        """Get the URL path of a record type or a single record."""
+        path = f"/records/{quote(record_type)}"
+        return path if record_id is None else f"{path}/{quote(str(record_id))}"
+
+    def close(self) -> None:
+        """Close the connection to the server."""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def snapshot(self, record_type: str) -> RecordSnapshot:
+        """Get the server's current records of a type, reusing the last snapshot if they did not change."""
+        cached = self._snapshots.get(record_type)
+        records, headers = self._request("GET", self._record_path(record_type), record_type=record_type,
+                                         headers={"If-None-Match": cached[0]} if cached else None)
+        if records is None and cached:
+            return cached[1]
+
+        snapshot = RecordSnapshot(record_type, int(headers.get(VERSION_HEADER, 0)), records)
+        if headers.get("ETag"):
+            self._snapshots[record_type] = (headers["ETag"], snapshot)
+        return snapshot
+
+    def snapshot_all(self) -> Dict[str, RecordSnapshot]:
+        """Get snapshots of every record type."""
+        return {record_type: self.snapshot(record_type) for record_type in self.RECORD_TYPES}
+
+    def get_version(self, record_type: str) -> int:
+        """Get the current version of a record type."""
+        return self.snapshot(record_type).version
+
+    def get_catalog(self, name: str) -> List[Any]:
+        """Get the sorted distinct values of one of the server's catalogs."""
+        values, _ = self._request("GET", f"/catalogs/{quote(name)}")
+        return values
+
+    def get_record(self, record_type: str, record_id: Any) -> Optional[Dict[str, Any]]:
+        """Get a record by ID."""
+        try:
+            record, _ = self._request("GET", self._record_path(record_type, record_id), record_type=record_type)
+        except ValueError:
+            return None
+        return record
+
+    def page(self, record_type: str, order_by: OrderBy = "id", after: Optional[Iterable[Any]] = None,
+             limit: int = 100, descending: bool = False) -> RecordPage:
+        """Get a page of records ordered by a field, starting after the cursor of the previous page."""
+        params = {"order_by": self._order_param(order_by), "limit": limit}
+        if after is not None:
+            params["after"] = json.dumps(list(after))
+        if descending:
+            params["descending"] = 1
+        return self._read_page(record_type, params)
+
+    def window(self, record_type: str, order_by: OrderBy = "id", start: int = 0, count: int = 100,
+               descending: bool = False) -> RecordPage:
+        """Get the records at positions `start` to `start + count` of an order."""
+        params = {"order_by": self._order_param(order_by), "start": start, "limit": count}
+        if descending:
+            params["descending"] = 1
+        return self._read_page(record_type, params)
+
+    @staticmethod
+    def _order_param(order_by: OrderBy) -> str:
+        """Encode an order for the query string: a field name, or (field, descending) pairs as JSON."""
+        return order_by if isinstance(order_by, str) else json.dumps([list(column) for column in order_by])
+
+    def _read_page(self, record_type: str, params: Dict[str, Any]) -> RecordPage:
+        """Request a page of records from the server."""
+        result, _ = self._request("GET", f"/pages/{quote(record_type)}?{urlencode(params)}", record_type=record_type)
+        cursor = tuple(result["cursor"]) if result["cursor"] is not None else None
+        return RecordPage(result["records"], cursor, result["total"])
+
+    def query(self, record_type: str, where: Optional[Callable[[Dict[str, Any]], bool]] = None,
+              **filters: Any) -> Iterator[Dict[str, Any]]:
+        """Iterate over the records matching exact field values (filtered by the server) and a predicate."""
+        path = self._record_path(record_type)
+        if filters:
+            path += "?" + urlencode(filters)
+        records, _ = self._request("GET", path, record_type=record_type)
+        return iter(records if where is None else [record for record in records if where(record)])
+
+    def search(self, record_type: str, text: str, fields: Optional[Iterable[str]] = None) -> Iterator[Dict[str, Any]]:
+        """Iterate over the records containing `text` in any of the given fields, ignoring case."""
+        params = {"q": text}
+        if fields is not None:
+            params["fields"] = ",".join(fields)
+        records, _ = self._request("GET", f"/search/{quote(record_type)}?{urlencode(params)}",
+                                   record_type=record_type)
+        return iter(records)
+
+    def export_records(self, record_type: str, file_path: str, file_format: Optional[str] = None,
+                       records: Optional[Iterable[Dict[str, Any]]] = None,
+                       progress_callback: Optional[Callable[[int], None]] = None) -> int:
+        """Export a record type, or the given query result, to a CSV or JSONL file."""
+        if records is None:
+            records = self.snapshot(record_type)
+
+        return exporter.export_records(records, file_path, file_format,
+                                       fields=exporter.RECORD_FIELDS.get(record_type),
+                                       progress_callback=progress_callback)
+
+    def add_record(self, record_type: str, new_record: Dict[str, Any]) -> None:
+        """Add a record, filling in the ID and creation time assigned by the server."""
+        added_record, _ = self._request("POST", self._record_path(record_type), new_record, record_type)
+        new_record.update(added_record)
+
+    def add_records(self, record_type: str, new_records: List[Dict[str, Any]],
+                    validate: Optional[bool] = None) -> None:
+        """Add many records at once (the server always validates them)."""
+        if not new_records:
+            return
+        added_records, _ = self._request("POST", self._record_path(record_type), new_records, record_type)
+        for new_record, added_record in zip(new_records, added_records):
+            new_record.update(added_record)
+
+    def update_record(self, record_type: str, record_id: Any, updated_record: Dict[str, Any]) -> None:
+        """Update a record by ID."""
+        self._request("PUT", self._record_path(record_type, record_id), updated_record, record_type)
+
+    def patch_record(self, record_type: str, record_id: Any, changes: Dict[str, Any]) -> Dict[str, Any]:
+        """Change some fields of a record by ID and return the updated record."""
+        record, _ = self._request("PATCH", self._record_path(record_type, record_id), changes, record_type)
+        return record
+
+    def delete_record(self, record_type: str, record_id: Any) -> None:
+        """Delete record by ID."""
+        self._request("DELETE", self._record_path(record_type, record_id), record_type=record_type)
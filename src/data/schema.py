@@ -0,0 +1,128 @@
+"""
+Schema Validation Module
+Declarative schemas for client, flight and airline records.
+
+Each schema is compiled once, at import time, into a plain Python function with one
+straight-line block of checks per field. The validators are cheap enough to stay switched
+on for bulk imports.
+"""
+import re
+from typing import Any, Callable, Dict, Optional
+
+# Patterns for the supported field formats
+FORMATS = {
+    # DD/MM/YYYY as entered in the forms (day 1-31, month 1-12, four digit year)
+    "date": re.compile(r"(0?[1-9]|[12][0-9]|3[01])/(0?[1-9]|1[0-2])/[1-9][0-9]{3}"),
+    "email": re.compile(r"[^@\s]+@[^@\s]+\.[^@\s]+"),
+    "phone": re.compile(r"\+?[0-9][0-9 ()\-]{5,}")
+}
+
+FORMAT_MESSAGES = {
+    "date": "must be a date in DD/MM/YYYY format",
+    "email": "must be a valid email address",
+    "phone": "must be a valid phone number"
+}
+
+# Field rules per record type: required, type and format
+SCHEMAS = {
+    "client": {
+        "name": {"required": True, "type": str},
+        "phone": {"required": True, "type": str, "format": "phone"},
+        "email": {"required": True, "type": str, "format": "email"},
+        "address_line1": {"required": True, "type": str},
+        "address_line2": {"type": str},
+        "address_line3": {"type": str},
+        "city": {"required": True, "type": str},
+        "state": {"type": str},
+        "zip_code": {"type": str},
+        "country": {"required": True, "type": str}
+    },
+    "flight": {
+        "client": {"required": True, "type": str},
+        "airline": {"required": True, "type": str},
+        "departure": {"required": True, "type": str},
+        "destination": {"required": True, "type": str},
+        "depart_date": {"required": True, "type": str, "format": "date"},
+        "return_date": {"type": str, "format": "date"}
+    },
+    "airline": {
+        "company_name": {"required": True, "type": str},
+        "country": {"required": True, "type": str}
+    }
+}
+
+
+class ValidationError(ValueError):
+    """Raised when a record does not match the schema of its record type."""
+
+    def __init__(self, record_type: str, message: str):
+        super().__init__(message)
+        self.record_type = record_type
+        self.message = message
+
+
+def compile_schema(record_type: str, schema: Dict[str, Dict[str, Any]]) -> Callable[[Any], Optional[str]]:
+    """
+    Compile a schema into a validator function.
+
+    The validator returns the first error message for a record, or None if it is valid.
+    """
+    namespace = {"dict": dict}
+    lines = [
+        "def validate(record):",
+        "    if record.__class__ is not dict:",
+        "        return 'Record is not an object'",
+        "    get = record.get",
+    ]
+
+    for number, (field, rules) in enumerate(schema.items()):
+        field_type = rules.get("type")
+        field_format = rules.get("format")
+        namespace[f"type_{number}"] = field_type
+        if field_format:
+            namespace[f"match_{number}"] = FORMATS[field_format].fullmatch
+
+        lines.append(f"    value = get({field!r})")
+        if rules.get("required"):
+            lines += [
+                "    if not value:",
+                f"        return {f'Missing required field {field!r}'!r}",
+            ]
+            indent = "    "
+        else:
+            # Optional fields are only checked when they hold a value
+            lines.append("    if value:")
+            indent = "        "
+
+        if field_type:
+            lines += [
+                f"{indent}if value.__class__ is not type_{number}:",
+                f"{indent}    return {f'Field {field!r} must be of type {field_type.__name__}'!r}",
+            ]
+        if field_format:
+            lines += [
+                f"{indent}if not match_{number}(value):",
+                f"{indent}    return {f'Field {field!r} {FORMAT_MESSAGES[field_format]}'!r}",
+            ]
+
+    lines.append("    return None")
+    exec("\n".join(lines), namespace)
+    validator = namespace["validate"]
+    validator.__name__ = f"validate_{record_type}"
+    return validator
+
+
+# Validators compiled once per record type
+VALIDATORS = {record_type: compile_schema(record_type, schema) for record_type, schema in SCHEMAS.items()}
+
+
+def validate_record(record_type: str, record: Any) -> None:
+    """Validate a record, raising ValidationError if it does not match its schema."""
+    error = VALIDATORS[record_type](record)
+    if error:
+        raise ValidationError(record_type, error)
+
+
+def is_valid_date(date_string: str) -> bool:
+    """Check if a date string matches the DD/MM/YYYY format."""
+    return bool(date_string) and FORMATS["date"].fullmatch(date_string) is not None
@@ -0,0 +1,197 @@
+"""
+Search Module
+Record filtering and case- and accent-insensitive text search, shared by the record managers and
+the server, and a search service that narrows its previous results as the search text grows.
+"""
+import unicodedata
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from src.data.indexes import RecordIndex
+
+# Records searched between checks of whether a search was cancelled
+CANCEL_CHECK_INTERVAL = 1024
+
+
+def filter_records(records: Iterable[Dict[str, Any]], where: Optional[Callable[[Dict[str, Any]], bool]] = None,
+                   filters: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+    """Yield the records matching exact field values and/or a predicate."""
+    filters = filters or {}
+    for record in records:
+        if all(record.get(field) == value for field, value in filters.items()) and \
+                (where is None or where(record)):
+            yield record
+
+
+def search_key(value: Any) -> str:
+    """Get the text a value is searched by: casefolded, with accents removed ('Zoë' -> 'zoe')."""
+    if value is None:
+        return ""
+    text = str(value).casefold()
+    if text.isascii():
+        return text
+    return ''.join(char for char in unicodedata.normalize('NFKD', text) if not unicodedata.combining(char))
+
+
+def search_records(records: Iterable[Dict[str, Any]], text: str, fields: Optional[List[str]] = None,
+                   cancelled: Optional[Callable[[], bool]] = None) -> Iterator[Dict[str, Any]]:
+    """Yield the records containing `text` (ignoring case and accents) in any of the given fields, or in any field.
+
+    The search stops early once `cancelled()` returns True, checked every few records.
+    """
+    needle = search_key(text)
+    for count, record in enumerate(records):
+        if cancelled is not None and not count % CANCEL_CHECK_INTERVAL and cancelled():
+            return
+        if record_matches(record, needle, fields):
+            yield record
+
+
+def record_matches(record: Dict[str, Any], needle: str, fields: Optional[Iterable[str]] = None) -> bool:
+    """Check whether a record contains the `needle` search key in any of the given fields, or in any field."""
+    values = record.values() if fields is None else (record.get(field) for field in fields)
+    return any(needle in search_key(value) for value in values if value is not None)
+
+
+class SearchKeyIndex(RecordIndex):
+    """
+    Search keys of record fields by position, so searches compare prepared strings.
+
+    The keys of a field are built the first time it is searched, then kept up to date as
+    records are added or edited; deletions shift positions, so the keys are built again.
+    """
+
+    def __init__(self):
+        self._keys: Dict[str, Dict[str, List[str]]] = {}
+
+    def rebuild(self, record_type, records):
+        self._keys[record_type] = {}
+
+    def on_add(self, record_type, position, record):
+        field_keys = self._keys.get(record_type, {})
+        for field, keys in list(field_keys.items()):
+            if len(keys) == position:
+                keys.append(search_key(record.get(field)))
+            else:
+                # Built from other records than these; build again when next searched
+                del field_keys[field]
+
+    def on_update(self, record_type, position, old_record, new_record):
+        for field, keys in self._keys.get(record_type, {}).items():
+            value = new_record.get(field)
+            if position < len(keys) and old_record.get(field) != value:
+                keys[position] = search_key(value)
+
+    def get(self, record_type: str, field: str, records: List[Dict[str, Any]]) -> List[str]:
+        """Get the search key of a field of each record, building the keys if needed."""
+        field_keys = self._keys.setdefault(record_type, {})
+        keys = field_keys.get(field)
+        if keys is None or len(keys) != len(records):
+            keys = field_keys[field] = [search_key(record.get(field)) for record in records]
+        return keys
+
+
+class SearchService(RecordIndex):
+    """
+    Text search of a record manager's records that reuses the previous result of each search.
+
+    When the text of a search contains the text of the previous search of the same record
+    type and fields, only the previous matches can match, so just those are checked again.
+    Registered with the record manager (`register_index`), the service also learns which
+    records were added or edited since, and checks those too; deletions shift positions,
+    so the next search starts over. Unregistered, it narrows only while the version of the
+    records is unchanged.
+
+    Searches of given fields compare the prepared keys of a SearchKeyIndex, kept up to date
+    through the same hooks (or built again for each version when unregistered).
+    """
+
+    # Additions and edits remembered between searches, before the next search starts over instead
+    MAX_CHANGES = 10000
+
+    def __init__(self, record_manager):
+        self.record_manager = record_manager
+        self.registered = False
+        self.keys = SearchKeyIndex()
+        self._key_versions: Dict[str, int] = {}
+        # Per record type: how often positions were reset, and positions added or edited since
+        self._resets: Dict[str, int] = {}
+        self._changes: Dict[str, List[int]] = {}
+        # Previous search per (record type, fields): needle, version, resets, changes seen, matching positions
+        self._previous: Dict[Tuple[str, Optional[Tuple[str, ...]]], Tuple[str, int, int, int, List[int]]] = {}
+
+    def rebuild(self, record_type, records):
+        self.registered = True
+        self.keys.rebuild(record_type, records)
+        self._reset_changes(record_type)
+
+    def on_add(self, record_type, position, record):
+        self.keys.on_add(record_type, position, record)
+        self._log_change(record_type, position)
+
+    def on_update(self, record_type, position, old_record, new_record):
+        self.keys.on_update(record_type, position, old_record, new_record)
+        self._log_change(record_type, position)
+
+    def _reset_changes(self, record_type: str) -> None:
+        """Forget the logged changes, so the next search starts over."""
+        self._resets[record_type] = self._resets.get(record_type, 0) + 1
+        self._changes[record_type] = []
+
+    def _log_change(self, record_type: str, position: int) -> None:
+        """Remember a position to check again, starting over once too many changed."""
+        changes = self._changes.setdefault(record_type, [])
+        if len(changes) >= self.MAX_CHANGES:
+            self._reset_changes(record_type)
+        else:
+            changes.append(position)
+
+    def search(self, record_type: str, text: str, fields: Optional[Iterable[str]] = None,
+               cancelled: Optional[Callable[[], bool]] = None) -> List[Dict[str, Any]]:
+        """Get the records containing `text` (ignoring case and accents) in any of the given fields, or in any field.
+
+        A cancelled search (once `cancelled()` returns True) returns what it found so far,
+        and is not reused by the next search.
+        """
+        needle = search_key(text)
+        fields = tuple(fields) if fields is not None else None
+        key = (record_type, fields)
+
+        # Take the records, their search keys and the changes logged up to them together, keeping writers out
+        lock = getattr(self.record_manager, 'lock', None)
+        with lock.reading() if lock is not None else nullcontext():
+            snapshot = self.record_manager.snapshot(record_type)
+            resets = self._resets.get(record_type, 0)
+            changes = self._changes.get(record_type, [])
+            changes_seen = len(changes)
+            if not self.registered and self._key_versions.get(record_type) != snapshot.version:
+                self.keys.rebuild(record_type, snapshot)
+                self._key_versions[record_type] = snapshot.version
+            field_keys = [self.keys.get(record_type, field, snapshot) for field in fields or ()]
+
+        previous = self._previous.get(key)
+        if previous is None or previous[0] not in needle:
+            candidates = range(len(snapshot))
+        elif self.registered and previous[2] == resets:
+            # Previous matches, and the records added or edited since
+            new_changes = changes[previous[3]:changes_seen]
+            candidates = sorted(set(previous[4]).union(new_changes)) if new_changes else previous[4]
+        elif not self.registered and previous[1] == snapshot.version:
+            candidates = previous[4]
+        else:
+            candidates = range(len(snapshot))
+
+        positions = []
+        for start in range(0, len(candidates), CANCEL_CHECK_INTERVAL):
+            if cancelled is not None and cancelled():
+                return [snapshot[position] for position in positions]
+            chunk = candidates[start:start + CANCEL_CHECK_INTERVAL]
+            if fields is None:
+                positions += [position for position in chunk if record_matches(snapshot[position], needle)]
+            elif len(field_keys) == 1:
+                keys = field_keys[0]
+                positions += [position for position in chunk if needle in keys[position]]
+            else:
+                positions += [position for position in chunk if any(needle in keys[position] for keys in field_keys)]
+
+        self._previous[key] = (needle, snapshot.version, resets, changes_seen, positions)
+        return [snapshot[position] for position in positions]
@@ -0,0 +1,31 @@
+"""
+Record Snapshots
+Immutable point-in-time views over the records of one record type.
+Snapshots are handed out by RecordManager and stay valid while the manager keeps mutating.
+"""
+from collections.abc import Sequence
+from typing import Any, Dict, Iterator, List
+
+
+class RecordSnapshot(Sequence):
+    """Read-only, point-in-time view of the records of one record type."""
+
+    __slots__ = ('record_type', 'version', '_records')
+
+    def __init__(self, record_type: str, version: int, records: List[Dict[str, Any]]):
+        """Wrap a record list that the RecordManager will never mutate again."""
+        self.record_type = record_type
+        self.version = version
+        self._records = records
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __getitem__(self, index):
+        return self._records[index]
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self._records)
+
+    def __repr__(self) -> str:
+        return f"RecordSnapshot({self.record_type!r}, version={self.version}, records={len(self._records)})"
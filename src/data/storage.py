@@ -0,0 +1,340 @@
+"""
+Storage Module
+Reads and writes lists of records in the supported file formats (json, jsonl, pickle).
+Used by RecordManager for both single record files and sharded record files.
+
+Records are written and read one at a time in every format (pickle files in batches), so a
+file never has to fit in memory. Every format can optionally be compressed with gzip, zlib
+or lzma. Compressed files are encoded and decoded as streams, so no second in-memory copy of
+the file is built.
+"""
+import gzip
+import io
+import json
+import lzma
+import os
+import pickle
+import re
+import zlib
+from json.encoder import c_make_encoder, encode_basestring_ascii
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+FILE_FORMATS = ['jsonl', 'json', 'pickle']
+
+# Records pickled together; a pickle file is a sequence of pickled lists of records
+PICKLE_BATCH_SIZE = 1000
+
+# Characters of a JSON file read at a time when parsing its array incrementally
+JSON_CHUNK_SIZE = 64 * 1024
+
+# Start of a JSON array (with its end if empty), and the separator after each element
+ARRAY_START = re.compile(r'\s*\[\s*(\])?')
+ARRAY_SEPARATOR = re.compile(r'\s*([,\]])\s*')
+
+# Supported compression codecs and the suffix they add to file names
+COMPRESSIONS = {
+    None: '',
+    'gzip': '.gz',
+    'zlib': '.zz',
+    'lzma': '.xz'
+}
+
+
+class ZlibFile(io.RawIOBase):
+    """Binary file object that streams zlib-compressed data to or from a file."""
+
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, file_path: str, mode: str = 'rb', level: int = zlib.Z_DEFAULT_COMPRESSION):
+        super().__init__()
+        self._writing = mode.startswith('w')
+        self._file = open(file_path, 'wb' if self._writing else 'rb')
+        self._compressor = zlib.compressobj(level) if self._writing else None
+        self._decompressor = None if self._writing else zlib.decompressobj()
+        self._pending = memoryview(b'')
+
+    def readable(self) -> bool:
+        return not self._writing
+
+    def writable(self) -> bool:
+        return self._writing
+
+    def write(self, data) -> int:
+        self._file.write(self._compressor.compress(data))
+        return len(data)
+
+    def readinto(self, buffer) -> int:
+        if not self._pending:
+            self._pending = memoryview(self._decompress_chunk())
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+    def _decompress_chunk(self) -> bytes:
+        """Decompress at most one chunk of data."""
+        while not self._decompressor.eof:
+            data = self._decompressor.unconsumed_tail or self._file.read(self.CHUNK_SIZE)
+            if not data:
+                raise EOFError("Compressed file ended before the end-of-stream marker was reached")
+            decompressed = self._decompressor.decompress(data, self.CHUNK_SIZE)
+            if decompressed:
+                return decompressed
+        return b''
+
+    def close(self) -> None:
+        if not self.closed:
+            if self._writing:
+                self._file.write(self._compressor.flush())
+            self._file.close()
+        super().close()
+
+
+def get_compressed_path(file_path: str, compression: Optional[str]) -> str:
+    """Add the compression suffix to a file path."""
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Compression '{compression}' is not supported.")
+    return file_path + COMPRESSIONS[compression]
+
+
+def open_record_file(file_path: str, mode: str, compression: Optional[str] = None,
+                     compression_level: Optional[int] = None):
+    """Open a record file for streaming, compressing or decompressing it on the fly."""
+    binary = 'b' in mode
+    writing = mode.startswith('w')
+
+    if compression is None:
+        return open(file_path, mode)
+
+    if compression == 'gzip':
+        level = 9 if compression_level is None else compression_level
+        return gzip.open(file_path, mode if binary else mode + 't', compresslevel=level)
+
+    if compression == 'lzma':
+        preset = compression_level if writing else None
+        return lzma.open(file_path, mode if binary else mode + 't', preset=preset)
+
+    if compression == 'zlib':
+        level = zlib.Z_DEFAULT_COMPRESSION if compression_level is None else compression_level
+        raw = ZlibFile(file_path, mode, level)
+        buffered = io.BufferedWriter(raw) if writing else io.BufferedReader(raw)
+        return buffered if binary else io.TextIOWrapper(buffered)
+
+    raise ValueError(f"Compression '{compression}' is not supported.")
+
+
+# Records are checksummed in their JSON Lines encoding in every format, so JSON Lines
+# files can be checksummed line by line without encoding the records again
+checksum_encode = json.JSONEncoder(default=str).encode
+
+
+def make_line_encoder() -> Callable[[Dict[str, Any]], str]:
+    """
+    Make a function encoding one record as a JSON line, matching json.JSONEncoder().encode.
+
+    JSONEncoder.encode sets up a new C encoder for every call; building it once saves that
+    per record when many records are written.
+    """
+    if c_make_encoder is None:
+        return json.JSONEncoder().encode
+    iterencode = c_make_encoder({}, json.JSONEncoder().default, encode_basestring_ascii, None, ': ', ', ', False, False, True)
+    return lambda record: ''.join(iterencode(record, 0))
+
+
+def record_crc(record: Dict[str, Any]) -> int:
+    """Get the CRC32 checksum of a record."""
+    return zlib.crc32(checksum_encode(record).encode('utf-8'))
+
+
+def get_checksum_path(file_path: str) -> str:
+    """Get the path of the checksum file stored alongside a record file."""
+    return file_path + '.crc'
+
+
+def write_checksums(checksum_path: str, checksums: List[int]) -> None:
+    """Write the per-record checksums of a record file."""
+    with open(checksum_path, 'w') as file:
+        # json.dumps encodes in C in one go; json.dump would encode number by number in Python
+        file.write(json.dumps({"count": len(checksums), "crc32": checksums}))
+
+
+def read_checksums(checksum_path: str) -> Optional[List[int]]:
+    """Read the per-record checksums of a record file (None if there are none)."""
+    try:
+        with open(checksum_path, 'r') as file:
+            return json.load(file)["crc32"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def write_records(file_path: str, records: Iterable[Dict[str, Any]], file_format: str,
+                  compression: Optional[str] = None, compression_level: Optional[int] = None,
+                  checksum_path: Optional[str] = None) -> None:
+    """
+    Write records to a file in the given format.
+
+    With a `checksum_path`, the CRC32 of every record is computed while it is written
+    and stored in that file afterwards.
+    """
+    checksums = []
+    if checksum_path is not None and file_format != 'jsonl':
+        records = _track_checksums(records, checksums)
+
+    if file_format == 'jsonl':
+        encode = make_line_encoder()
+        with open_record_file(file_path, 'w', compression, compression_level) as file:
+            if checksum_path is None:
+                for record in records:
+                    file.write(encode(record) + '\n')
+            else:
+                add_checksum = checksums.append
+                for record in records:
+                    line = encode(record)
+                    add_checksum(zlib.crc32(line.encode('utf-8')))
+                    file.write(line + '\n')
+
+    elif file_format == 'json':
+        # Stream the array one record at a time, matching json.dump(records, indent=4)
+        encode = json.JSONEncoder(indent=4).encode
+        with open_record_file(file_path, 'w', compression, compression_level) as file:
+            separator = '[\n    '
+            for record in records:
+                file.write(separator + encode(record).replace('\n', '\n    '))
+                separator = ',\n    '
+            file.write('[]' if separator == '[\n    ' else '\n]')
+
+    elif file_format == 'pickle':
+        # Pickle the records in batches, each as a list, so only one batch is held at a time
+        with open_record_file(file_path, 'wb', compression, compression_level) as file:
+            batch = []
+            for record in records:
+                batch.append(record)
+                if len(batch) >= PICKLE_BATCH_SIZE:
+                    pickle.dump(batch, file)
+                    batch = []
+            if batch:
+                pickle.dump(batch, file)
+
+    else:
+        raise ValueError(f"File format '{file_format}' is not supported.")
+
+    if checksum_path is not None:
+        write_checksums(checksum_path, checksums)
+
+
+def _track_checksums(records: Iterable[Dict[str, Any]], checksums: List[int]) -> Iterator[Dict[str, Any]]:
+    """Pass records through while collecting their checksums."""
+    for record in records:
+        checksums.append(record_crc(record))
+        yield record
+
+
+def iter_records(file_path: str, file_format: str,
+                 compression: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Iterate over the records stored in a file."""
+    if file_format == 'jsonl':
+        with open_record_file(file_path, 'r', compression) as file:
+            for line in file:
+                if line.strip(): # Check if line is not empty & strip whitespace
+                    yield json.loads(line)
+
+    elif file_format == 'json':
+        with open_record_file(file_path, 'r', compression) as file:
+            yield from iter_json_array(file)
+
+    elif file_format == 'pickle':
+        with open_record_file(file_path, 'rb', compression) as file:
+            yield from iter_pickle_batches(file)
+
+    else:
+        raise ValueError(f"File format '{file_format}' is not supported.")
+
+
+def _read_json_chunk(file, buffer: str, position: int) -> Tuple[str, bool]:
+    """Append the next chunk of a text file to the unparsed end of a buffer, and tell whether the file ended."""
+    # Read at least as much as is buffered, so an element spanning many chunks is decoded few times
+    chunk = file.read(max(JSON_CHUNK_SIZE, len(buffer) - position))
+    return buffer[position:] + chunk, not chunk
+
+
+def iter_json_array(file) -> Iterator[Any]:
+    """Parse the elements of a JSON array one at a time, reading the text file in chunks."""
+    # The decoder's scanner decodes one value at a position, without the checks of raw_decode
+    scan = json.JSONDecoder().scan_once
+    buffer, position, at_end = '', 0, False
+
+    # Find the opening bracket, and the closing one of an empty array
+    while True:
+        match = ARRAY_START.match(buffer, position)
+        if match is not None and (match.end() < len(buffer) or at_end):
+            break
+        if at_end:
+            raise ValueError("Expected a JSON array of records")
+        buffer, at_end = _read_json_chunk(file, buffer, position)
+        position = 0
+    if match.group(1):
+        return
+    position = match.end()
+
+    while True:
+        # Decode the next element, reading on while it may be cut off by the end of the buffer
+        try:
+            element, end = scan(buffer, position)
+            separator = ARRAY_SEPARATOR.match(buffer, end)
+            complete = separator is not None and (separator.end() < len(buffer) or at_end)
+        except (StopIteration, ValueError):
+            complete = False
+        if not complete:
+            if at_end:
+                raise ValueError("JSON array of records is damaged or cut off")
+            buffer, at_end = _read_json_chunk(file, buffer, position)
+            position = 0
+            continue
+
+        yield element
+        if separator.group(1) == ']':
+            return
+        position = separator.end()
+
+
+def iter_pickle_batches(file) -> Iterator[Any]:
+    """Unpickle the records of a binary file batch by batch (files of one pickled list are one batch)."""
+    # A cut off batch raises an error rather than looking like the end of the file
+    while file.peek(1):
+        yield from pickle.load(file)
+
+
+def read_records(file_path: str, file_format: str,
+                 compression: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Read all records stored in a file."""
+    return list(iter_records(file_path, file_format, compression))
+
+
+def fsync_file(file_path: str) -> None:
+    """Flush a written file from the operating system cache to disk."""
+    with open(file_path, 'rb') as file:
+        os.fsync(file.fileno())
+
+
+def fsync_directory(folder: str) -> None:
+    """Flush a folder's entries to disk, making renames inside it durable."""
+    # Folders cannot be opened for syncing on Windows, where renames are journaled anyway
+    if os.name == 'nt':
+        return
+    descriptor = os.open(folder, os.O_RDONLY)
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
+
+
+def write_json(file_path: str, data: Any) -> None:
+    """Write a small JSON document such as a manifest."""
+    with open(file_path, 'w') as file:
+        json.dump(data, file, indent=4)
+
+
+def read_json(file_path: str) -> Any:
+    """Read a small JSON document such as a manifest."""
+    with open(file_path, 'r') as file:
+        return json.load(file)
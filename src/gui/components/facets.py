@@ -0,0 +1,82 @@
+"""
+Facet Filter Component
+
+Dropdowns narrowing a table to records with chosen field values,
+each value showing how many records it would leave.
+"""
+import customtkinter as ctk
+from src.data.facets import FacetIndex
+
+
+class FacetFilter(ctk.CTkFrame):
+    """
+    Facet Filter Component
+
+    One dropdown per facet field. The counts come from the bitmaps of a FacetIndex and
+    are refreshed after every choice, so no records are scanned. `on_change(selections)`
+    is called with the chosen value of each field, as {field: [value]}.
+    """
+
+    def __init__(self, parent, facet_index: FacetIndex, record_type, facets, on_change=None):
+        super().__init__(parent, fg_color="transparent")
+
+        self.facet_index = facet_index
+        self.record_type = record_type
+        self.on_change = on_change
+
+        # Chosen values, replaced rather than changed so search threads can read them
+        self.selections = {}
+        # Dropdown of each field, and the value behind each dropdown entry
+        self.menus = {}
+        self.labels = dict(facets)
+        self.choices = {}
+
+        for field, label in facets:
+            menu = ctk.CTkOptionMenu(
+                self,
+                values=[],
+                command=lambda choice, field=field: self.select(field, choice),
+                fg_color="white",
+                button_color="#565B5E",
+                button_hover_color="#666666",
+                text_color="black",
+                dropdown_fg_color="white",
+                dropdown_text_color="black",
+                dropdown_hover_color="#E6E6E6",
+                width=200,
+                height=32
+            )
+            menu.pack(side="left", padx=(0, 10))
+            self.menus[field] = menu
+
+        self.refresh()
+
+    def refresh(self):
+        """Show the current count of every value in the dropdowns"""
+        for field, menu in self.menus.items():
+            total = self.facet_index.count(self.record_type, {
+                other: values for other, values in self.selections.items() if other != field})
+            choices = {f"All {self.labels[field]} ({total})": None}
+            for value, count in self.facet_index.counts(self.record_type, field, self.selections):
+                # Records without the field are only found through "All"
+                if value not in (None, ""):
+                    choices[f"{value} ({count})"] = value
+            self.choices[field] = choices
+
+            menu.configure(values=list(choices))
+            chosen = self.selections.get(field, [None])[0]
+            menu.set(next((choice for choice, value in choices.items() if value == chosen), next(iter(choices))))
+
+    def select(self, field, choice):
+        """Choose a value of a field, or any value"""
+        value = self.choices[field].get(choice)
+        selections = dict(self.selections)
+        if value is None:
+            selections.pop(field, None)
+        else:
+            selections[field] = [value]
+        self.selections = selections
+
+        self.refresh()
+        if self.on_change:
+            self.on_change(selections)
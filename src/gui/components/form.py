@@ -29,6 +29,22 @@ class FormComponents:
             "height": 38,
         }
 
+        # Common Combo Box Style (text input with suggestions)
+        self.combo_style = {
+            "font": ("Arial", 16),
+            "fg_color": "white",
+            "border_color": "#dfe4ea",
+            "border_width": 1,
+            "button_color": "#dfe4ea",
+            "button_hover_color": "#cfd6de",
+            "text_color": "#000000",
+            "dropdown_fg_color": "white",
+            "dropdown_text_color": "#007aff",
+            "dropdown_hover_color": "#E6E6E6",
+            "corner_radius": 3,
+            "height": 38,
+        }
+
     def create_field_label(self, parent, label, required=False):
         """Create form field label"""
         label_text = f"{label} {'*' if required else ''}"
@@ -54,6 +70,16 @@ class FormComponents:
             **{**self.option_style, **kwargs}
         )
 
+    def create_combo_box(self, parent, values, **kwargs):
+        """Create a text input suggesting values, starting empty"""
+        combo_box = ctk.CTkComboBox(
+            parent,
+            values=values,
+            **{**self.combo_style, **kwargs}
+        )
+        combo_box.set("")
+        return combo_box
+
     def create_date_input(self, parent, placeholder="DD/MM/YYYY", **kwargs):
         """Create a date input field"""
         date_input = self.create_text_input(parent, placeholder, **kwargs)
@@ -75,6 +101,8 @@ class FormComponents:
             field = self.create_text_input(frame, **kwargs)
         elif field_type == "option":
             field = self.create_option_menu(frame, **kwargs)
+        elif field_type == "combo":
+            field = self.create_combo_box(frame, **kwargs)
         elif field_type == "date":
             field = self.create_date_input(frame, **kwargs)
         
@@ -0,0 +1,35 @@
+"""
+Progress Dialog Component
+
+Small window that reports the progress of a long running task,
+such as exporting records on a worker thread.
+"""
+import customtkinter as ctk
+
+
+class ProgressDialog(ctk.CTkToplevel):
+    """Progress Dialog Component"""
+    def __init__(self, parent, title="Please Wait", message=""):
+        super().__init__(parent)
+        self.title(title)
+        self.geometry("360x120")
+        self.resizable(False, False)
+        self.transient(parent)
+
+        # Message
+        self.message_label = ctk.CTkLabel(
+            self,
+            text=message,
+            font=("Arial", 13)
+        )
+        self.message_label.pack(anchor="w", padx=20, pady=(20, 10))
+
+        # Progress bar
+        self.progress_bar = ctk.CTkProgressBar(self)
+        self.progress_bar.set(0)
+        self.progress_bar.pack(fill="x", padx=20)
+
+    def update_progress(self, done, total):
+        """Update the progress bar and message"""
+        self.progress_bar.set(done / total if total else 1)
+        self.message_label.configure(text=f"{done} of {total} records")
@@ -8,18 +8,42 @@ Version: 1.0
 Last Updated: 16 Mar 2025
 
 """
+import queue
+import threading
 import customtkinter as ctk
 from src.gui.components.buttons import SingleButton
 
 class Search(ctk.CTkFrame):
-    """Search Bar Component"""
-    def __init__(self, parent, search_placeholder="Search...", search_callback=None):
+    """
+    Search Bar Component
+
+    Typing is debounced: a search starts once no key has been released for DEBOUNCE_MS.
+    With a `search_function(text, cancelled)`, the search runs on a worker thread, where
+    `cancelled()` turns True once a newer search starts. Only the result of the latest
+    search is passed to `search_callback(text, result)`, back on the Tk thread. Without
+    one, `search_callback(text)` is called on the Tk thread after the pause.
+    """
+    # Pause in typing before a search starts, and how often a running search is checked (milliseconds)
+    DEBOUNCE_MS = 200
+    POLL_INTERVAL_MS = 20
+
+    def __init__(self, parent, search_placeholder="Search...", search_callback=None, search_function=None):
         super().__init__(parent, fg_color="transparent", height=40)
 
         # Make the frame expand horizontally
         self.pack_propagate(False)  # Prevent frame from shrinking
 
         self.search_callback = search_callback
+        self.search_function = search_function
+
+        # Search state: the pending debounce, the running search and the results of searches
+        self.debounce_job = None
+        self.poll_job = None
+        self.search_text = ""
+        self.search_id = 0
+        self.cancel_event = None
+        self.results = queue.Queue()
+
         self.create_search_bar(search_placeholder)
 
     def create_search_bar(self, placeholder_text):
@@ -59,12 +83,81 @@ class Search(ctk.CTkFrame):
         self.clear_button.pack(side="right")
 
     def _on_search(self, event=None):
-        """Internal search handler"""
-        if self.search_callback:
-            self.search_callback(self.search_entry.get())
+        """Internal search handler; restarts the pause before searching on every key"""
+        if self.debounce_job is not None:
+            self.after_cancel(self.debounce_job)
+        self.debounce_job = self.after(self.DEBOUNCE_MS, self.start_search)
+
+    def start_search(self, force=False):
+        """Search for the text in the entry, cancelling the search still running"""
+        self.debounce_job = None
+        text = self.search_entry.get()
+        # Keys that do not change the text (arrows, Shift) do not search again
+        if text == self.search_text and not force:
+            return
+        self.search_text = text
+
+        self.cancel_running_search()
+        self.search_id += 1
+        if not self.search_function:
+            if self.search_callback:
+                self.search_callback(text)
+            return
+
+        search_id, cancel_event = self.search_id, threading.Event()
+        self.cancel_event = cancel_event
+
+        def search_worker():
+            try:
+                result = (True, self.search_function(text, cancel_event.is_set))
+            except Exception as e:
+                result = (False, e)
+            if not cancel_event.is_set():
+                self.results.put((search_id, text, result))
+
+        threading.Thread(target=search_worker, daemon=True).start()
+        if self.poll_job is None:
+            self.poll_job = self.after(self.POLL_INTERVAL_MS, self.poll_results)
+
+    def poll_results(self):
+        """Pass the result of the latest search to the callback on the Tk thread"""
+        self.poll_job = None
+        while True:
+            try:
+                search_id, text, (succeeded, result) = self.results.get_nowait()
+            except queue.Empty:
+                break
+
+            # Results of superseded searches are dropped
+            if search_id != self.search_id:
+                continue
+            self.cancel_event = None
+            if not succeeded:
+                print(f"Error searching: {result}")
+            elif self.search_callback:
+                self.search_callback(text, result)
+
+        if self.cancel_event is not None:
+            self.poll_job = self.after(self.POLL_INTERVAL_MS, self.poll_results)
+
+    def cancel_running_search(self):
+        """Cancel the search running on the worker thread, if any"""
+        if self.cancel_event is not None:
+            self.cancel_event.set()
+            self.cancel_event = None
 
     def clear_search(self):
         """Clear search field and trigger search callback"""
         self.search_entry.delete(0, 'end')
-        if self.search_callback:
-            self.search_callback("")
+        if self.debounce_job is not None:
+            self.after_cancel(self.debounce_job)
+        self.start_search(force=True)
+
+    def destroy(self):
+        """Stop pending and running searches before destroying the search bar"""
+        for job in (self.debounce_job, self.poll_job):
+            if job is not None:
+                self.after_cancel(job)
+        self.debounce_job = self.poll_job = None
+        self.cancel_running_search()
+        super().destroy()
@@ -16,6 +16,23 @@ class SelectCountry:
         "Taiwan", "Ukraine", "United Arab Emirates", "United Kingdom", "United States"
     ]
 
+    # The countries catalog last merged with COUNTRIES, and the merged list
+    _merged_catalog = None
+    _merged_countries = None
+
+    @classmethod
+    def get_countries(cls, record_manager=None):
+        """Get the predefined countries together with those of the records, sorted (the list must not be changed)"""
+        if record_manager is None:
+            return list(cls.COUNTRIES)
+        # The catalog hands out a new list only when its countries change, so merge once per list
+        catalog = record_manager.get_catalog("countries")
+        if catalog is not cls._merged_catalog:
+            countries = set(cls.COUNTRIES).union(catalog)
+            cls._merged_countries = sorted(countries, key=lambda country: (country.casefold(), country))
+            cls._merged_catalog = catalog
+        return cls._merged_countries
+
     @classmethod
     def create_field(cls, parent):
         """Create a country selection combobox"""
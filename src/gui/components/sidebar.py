@@ -89,6 +89,8 @@ class Sidebar:
             "src/assets/icon_clients.png"), size=(32, 32))
         icon_airlines = ctk.CTkImage(Image.open(
             "src/assets/icon_airlines.png"), size=(32, 32))
+        icon_search = ctk.CTkImage(Image.open(
+            "src/assets/icon_zoom.png"), size=(32, 32))
 
         # Create buttons
         self.flight_btn = SidebarButton(
@@ -115,6 +117,14 @@ class Sidebar:
         )
         self.airlines_btn.pack(pady=6, padx=8)
 
+        self.search_btn = SidebarButton(
+            self.sidebar,
+            "Search",
+            icon_search,
+            command=lambda: self.navigate_to("search")
+        )
+        self.search_btn.pack(pady=6, padx=8)
+
     def navigate_to(self, page):
         """
         Handle navigation between pages.
@@ -4,6 +4,18 @@ A reusable data table component for displaying tabular data in the application
 """
 from tkinter import ttk
 import customtkinter as ctk
+from src.data.ordering import OrderingCache
+from src.gui.components.buttons import SingleButton
+
+# Rows shown per page by paged tables
+PAGE_SIZE = 100
+
+# Row height of the tree in pixels, and the height of its heading
+ROW_HEIGHT = 20
+HEADING_HEIGHT = 24
+
+# Rows fetched beyond each edge of the visible window of a virtual table
+OVERSCAN_ROWS = 20
 
 class DataTable:
     """
@@ -18,10 +30,26 @@ class DataTable:
         on_double_click=None,
         sort_columns=None,
         action_column=None,
-        numeric_columns=None
+        format_row=None,
+        page_size=None,
+        virtual=False
     ):
         """
         Initialize DataTable
+
+        With a `page_size` the table only holds one page of rows at a time and shows
+        paging controls. Pages come from a page source (see `set_page_source`), or from
+        the rows given to `populate`.
+
+        A `virtual` table can scroll through every row, but only holds the rows visible in
+        the tree. Its scrollbar moves an offset into a row source (see `set_row_source`).
+
+        Rows are keyed by record ID, used as the tree item ID, and every update only
+        inserts, deletes, moves or changes the rows that differ from those shown.
+
+        Rows are records, sorted by their typed field values (IDs by number, dates by
+        day) rather than by the text shown. `format_row` turns a record into the values
+        shown, and is only called for the rows in the tree.
         """
         self.parent = parent
         self.columns = columns
@@ -30,8 +58,31 @@ class DataTable:
         self.on_double_click = on_double_click
         self.sort_columns = sort_columns or []
         self.action_column = action_column
-        self.numeric_columns = numeric_columns or ["id"]  # Default numeric columns
+        self.format_row = format_row
         self.action_callback = action_column.get('callback') if action_column else None
+
+        # Paging state: the source, its order, and the cursors of the current and earlier pages
+        self.page_size = page_size
+        self.page_source = None
+        self.order_by = "id"
+        self.descending = False
+        self.page_cursor = None
+        self.previous_cursors = []
+        self.current_page = None
+        self.data_orderings = self.list_orderings(self.data)
+
+        # Virtual state: the source, the first visible row, and the rows fetched around it
+        self.virtual = virtual
+        self.row_source = None
+        self.row_offset = 0
+        self.row_total = 0
+        self.visible_rows = 1
+        self.window_start = 0
+        self.window_rows = None
+
+        # Values of the rows in the tree, by item ID, and a message row shown instead of no rows
+        self.shown_values = {}
+        self.message_row = None
         self.setup_table()
 
     def setup_table(self):
@@ -66,6 +117,12 @@ class DataTable:
         if self.sort_columns:
             self.setup_sorting()
 
+        # Paging controls sit below the tree, the scrollbar of a virtual table beside it
+        if self.page_size:
+            self.setup_paging()
+        if self.virtual:
+            self.setup_virtual()
+
         # Pack the tree
         self.tree.pack(fill="both", expand=True, padx=0, pady=0)
 
@@ -78,7 +135,7 @@ class DataTable:
         style.configure(
             "Treeview",
             background="white",
-            rowheight=20,
+            rowheight=ROW_HEIGHT,
             borderwidth=0,
         )
         style.configure(
@@ -110,77 +167,336 @@ class DataTable:
                 stretch=False
             )
 
+    def setup_paging(self):
+        """Setup the previous/next page controls"""
+        self.paging_frame = ctk.CTkFrame(self.frame, fg_color="transparent")
+        self.paging_frame.pack(side="bottom", fill="x", padx=10, pady=10)
+
+        self.next_button = SingleButton(self.paging_frame, text="Next ›", command=self.next_page)
+        self.next_button.pack(side="right")
+        self.previous_button = SingleButton(self.paging_frame, text="‹ Previous", command=self.previous_page)
+        self.previous_button.pack(side="right", padx=(0, 10))
+
+        self.page_label = ctk.CTkLabel(self.paging_frame, text="", text_color="#444444")
+        self.page_label.pack(side="left")
+
+    def setup_virtual(self):
+        """Setup the scrollbar and events that move the window of a virtual table"""
+        self.scrollbar = ttk.Scrollbar(self.frame, orient="vertical", command=self.on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+
+        # The tree never scrolls itself; it always shows its items from the top
+        self.tree.bind('<Configure>', self.on_resize)
+        for sequence in ('<MouseWheel>', '<Button-4>', '<Button-5>'):
+            self.tree.bind(sequence, self.on_mouse_wheel)
+
     def setup_sorting(self):
-        """Setup column sorting functionality"""
-        def sort_column(treeView, col, reverse):
-            list = [(treeView.set(k, col), k) for k in treeView.get_children('')] # L is a list
-
-            try:
-                # Handle numeric sorting
-                if col in self.numeric_columns:
-                    list.sort(key=lambda t: float(
-                        t[0]) if t[0] else 0, reverse=reverse)
-                else:
-                    list.sort(reverse=reverse)
-            except ValueError:
-                list.sort(reverse=reverse)
-
-            # Rearrange items
-            for index, (_, k) in enumerate(list):
-                treeView.move(k, '', index)
-
-            # Update column headers with sort indicators
-            for column in self.sort_columns:
-                if column != self.action_column["id"]:
-                    # Get original column text
-                    original_text = next(
-                        (col_def["text"] for col_def in self.columns
-                         if col_def["id"] == column),
-                        column
-                    )
-
-                    # Add sort indicator if this is the sorted column
-                    if column == col:
-                        indicator = " ↑" if reverse else " ↓"
-                    else:
-                        indicator = ""
-
-                    treeView.heading(column, text=original_text + indicator)
-
-            # Update click handler
-            treeView.heading(
-                col,
-                command=lambda c=col: sort_column(treeView, c, not reverse)
-            )
+        """Setup column sorting functionality; shift-click a heading to add it as a further sort column"""
+        # Sorted columns as (column, descending) pairs, the most significant first
+        self.sort_order = []
+        self.shift_click = False
+
+        def remember_shift(event):
+            # Heading commands get no event, so note whether Shift was held for the click
+            self.shift_click = bool(event.state & 0x0001)
+
+        self.tree.bind('<Button-1>', remember_shift, add='+')
 
         # Initialize sorting for sortable columns
         for col in self.sort_columns:
             if col != self.action_column["id"]:
                 self.tree.heading(
                     col,
-                    command=lambda c=col: sort_column(self.tree, c, False)
+                    command=lambda c=col: self.sort_by_column(c)
                 )
 
+    def sort_by_column(self, col):
+        """Sort by a clicked column: a click sorts by it alone, a shift-click adds it to the sort"""
+        sort_order = list(self.sort_order)
+        columns = [column for column, _ in sort_order]
+        if self.shift_click and col in columns:
+            # Shift-clicking a sorted column flips its direction and keeps its place
+            position = columns.index(col)
+            sort_order[position] = (col, not sort_order[position][1])
+        elif self.shift_click and sort_order:
+            sort_order.append((col, False))
+        elif sort_order == [(col, False)]:
+            sort_order = [(col, True)]
+        else:
+            sort_order = [(col, False)]
+        self.shift_click = False
+        self.sort_by(sort_order)
+
+    def sort_by(self, sort_order):
+        """Sort by (column, descending) pairs, the most significant first"""
+        self.sort_order = list(sort_order)
+        # One column is sorted by its field, several by a combined order of them
+        if len(self.sort_order) == 1:
+            self.order_by, self.descending = self.sort_order[0]
+        else:
+            self.order_by, self.descending = tuple(self.sort_order) or "id", False
+
+        # Sort the data rather than the widget, then show only the rows in view
+        if self.page_size:
+            self.first_page()
+        elif self.virtual:
+            self.window_rows = None
+            self.scroll_to(0)
+        else:
+            self.show_rows(self.sorted_data())
+        self.update_headings()
+
+    def update_headings(self):
+        """Update column headers with sort indicators, numbered when sorting by several columns"""
+        directions = dict(self.sort_order)
+        priorities = {column: position for position, (column, _) in enumerate(self.sort_order, 1)}
+        for column in self.sort_columns:
+            if column != self.action_column["id"]:
+                # Get original column text
+                original_text = next(
+                    (col_def["text"] for col_def in self.columns
+                     if col_def["id"] == column),
+                    column
+                )
+
+                # Add sort indicator if this is a sorted column
+                if column in directions:
+                    indicator = " ↑" if directions[column] else " ↓"
+                    if len(self.sort_order) > 1:
+                        indicator += str(priorities[column])
+                else:
+                    indicator = ""
+
+                self.tree.heading(column, text=original_text + indicator)
+
     def setup_bindings(self):
         """Setup event bindings"""
         if self.on_double_click:
             self.tree.bind('<Double-1>', self.on_double_click)
         if self.on_row_click:
-            self.tree.bind('<Button-1>', self.on_row_click)
+            self.tree.bind('<Button-1>', self.on_row_click, add='+')
 
-    def populate(self, data=None):
-        """Populate table with data"""
+    def populate(self, data=None, orderings=None):
+        """Populate table with data, and the orderings of it from `prepare_orderings` if sorted already"""
         if data is not None:
             self.data = data
 
-        self.tree.delete(*self.tree.get_children())
+        self.message_row = None
+        # Sorted orders of the data are cached per column until it is replaced
+        self.data_orderings = orderings or self.list_orderings(self.data)
+        if self.page_size:
+            self.set_page_source(self.list_page_source(self.data_orderings))
+            return
+        if self.virtual:
+            self.set_row_source(self.list_row_source(self.data_orderings))
+            return
+
+        self.show_rows(self.sorted_data())
+
+    def sorted_data(self):
+        """Get the data in the current order, reversing the cached ascending order when descending"""
+        records = self.data_orderings(self.order_by).records
+        return records[::-1] if self.descending else records
+
+    def show_rows(self, rows, formatted=False):
+        """Show rows in the tree, only touching the items that differ from those shown"""
+        if not rows and self.message_row is not None:
+            rows, formatted = [self.message_row], True
+
+        keys = self.row_keys(rows)
+        new_keys = set(keys)
+
+        # Delete the rows that are no longer shown
+        current_keys = self.tree.get_children()
+        removed = [key for key in current_keys if key not in new_keys]
+        if removed:
+            self.tree.delete(*removed)
+            for key in removed:
+                del self.shown_values[key]
 
-        for item in self.data:
-            values = [item.get(col["id"], "") for col in self.columns]
-            if self.action_column:
-                values.append(item.get(self.action_column["id"], "Edit"))
-            self.tree.insert("", "end", values=values)
+        # Kept rows are only moved when their order changed, e.g. after sorting
+        kept = [key for key in current_keys if key in new_keys]
+        reordered = kept != [key for key in keys if key in self.shown_values]
+
+        for index, (key, item) in enumerate(zip(keys, rows)):
+            values = self.row_values(item, formatted)
+            if key not in self.shown_values:
+                self.tree.insert("", index, iid=key, values=values)
+            else:
+                if self.shown_values[key] != values:
+                    self.tree.item(key, values=values)
+                if reordered:
+                    self.tree.move(key, "", index)
+            self.shown_values[key] = values
+
+    @staticmethod
+    def row_keys(rows):
+        """Get the tree item IDs of rows: their record ID, or their position when it is missing or repeated"""
+        keys, used = [], set()
+        for position, item in enumerate(rows):
+            key = str(item.get("id") or "")
+            if not key or key in used:
+                key = f"#{position}"
+            used.add(key)
+            keys.append(key)
+        return keys
+
+    def row_values(self, item, formatted=False):
+        """Get the cell values of a row"""
+        if self.format_row and not formatted:
+            item = self.format_row(item)
+        values = [item.get(col["id"], "") for col in self.columns]
+        if self.action_column:
+            values.append(item.get(self.action_column["id"], "Edit"))
+        return values
+
+    @staticmethod
+    def list_orderings(rows):
+        """Get the orderings of a list of rows, sorting it once per column when first used"""
+        return OrderingCache(rows).get
+
+    def prepare_orderings(self, rows):
+        """Sort rows in the table's current order ahead of `populate`, e.g. on a worker thread"""
+        orderings = self.list_orderings(rows)
+        orderings(self.order_by)
+        return orderings
+
+    @staticmethod
+    def list_page_source(get_ordering):
+        """Make a page source over the orderings of a list of rows"""
+        return lambda order_by, after, limit, descending: get_ordering(order_by).page(after, limit, descending)
+
+    @staticmethod
+    def list_row_source(get_ordering):
+        """Make a row source over the orderings of a list of rows"""
+        return lambda order_by, start, count, descending: get_ordering(order_by).window(start, count, descending)
+
+    def set_page_source(self, fetch_page):
+        """
+        Show pages from a page source, starting at the first page.
+
+        `fetch_page(order_by, after, limit, descending)` returns a RecordPage of rows, as
+        `RecordManager.page` does, so only the rows of one page are ever formatted.
+        """
+        self.page_source = fetch_page
+        self.message_row = None
+        self.first_page()
+
+    def first_page(self):
+        """Show the first page of the source"""
+        self.previous_cursors = []
+        self.show_page(None)
+
+    def next_page(self):
+        """Show the page after the current one"""
+        if self.current_page is not None and self.current_page.cursor is not None:
+            self.previous_cursors.append(self.page_cursor)
+            self.show_page(self.current_page.cursor)
+
+    def previous_page(self):
+        """Show the page before the current one"""
+        if self.previous_cursors:
+            self.show_page(self.previous_cursors.pop())
+
+    def show_page(self, cursor):
+        """Fetch and show the page after a cursor"""
+        if self.page_source is None:
+            return
+
+        self.page_cursor = cursor
+        self.current_page = self.page_source(self.order_by, cursor, self.page_size, self.descending)
+        self.show_rows(self.current_page.records)
+
+        # Every page before this one was full
+        start = len(self.previous_cursors) * self.page_size
+        end = start + len(self.current_page.records)
+        total = self.current_page.total
+        self.page_label.configure(text=f"{start + 1 if end else 0:,}–{end:,} of {total:,}")
+        self.previous_button.configure(state="normal" if self.previous_cursors else "disabled")
+        self.next_button.configure(state="normal" if self.current_page.cursor is not None else "disabled")
+
+    def set_row_source(self, fetch_rows):
+        """
+        Scroll a virtual table through a row source, starting at the top.
+
+        `fetch_rows(order_by, start, count, descending)` returns a RecordPage of the rows at
+        positions `start` to `start + count`, as `RecordManager.window` does.
+        """
+        self.row_source = fetch_rows
+        self.message_row = None
+        self.window_rows = None
+        self.scroll_to(0)
+
+    def scroll_to(self, offset):
+        """Show the rows from an offset into the row source"""
+        self.row_offset = max(0, min(offset, self.row_total - self.visible_rows))
+        self.render_window()
+
+    def render_window(self):
+        """Show the visible rows, fetching them with some overscan unless already fetched"""
+        if self.row_source is None:
+            return
+
+        start, end = self.row_offset, self.row_offset + self.visible_rows
+        window_end = self.window_start + len(self.window_rows or ())
+        if self.window_rows is None or start < self.window_start or \
+                (end > window_end and window_end < self.row_total):
+            self.window_start = max(start - OVERSCAN_ROWS, 0)
+            window = self.row_source(self.order_by, self.window_start,
+                                     self.visible_rows + 2 * OVERSCAN_ROWS, self.descending)
+            self.window_rows = window.records
+            self.row_total = window.total
+            # The source may have shrunk since the offset was set
+            if start >= self.row_total and self.row_total:
+                self.scroll_to(self.row_total - self.visible_rows)
+                return
+
+        # Rows still in view keep their items; only those scrolled in or out change
+        self.show_rows(self.window_rows[start - self.window_start:end - self.window_start])
+
+        if self.row_total:
+            self.scrollbar.set(start / self.row_total, min(end / self.row_total, 1.0))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def refresh_window(self):
+        """Fetch the visible rows again, keeping the scroll position"""
+        self.window_rows = None
+        self.render_window()
+
+    def on_resize(self, event):
+        """Fit the window of a virtual table to the height of the tree"""
+        visible_rows = max((event.height - HEADING_HEIGHT) // ROW_HEIGHT, 1)
+        if visible_rows != self.visible_rows:
+            self.visible_rows = visible_rows
+            self.scroll_to(self.row_offset)
+
+    def on_scrollbar(self, action, amount, unit=None):
+        """Move the window of a virtual table as the scrollbar is dragged or clicked"""
+        if action == "moveto":
+            self.scroll_to(int(float(amount) * self.row_total))
+        elif action == "scroll":
+            step = self.visible_rows if unit == "pages" else 1
+            self.scroll_to(self.row_offset + int(amount) * step)
+
+    def on_mouse_wheel(self, event):
+        """Move the window of a virtual table with the mouse wheel"""
+        if event.num == 4 or event.delta > 0:
+            self.scroll_to(self.row_offset - 3)
+        else:
+            self.scroll_to(self.row_offset + 3)
+        return "break"
+
+    def show_message(self, message, column):
+        """Show a single message row instead of the data, e.g. when a search finds nothing"""
+        self.populate([])
+        self.message_row = {col["id"]: "" for col in self.columns}
+        self.message_row[column] = message
+        if self.action_column:
+            self.message_row[self.action_column["id"]] = ""
+        self.show_rows([])
 
     def clear(self):
         """Clear all data from table"""
         self.tree.delete(*self.tree.get_children())
+        self.shown_values.clear()
@@ -7,6 +7,7 @@ from src.gui.components.headers import FormHeader
 from src.gui.components.buttons import FormButtons
 from src.gui.components.form import FormComponents
 from src.data.record_manager import RecordManager
+from src.data.schema import ValidationError
 
 
 class NewAirlineForm(BasePage):
@@ -60,7 +61,7 @@ class NewAirlineForm(BasePage):
             "Country",
             required=True,
             field_type="option",
-            values=SelectCountry.COUNTRIES,
+            values=SelectCountry.get_countries(self.record_manager),
         )
         self.country.set("Please Select")  # Set default text
         self.country.pack(fill="x")
@@ -109,7 +110,11 @@ class NewAirlineForm(BasePage):
             "country": self.country.get()
         }
         # Save airline data to record manager
-        self.record_manager.add_record("airline", new_airline)
+        try:
+            self.record_manager.add_record("airline", new_airline)
+        except ValidationError as e:
+            messagebox.showerror("Invalid Airline", str(e))
+            return
 
         # Navigate back to airlines page
         self.navigation_callback("airlines")
@@ -2,23 +2,32 @@
 Airlines Page Class
 Contains the Airlines Records Table as the main content.
 """
+import functools
 from src.gui.pages.base import BasePage
 from src.gui.components.headers import PageHeader
 from src.gui.components.search import Search
+from src.gui.components.facets import FacetFilter
 from src.gui.components.buttons import SingleButton
 from src.gui.components.table import DataTable
 from src.gui.components.utility import DateFormatter
 from src.data.record_manager import RecordManager
+from src.data.search import SearchService
+from src.data.facets import FacetIndex
 
 class AirlinesPage(BasePage):
     """ Airlines Page Class """
 
-    def __init__(self, parent, navigation_callback, record_manager: RecordManager):
+    def __init__(self, parent, navigation_callback, record_manager: RecordManager,
+                 search_service: SearchService = None, facet_index: FacetIndex = None):
         super().__init__(parent, navigation_callback)  # Initialize the base page first
         self.record_manager = record_manager
+        # Shared between pages so each search can narrow the previous one
+        self.search_service = search_service or SearchService(record_manager)
+        # Bitmaps of the facet fields, counting and filtering without scanning records
+        self.facet_index = facet_index or FacetIndex(record_manager)
+        self.facet_filter = None
 
         # Initialize attributes
-        self.airlines = []  # Airlines List
         self.table = None  # Data Table
 
         # Create page header using base method
@@ -37,32 +46,30 @@ class AirlinesPage(BasePage):
         new_airline_btn.pack(side="right", pady=0)
 
         # Initialize content
-        self.fetch_airlines()
         self.setup_content()
 
-    def fetch_airlines(self):
-        """
-        Fetch airlines data
-        """
-        try:
-            self.airlines = self.record_manager.records["airline"]
-        except Exception as e:
-            print(f"Error fetching airlines: {e}")
-            self.airlines = []
-
     def setup_content(self):
         """Setup the main content of the airlines page"""
         try:
-            # Add this to see the actual data structure
-            print("Load Airlines Data:", self.airlines)
             # Add Search Bar
             self.search_frame = Search(
                 self.content_frame,
                 search_placeholder="Search by Airline Name",
-                search_callback=self.handle_search
+                search_callback=self.handle_search,
+                search_function=self.find_airlines
             )
             self.search_frame.pack(fill="x", padx=20, pady=(20, 5))
 
+            # Add Facet Dropdowns
+            self.facet_filter = FacetFilter(
+                self.content_frame,
+                self.facet_index,
+                "airline",
+                [("country", "Countries")],
+                on_change=self.handle_facets
+            )
+            self.facet_filter.pack(fill="x", padx=20, pady=(0, 5))
+
             # Create Table
             self.create_airline_table()
 
@@ -83,63 +90,76 @@ class AirlinesPage(BasePage):
         self.table = DataTable(
             parent=self.content_frame,
             columns=columns,
-            data=self.format_airline_data(),  # Initial data
             on_row_click=self.handle_click,
             on_double_click=self.on_row_double_click,
             sort_columns=["id", "company_name", "country", "created_at"],
+            format_row=self.format_airline,
             # Pass callback in action_column
-            action_column={"id": "action", "text": "Action", "callback": self.on_edit_click}
+            action_column={"id": "action", "text": "Action", "callback": self.on_edit_click},
+            # Scroll through every record while only the visible rows live in the table
+            virtual=True
         )
 
         # Initial population
         self.populate_table()
 
-    def format_airline_data(self, airlines=None):
-        """Format airline data for table"""
-        airlines_to_format = airlines if airlines is not None else self.airlines
-        return [{
+    def format_airline(self, airline):
+        """Format a airline for the table"""
+        return {
             "id": airline["id"],
             "company_name": airline["company_name"],
             "country": airline["country"],
             "created_at": DateFormatter.to_display_format(airline["created_at"]),
             "action": "Edit"
-        } for airline in airlines_to_format]
+        }
 
     def populate_table(self, filtered_data=None):
         """Populate table with airline data"""
-        formatted_data = self.format_airline_data(filtered_data)
-        self.table.populate(formatted_data)
+        if filtered_data is None and self.facet_filter and self.facet_filter.selections:
+            # Only the airlines of the chosen facets, read from their bitmaps
+            filtered_data = self.facet_index.select("airline", self.facet_filter.selections)
+            if not filtered_data:
+                self.table.show_message("No results found", "company_name")
+                return
+        if filtered_data is None:
+            # Scroll through every airline in the record manager's cached sorted orders
+            self.table.set_row_source(functools.partial(self.record_manager.window, "airline"))
+            return
 
-    def handle_search(self, search_text):
-        """Handle search callback from SearchFrame"""
-        search_text = search_text.lower()
+        self.table.populate(filtered_data)
 
+    def find_airlines(self, search_text, cancelled):
+        """Find the airlines matching the search text; runs on the search worker thread"""
         if not search_text:
+            return None
+
+        # Filter airlines based on search text, sorted for the table before it shows them
+        matched_airlines = self.search_service.search("airline", search_text, ["company_name"], cancelled)
+        selections = self.facet_filter.selections if self.facet_filter else {}
+        if selections:
+            matched_airlines = [record for record in matched_airlines if FacetIndex.matches(record, selections)]
+        return matched_airlines, self.table.prepare_orderings(matched_airlines)
+
+    def handle_facets(self, selections):
+        """Show the airlines of the chosen facets, within the search results if searching"""
+        self.search_frame.start_search(force=True)
+
+    def handle_search(self, search_text, results):
+        """Handle the results of the latest search from SearchFrame"""
+        if results is None:
             # If search is empty, show all airlines
             self.populate_table()
             return
 
-        # Filter airlines based on search text
-        matched_airlines = [
-            airline for airline in self.airlines
-            if search_text in airline["company_name"].lower()
-        ]
-
+        matched_airlines, orderings = results
         if matched_airlines:
-            self.populate_table(matched_airlines)
+            self.table.populate(matched_airlines, orderings)
         else:
             # Show no results found
-            self.table.populate([{
-                "id": "",
-                "company_name": "No results found",
-                "country": "",
-                "created_at": "",
-                "action": ""
-            }])
+            self.table.show_message("No results found", "company_name")
 
     def refresh_airlines(self):
         """Refresh the airlines table"""
-        self.fetch_airlines()
         self.populate_table()
 
     def on_new_airline_click(self):
@@ -155,39 +175,23 @@ class AirlinesPage(BasePage):
 
     def on_row_double_click(self, event):
         """Handle double-click on any row"""
-        item = self.table.tree.identify('item', event.x, event.y)
-        if item:
-            values = self.table.tree.item(item)['values']
-            if values:
-                airline = next(
-                    (f for f in self.airlines if str(
-                        f["id"]) == str(values[0])),
-                    None
-                )
-                if airline:
-                    self.navigation_callback({
-                        "route": "edit_airline",
-                        "data": airline
-                    })
+        self.open_airline(self.table.tree.identify('item', event.x, event.y))
 
     def handle_click(self, event):
         """Handle click events on the table"""
         region = self.table.tree.identify("region", event.x, event.y)
         if region == "cell":
             column = self.table.tree.identify_column(event.x)
-            item = self.table.tree.identify_row(event.y)
 
             # Check if click is in action column (last column)
             if column == f"#{len(self.table.columns) + 1}":
-                values = self.table.tree.item(item)['values']
-                if values:
-                    airline = next(
-                        (f for f in self.airlines if str(
-                            f["id"]) == str(values[0])),
-                        None
-                    )
-                    if airline:
-                        self.navigation_callback({
-                            "route": "edit_airline",
-                            "data": airline
-                        })
+                self.open_airline(self.table.tree.identify_row(event.y))
+
+    def open_airline(self, item):
+        """Open the edit page of the airline in a row; the row's item ID is its record ID"""
+        airline = self.record_manager.get_record("airline", item) if item else None
+        if airline:
+            self.navigation_callback({
+                "route": "edit_airline",
+                "data": airline
+            })
@@ -7,6 +7,7 @@ from src.gui.components.headers import FormHeader
 from src.gui.components.buttons import FormButtons, DeleteButton
 from src.gui.components.form import FormComponents
 from src.data.record_manager import RecordManager
+from src.data.schema import ValidationError
 
 
 class EditAirlinePage(BasePage):
@@ -75,7 +76,7 @@ class EditAirlinePage(BasePage):
             "Country",
             required=True,
             field_type="option",
-            values=SelectCountry.COUNTRIES,
+            values=SelectCountry.get_countries(self.record_manager),
         )
         self.country.pack(fill="x", pady=(0, 15))
         self.country.set(self.airline_data["country"])
@@ -118,16 +119,18 @@ class EditAirlinePage(BasePage):
             messagebox.showerror("Required Fields", error_message)
             return
 
-        new_airline = {
-            "id": self.airline_data["id"],
-            "type": "Airline",
+        # Only the fields that differ from the stored airline are written
+        changes = {
             "company_name": self.company_name.get(),
-            "country": self.country.get(),
-            "created_at": self.airline_data["created_at"]
+            "country": self.country.get()
         }
         
-        self.record_manager.update_record(
-            "airline", new_airline["id"], new_airline)
+        try:
+            self.record_manager.patch_record(
+                "airline", self.airline_data["id"], changes)
+        except ValidationError as e:
+            messagebox.showerror("Invalid Airline", str(e))
+            return
 
         self.navigation_callback("airlines")
         
@@ -7,6 +7,7 @@ from src.gui.components.headers import FormHeader
 from src.gui.components.buttons import FormButtons
 from src.gui.components.form import FormComponents
 from src.data.record_manager import RecordManager
+from src.data.schema import ValidationError
 
 
 class NewClientForm(BasePage):
@@ -167,7 +168,7 @@ class NewClientForm(BasePage):
             "Country",
             required=True,
             field_type="option",
-            values=SelectCountry.COUNTRIES,
+            values=SelectCountry.get_countries(self.record_manager),
         )
         self.country.set("Please Select")  # Set default text
         self.country.pack(fill="x")
@@ -246,7 +247,11 @@ class NewClientForm(BasePage):
         }
 
         # Save client data to record manager
-        self.record_manager.add_record("client", new_client)
+        try:
+            self.record_manager.add_record("client", new_client)
+        except ValidationError as e:
+            messagebox.showerror("Invalid Client", str(e))
+            return
 
         # Navigate back to clients page
         self.navigation_callback("clients")
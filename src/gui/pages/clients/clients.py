@@ -3,25 +3,34 @@ Clients Page Class
 
 Contains the Clients Records Table as the main content.
 """
+import functools
 from src.gui.pages.base import BasePage
 from src.gui.components.headers import PageHeader
 from src.gui.components.search import Search
+from src.gui.components.facets import FacetFilter
 from src.gui.components.buttons import SingleButton
 from src.gui.components.table import DataTable
 from src.gui.components.utility import DateFormatter
 from src.data.record_manager import RecordManager
+from src.data.search import SearchService
+from src.data.facets import FacetIndex
 
 
 class ClientsPage(BasePage):
     """ Clients Page Class """
     # Intitiate Base Page
 
-    def __init__(self, parent, navigation_callback, record_manager: RecordManager):
+    def __init__(self, parent, navigation_callback, record_manager: RecordManager,
+                 search_service: SearchService = None, facet_index: FacetIndex = None):
         super().__init__(parent, navigation_callback)
         self.record_manager = record_manager
+        # Shared between pages so each search can narrow the previous one
+        self.search_service = search_service or SearchService(record_manager)
+        # Bitmaps of the facet fields, counting and filtering without scanning records
+        self.facet_index = facet_index or FacetIndex(record_manager)
+        self.facet_filter = None
 
         # Initialize attributes first
-        self.clients = []  # Initialize clients list
         self.table = None  # Data Table
 
         # Create Header
@@ -40,20 +49,8 @@ class ClientsPage(BasePage):
         new_client_btn.pack(side="right", pady=0)
 
         # Initialize content
-        self.fetch_clients()
         self.setup_content()
 
-    def fetch_clients(self):
-        """
-        Fetch clients data from your data source
-        For now, using sample data
-        """
-        try:
-            self.clients = self.record_manager.records["client"]
-        except Exception as e:
-            print(f"Error fetching clients: {e}")
-            self.clients = []
-
     def setup_content(self):
         """Setup the main content of the clients page"""
         try:
@@ -61,10 +58,21 @@ class ClientsPage(BasePage):
             self.search_frame = Search(
                 self.content_frame,
                 search_placeholder="Search by Client Name",
-                search_callback=self.handle_search
+                search_callback=self.handle_search,
+                search_function=self.find_clients
             )
             self.search_frame.pack(fill="x", padx=20, pady=(20, 5))
 
+            # Add Facet Dropdowns
+            self.facet_filter = FacetFilter(
+                self.content_frame,
+                self.facet_index,
+                "client",
+                [("country", "Countries")],
+                on_change=self.handle_facets
+            )
+            self.facet_filter.pack(fill="x", padx=20, pady=(0, 5))
+
             # Create and populate table
             self.create_client_table()
 
@@ -88,23 +96,24 @@ class ClientsPage(BasePage):
         self.table = DataTable(
             parent=self.content_frame,
             columns=columns,
-            data=self.format_client_data(),  # Initial data
             on_row_click=self.handle_click,
             on_double_click=self.on_row_double_click,
             sort_columns=["id", "name", "city", "country",
                           "phone", "email", "created_at"],
+            format_row=self.format_client,
             # Pass callback in action_column
             action_column={"id": "action", "text": "Action",
-                           "callback": self.on_edit_click}
+                           "callback": self.on_edit_click},
+            # Scroll through every record while only the visible rows live in the table
+            virtual=True
         )
 
         # Initial population
         self.populate_table()
 
-    def format_client_data(self, clients=None):
-        """Format client data for table"""
-        clients_to_format = clients if clients is not None else self.clients
-        return [{
+    def format_client(self, client):
+        """Format a client for the table"""
+        return {
             "id": client["id"],
             "name": client["name"],
             "city": client["city"],
@@ -113,46 +122,55 @@ class ClientsPage(BasePage):
             "email": client["email"],
             "created_at": DateFormatter.to_display_format(client["created_at"]),
             "action": "Edit"
-        } for client in clients_to_format]
+        }
 
     def populate_table(self, filtered_data=None):
         """Populate table with client data"""
-        formatted_data = self.format_client_data(filtered_data)
-        self.table.populate(formatted_data)
+        if filtered_data is None and self.facet_filter and self.facet_filter.selections:
+            # Only the clients of the chosen facets, read from their bitmaps
+            filtered_data = self.facet_index.select("client", self.facet_filter.selections)
+            if not filtered_data:
+                self.table.show_message("No results found", "name")
+                return
+        if filtered_data is None:
+            # Scroll through every client in the record manager's cached sorted orders
+            self.table.set_row_source(functools.partial(self.record_manager.window, "client"))
+            return
 
-    def handle_search(self, search_text):
-        """Handle search callback from SearchFrame"""
-        search_text = search_text.lower()
+        self.table.populate(filtered_data)
 
+    def find_clients(self, search_text, cancelled):
+        """Find the clients matching the search text; runs on the search worker thread"""
         if not search_text:
+            return None
+
+        # Filter clients based on search text, sorted for the table before it shows them
+        matched_clients = self.search_service.search("client", search_text, ["name"], cancelled)
+        selections = self.facet_filter.selections if self.facet_filter else {}
+        if selections:
+            matched_clients = [record for record in matched_clients if FacetIndex.matches(record, selections)]
+        return matched_clients, self.table.prepare_orderings(matched_clients)
+
+    def handle_facets(self, selections):
+        """Show the clients of the chosen facets, within the search results if searching"""
+        self.search_frame.start_search(force=True)
+
+    def handle_search(self, search_text, results):
+        """Handle the results of the latest search from SearchFrame"""
+        if results is None:
             # If search is empty, show all clients
             self.populate_table()
             return
 
-        # Filter and display matching clients
-        matched_clients = [
-            client for client in self.clients
-            if search_text in client["name"].lower()
-        ]
-
+        matched_clients, orderings = results
         if matched_clients:
-            self.populate_table(matched_clients)
+            self.table.populate(matched_clients, orderings)
         else:
             # Show no results found
-            self.table.populate([{
-                "id": "",
-                "name": "No results found",
-                "city": "",
-                "country": "",
-                "phone": "",
-                "email": "",
-                "created_at": "",
-                "action": ""
-            }])
+            self.table.show_message("No results found", "name")
 
     def refresh_clients(self):
         """Refresh the clients table"""
-        self.fetch_clients()
         self.populate_table()
 
     def on_new_client_click(self):
@@ -168,38 +186,23 @@ class ClientsPage(BasePage):
 
     def on_row_double_click(self, event):
         """Handle double-click on any row"""
-        item = self.table.tree.identify('item', event.x, event.y)
-        if item:
-            values = self.table.tree.item(item)['values']
-            if values:
-                client = next(
-                    (f for f in self.clients if f["id"] == values[0]),
-                    None
-                )
-                if client:
-                    self.navigation_callback({
-                        "route": "edit_client",
-                        "data": client
-                    })
+        self.open_client(self.table.tree.identify('item', event.x, event.y))
 
     def handle_click(self, event):
         """Handle click events on the table"""
         region = self.table.tree.identify("region", event.x, event.y)
         if region == "cell":
             column = self.table.tree.identify_column(event.x)
-            item = self.table.tree.identify_row(event.y)
 
             # Check if click is in action column (last column)
             if column == f"#{len(self.table.columns) + 1}":
-                values = self.table.tree.item(item)['values']
-                if values:
-                    client = next(
-                        (f for f in self.clients if str(
-                            f["id"]) == str(values[0])),
-                        None
-                    )
-                    if client:
-                        self.navigation_callback({
-                            "route": "edit_client",
-                            "data": client
-                        })
+                self.open_client(self.table.tree.identify_row(event.y))
+
+    def open_client(self, item):
+        """Open the edit page of the client in a row; the row's item ID is its record ID"""
+        client = self.record_manager.get_record("client", item) if item else None
+        if client:
+            self.navigation_callback({
+                "route": "edit_client",
+                "data": client
+            })
@@ -7,6 +7,7 @@ from src.gui.components.headers import FormHeader
 from src.gui.components.buttons import FormButtons, DeleteButton
 from src.gui.components.form import FormComponents
 from src.data.record_manager import RecordManager
+from src.data.schema import ValidationError
 
 
 class EditClientPage(BasePage):
@@ -189,7 +190,7 @@ class EditClientPage(BasePage):
             "Country",
             required=True,
             field_type="option",
-            values=SelectCountry.COUNTRIES,
+            values=SelectCountry.get_countries(self.record_manager),
         )
         self.country.set("Please Select")  # Set default text
         self.country.set(self.client_data["country"])
@@ -244,9 +245,8 @@ class EditClientPage(BasePage):
             messagebox.showerror("Required Fields", error_message)
             return
         
-        new_client = {
-            "id": self.client_data["id"],
-            "type": "Client",
+        # Only the fields that differ from the stored client are written
+        changes = {
             "name": self.client.get(),
             "phone": self.phone.get(),
             "email": self.email.get(),
@@ -256,11 +256,14 @@ class EditClientPage(BasePage):
             "city": self.city.get(),
             "state": self.state.get(),
             "zip_code": self.zip_code.get(),
-            "country": self.country.get(),
-            "created_at": self.client_data["created_at"]
+            "country": self.country.get()
         }
 
-        self.record_manager.update_record("client", new_client["id"], new_client)
+        try:
+            self.record_manager.patch_record("client", self.client_data["id"], changes)
+        except ValidationError as e:
+            messagebox.showerror("Invalid Client", str(e))
+            return
 
         self.navigation_callback("clients")
         
@@ -7,6 +7,7 @@ from src.gui.components.buttons import FormButtons
 from src.gui.components.form import FormComponents
 from src.gui.components.utility import DateFormatter
 from src.data.record_manager import RecordManager
+from src.data.schema import ValidationError, is_valid_date
 
 
 class NewFlightForm(BasePage):
@@ -62,8 +63,8 @@ class NewFlightForm(BasePage):
             from_frame,
             "From",
             required=True,
-            field_type="text",
-            placeholder="Departure"
+            field_type="combo",
+            values=self.get_cities()
         )
 
         # To (End City)
@@ -73,8 +74,8 @@ class NewFlightForm(BasePage):
             to_frame,
             "To",
             required=True,
-            field_type="text",
-            placeholder="Destination"
+            field_type="combo",
+            values=self.get_cities()
         )
 
         # Dates Frame
@@ -111,15 +112,16 @@ class NewFlightForm(BasePage):
         self.action_buttons.pack(fill="x", pady=(10, 0))
 
     def get_clients(self) -> list[str]:
-        """Get list of clients from the record manager"""
-        clients = self.record_manager.records["client"]
-        return ["Please Select"] + [client["name"] for client in clients]
+        """Get the sorted client names from the record manager's catalog"""
+        return ["Please Select"] + list(self.record_manager.get_catalog("client_names"))
 
     def get_airlines(self) -> list[str]:
-        """Get list of airlines from the record manager"""
-        airlines = self.record_manager.records["airline"]
-        return ["Please Select"] + [airline["company_name"] for airline
-                                    in airlines]
+        """Get the sorted airline names from the record manager's catalog"""
+        return ["Please Select"] + list(self.record_manager.get_catalog("airline_names"))
+
+    def get_cities(self) -> list[str]:
+        """Get the sorted cities flights already use, offered while typing a city"""
+        return list(self.record_manager.get_catalog("flight_cities"))
 
     def create_field(self, parent, label, required=False):
         """Create form field label"""
@@ -155,15 +157,7 @@ class NewFlightForm(BasePage):
 
     def validate_date_format(self, date_str):
         """Validate if date string matches DD/MM/YYYY format"""
-        try:
-            if date_str and date_str.count('/') == 2:
-                day, month, year = map(int, date_str.split('/'))
-                return (1 <= day <= 31 and
-                        1 <= month <= 12 and
-                        1000 <= year <= 9999)
-        except ValueError:
-            return False
-        return False
+        return is_valid_date(date_str)
 
     def on_cancel(self):
         """Handle cancel button click"""
@@ -203,5 +197,10 @@ class NewFlightForm(BasePage):
             "return_date": return_date
         }
 
-        self.record_manager.add_record("flight", new_flight)
+        try:
+            self.record_manager.add_record("flight", new_flight)
+        except ValidationError as e:
+            messagebox.showerror("Invalid Flight", str(e))
+            return
+
         self.navigation_callback("flights")
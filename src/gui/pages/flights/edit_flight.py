@@ -7,6 +7,7 @@ from src.gui.components.buttons import FormButtons, DeleteButton
 from src.gui.components.form import FormComponents
 from src.gui.components.utility import DateFormatter
 from src.data.record_manager import RecordManager
+from src.data.schema import ValidationError, is_valid_date
 
 
 class EditFlightPage(BasePage):
@@ -83,11 +84,11 @@ class EditFlightPage(BasePage):
             from_frame,
             "From",
             required=True,
-            field_type="text",
-            placeholder="Departure"
+            field_type="combo",
+            values=self.get_cities()
         )
         self.from_city.pack(fill="x")
-        self.from_city.insert(0, self.flight_data["departure"])
+        self.from_city.set(self.flight_data["departure"])
 
         # To City (End City)
         to_frame = ctk.CTkFrame(cities_frame, fg_color="transparent")
@@ -96,11 +97,11 @@ class EditFlightPage(BasePage):
             to_frame,
             "To",
             required=True,
-            field_type="text",
-            placeholder="Destination"
+            field_type="combo",
+            values=self.get_cities()
         )
         self.to_city.pack(fill="x")
-        self.to_city.insert(0, self.flight_data["destination"])
+        self.to_city.set(self.flight_data["destination"])
 
         # Dates Frame
         dates_frame = ctk.CTkFrame(self.form_container, fg_color="transparent")
@@ -140,15 +141,16 @@ class EditFlightPage(BasePage):
         self.action_buttons.pack(fill="x", pady=(20, 0))
 
     def get_clients(self) -> list[str]:
-        """Get list of clients from the record manager"""
-        clients = self.record_manager.records["client"]
-        return [client["name"] for client in clients]
+        """Get the sorted client names from the record manager's catalog"""
+        return list(self.record_manager.get_catalog("client_names"))
 
     def get_airlines(self) -> list[str]:
-        """Get list of airlines from the record manager"""
-        airlines = self.record_manager.records["airline"]
-        return [airline["company_name"] for airline
-                in airlines]
+        """Get the sorted airline names from the record manager's catalog"""
+        return list(self.record_manager.get_catalog("airline_names"))
+
+    def get_cities(self) -> list[str]:
+        """Get the sorted cities flights already use, offered while typing a city"""
+        return list(self.record_manager.get_catalog("flight_cities"))
 
     def create_field(self, parent, label, required=False):
         """Create form field label"""
@@ -185,15 +187,7 @@ class EditFlightPage(BasePage):
 
     def validate_date_format(self, date_str):
         """Validate if date string matches DD/MM/YYYY format"""
-        try:
-            if date_str and date_str.count('/') == 2:
-                day, month, year = map(int, date_str.split('/'))
-                return (1 <= day <= 31 and
-                        1 <= month <= 12 and
-                        1000 <= year <= 9999)
-        except ValueError:
-            return False
-        return False
+        return is_valid_date(date_str)
 
     def on_cancel(self):
         """Handle cancel button click"""
@@ -224,20 +218,22 @@ class EditFlightPage(BasePage):
             )
             return
 
-        new_flight = {
-            "id": self.flight_data["id"],
-            "type": "Flight",
+        # Only the fields that differ from the stored flight are written
+        changes = {
             "client": self.client.get(),
             "airline": self.airline.get(),
             "departure": self.from_city.get(),
             "destination": self.to_city.get(),
             "depart_date": self.depart_date.get(),
-            "return_date": self.return_date.get(),
-            "created_at": self.flight_data["created_at"]
+            "return_date": self.return_date.get()
         }
 
-        self.record_manager.update_record(
-            "flight", new_flight["id"], new_flight)
+        try:
+            self.record_manager.patch_record(
+                "flight", self.flight_data["id"], changes)
+        except ValidationError as e:
+            messagebox.showerror("Invalid Flight", str(e))
+            return
 
         self.navigation_callback("flights")
 
@@ -2,23 +2,32 @@
 Flights Page Class
 Contains the Flights Records Table as the main content.
 """
+import functools
 from src.gui.pages.base import BasePage
 from src.gui.components.headers import PageHeader
 from src.gui.components.search import Search
+from src.gui.components.facets import FacetFilter
 from src.gui.components.buttons import SingleButton
 from src.gui.components.table import DataTable
 from src.gui.components.utility import DateFormatter
 from src.data.record_manager import RecordManager
+from src.data.search import SearchService
+from src.data.facets import FacetIndex
 
 class FlightsPage(BasePage):
     """ Flights Page Class """
     # Intitiate Base Page
-    def __init__(self, parent, navigation_callback, record_manager: RecordManager):
+    def __init__(self, parent, navigation_callback, record_manager: RecordManager,
+                 search_service: SearchService = None, facet_index: FacetIndex = None):
         super().__init__(parent, navigation_callback)
         self.record_manager = record_manager
+        # Shared between pages so each search can narrow the previous one
+        self.search_service = search_service or SearchService(record_manager)
+        # Bitmaps of the facet fields, counting and filtering without scanning records
+        self.facet_index = facet_index or FacetIndex(record_manager)
+        self.facet_filter = None
 
         # Initialize attributes
-        self.flights = [] #Flights List
         self.table = None #Data Table
 
         # Create Header
@@ -37,19 +46,8 @@ class FlightsPage(BasePage):
         new_flight_btn.pack(side="right", pady=0)
 
         # Initialize content
-        self.fetch_flights()
         self.setup_content()
 
-    def fetch_flights(self):
-        """
-        Fetch flights data
-        """
-        try:
-            self.flights = self.record_manager.records["flight"]
-        except Exception as e:
-            print(f"Error fetching flights: {e}")
-            self.flights = []
-
     def setup_content(self):
         """Setup the main content of the flights page"""
         try:
@@ -57,10 +55,21 @@ class FlightsPage(BasePage):
             self.search_frame = Search(
                 self.content_frame,
                 search_placeholder="Search by Client Name",
-                search_callback=self.handle_search
+                search_callback=self.handle_search,
+                search_function=self.find_flights
             )
             self.search_frame.pack(fill="x", padx=20, pady=(20, 5))
 
+            # Add Facet Dropdowns
+            self.facet_filter = FacetFilter(
+                self.content_frame,
+                self.facet_index,
+                "flight",
+                [("airline", "Airlines"), ("destination", "Destinations")],
+                on_change=self.handle_facets
+            )
+            self.facet_filter.pack(fill="x", padx=20, pady=(0, 5))
+
             # Create and populate table
             self.create_flight_table()
 
@@ -85,21 +94,22 @@ class FlightsPage(BasePage):
         self.table = DataTable(
             parent=self.content_frame,
             columns=columns,
-            data=self.format_flight_data(),  # Initial data
             on_row_click=self.handle_click,
             on_double_click=self.on_row_double_click,
             sort_columns=["id", "client", "airline", "departure", "destination", "depart_date", "return_date", "created_at"],
             # Pass callback in action_column
-            action_column={"id": "action", "text": "Action", "callback": self.on_edit_click}
+            action_column={"id": "action", "text": "Action", "callback": self.on_edit_click},
+            format_row=self.format_flight,
+            # Scroll through every record while only the visible rows live in the table
+            virtual=True
         )
 
         # Initial population
         self.populate_table()
 
-    def format_flight_data(self, flights=None):
-        """Format flight data for table"""
-        flights_to_format = flights if flights is not None else self.flights
-        return [{
+    def format_flight(self, flight):
+        """Format a flight for the table"""
+        return {
             "id": flight["id"],
             "client": flight["client"],
             "airline": flight["airline"],
@@ -109,47 +119,55 @@ class FlightsPage(BasePage):
             "return_date": DateFormatter.to_display_format(flight["return_date"]),
             "created_at": DateFormatter.to_display_format(flight["created_at"]),
             "action": "Edit"
-        } for flight in flights_to_format]
+        }
 
     def populate_table(self, filtered_data=None):
         """Populate table with flight data"""
-        formatted_data = self.format_flight_data(filtered_data)
-        self.table.populate(formatted_data)
+        if filtered_data is None and self.facet_filter and self.facet_filter.selections:
+            # Only the flights of the chosen facets, read from their bitmaps
+            filtered_data = self.facet_index.select("flight", self.facet_filter.selections)
+            if not filtered_data:
+                self.table.show_message("No results found", "client")
+                return
+        if filtered_data is None:
+            # Scroll through every flight in the record manager's cached sorted orders
+            self.table.set_row_source(functools.partial(self.record_manager.window, "flight"))
+            return
 
-    def handle_search(self, search_text):
-        """Handle search callback from SearchFrame"""
-        search_text = search_text.lower()
+        self.table.populate(filtered_data)
 
+    def find_flights(self, search_text, cancelled):
+        """Find the flights matching the search text; runs on the search worker thread"""
         if not search_text:
+            return None
+
+        # Filter flights based on search text, sorted for the table before it shows them
+        matched_flights = self.search_service.search("flight", search_text, ["client"], cancelled)
+        selections = self.facet_filter.selections if self.facet_filter else {}
+        if selections:
+            matched_flights = [record for record in matched_flights if FacetIndex.matches(record, selections)]
+        return matched_flights, self.table.prepare_orderings(matched_flights)
+
+    def handle_facets(self, selections):
+        """Show the flights of the chosen facets, within the search results if searching"""
+        self.search_frame.start_search(force=True)
+
+    def handle_search(self, search_text, results):
+        """Handle the results of the latest search from SearchFrame"""
+        if results is None:
             # If search is empty, show all flights
             self.populate_table()
             return
 
-        # Filter flights based on search text
-        matched_flights = [
-            flight for flight in self.flights
-            if search_text in flight["client"].lower()
-        ]
-
+        matched_flights, orderings = results
         if matched_flights:
-            self.populate_table(matched_flights)
+            self.table.populate(matched_flights, orderings)
         else:
             # Show no results found
-            self.table.populate([{
-                "id": "",
-                "client": "No results found",
-                "airline": "",
-                "departure": "",
-                "destination": "",
-                "depart_date": "",
-                "return_date": "",
-                "created_at": "",
-                "action": ""
-            }])
+            self.table.show_message("No results found", "client")
 
     def refresh_flights(self):
         """Refresh the flights table"""
-        self.fetch_flights()
         self.populate_table()
 
     def on_new_flight_click(self):
@@ -165,39 +183,23 @@ class FlightsPage(BasePage):
 
     def on_row_double_click(self, event):
         """Handle double-click on any row"""
-        item = self.table.tree.identify('item', event.x, event.y)
-        if item:
-            values = self.table.tree.item(item)['values']
-            if values:
-                flight = next(
-                    (f for f in self.flights if str(
-                        f["id"]) == str(values[0])),
-                    None
-                )
-                if flight:
-                    self.navigation_callback({
-                        "route": "edit_flight",
-                        "data": flight
-                    })
+        self.open_flight(self.table.tree.identify('item', event.x, event.y))
 
     def handle_click(self, event):
         """Handle click events on the table"""
         region = self.table.tree.identify("region", event.x, event.y)
         if region == "cell":
             column = self.table.tree.identify_column(event.x)
-            item = self.table.tree.identify_row(event.y)
 
             # Check if click is in action column (last column)
             if column == f"#{len(self.table.columns) + 1}":
-                values = self.table.tree.item(item)['values']
-                if values:
-                    flight = next(
-                        (f for f in self.flights if str(
-                            f["id"]) == str(values[0])),
-                        None
-                    )
-                    if flight:
-                        self.navigation_callback({
-                            "route": "edit_flight",
-                            "data": flight
-                        })
+                self.open_flight(self.table.tree.identify_row(event.y))
+
+    def open_flight(self, item):
+        """Open the edit page of the flight in a row; the row's item ID is its record ID"""
+        flight = self.record_manager.get_record("flight", item) if item else None
+        if flight:
+            self.navigation_callback({
+                "route": "edit_flight",
+                "data": flight
+            })
@@ -0,0 +1,4 @@
+""" Package for the Global Search """
+from .search import GlobalSearchPage
+
+__all__ = ['GlobalSearchPage']
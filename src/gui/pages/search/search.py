@@ -0,0 +1,179 @@
+"""
+Global Search Page Class
+
+Searches clients, flights and airlines at once, showing the hits grouped by record type.
+"""
+from tkinter import ttk
+import customtkinter as ctk
+from src.gui.pages.base import BasePage
+from src.gui.components.headers import PageHeader
+from src.gui.components.search import Search
+from src.gui.components.table import ROW_HEIGHT
+from src.gui.components.utility import DateFormatter
+from src.data.global_search import GlobalSearchIndex
+
+
+class GlobalSearchPage(BasePage):
+    """ Global Search Page Class """
+    # Hits shown per record type
+    RESULT_LIMIT = 20
+
+    # Group title and edit page of each record type, in the order they are shown
+    GROUPS = {
+        "client": ("Clients", "edit_client"),
+        "flight": ("Flights", "edit_flight"),
+        "airline": ("Airlines", "edit_airline"),
+    }
+
+    # Names of the fields hits can match
+    FIELD_NAMES = {
+        "id": "ID", "name": "Name", "email": "Email", "phone": "Phone", "city": "City",
+        "country": "Country", "company_name": "Company Name", "client": "Client",
+        "airline": "Airline", "departure": "Departure", "destination": "Destination"
+    }
+
+    def __init__(self, parent, navigation_callback, record_manager, search_index: GlobalSearchIndex = None):
+        super().__init__(parent, navigation_callback)
+        self.record_manager = record_manager
+        # Shared index of every record type, kept up to date by the record manager
+        self.search_index = search_index or GlobalSearchIndex(record_manager)
+
+        # Records shown in the results, by tree item ID
+        self.hits = {}
+
+        # Create Header
+        self.header = PageHeader(
+            self.content_frame,
+            title="Search",
+            description="Find clients, flights and airlines by name, email, phone, city or destination"
+        )
+
+        self.setup_content()
+
+    def setup_content(self):
+        """Setup the search bar and the results"""
+        try:
+            # Add Search Bar
+            self.search_frame = Search(
+                self.content_frame,
+                search_placeholder="Search all records",
+                search_callback=self.handle_search,
+                search_function=self.find_records
+            )
+            self.search_frame.pack(fill="x", padx=20, pady=(20, 5))
+            self.search_frame.search_entry.focus_set()
+            # Enter in the search bar opens the best hit
+            self.search_frame.search_entry.bind('<Return>', lambda event: self.open_hit(self.tree.focus()))
+
+            self.create_results()
+
+        except Exception as e:
+            print(f"Error setting up content: {e}")
+
+    def create_results(self):
+        """Create the tree showing hits grouped by record type"""
+        results_frame = ctk.CTkFrame(
+            self.content_frame,
+            fg_color="#ffffff",
+            corner_radius=10
+        )
+        results_frame.pack(fill="both", expand=True, padx=20, pady=(0, 20))
+
+        style = ttk.Style()
+        style.configure("Treeview", background="white", rowheight=ROW_HEIGHT, borderwidth=0)
+
+        self.tree = ttk.Treeview(
+            results_frame,
+            columns=("details", "match"),
+            show="tree headings",
+            selectmode="browse"
+        )
+        self.tree.heading("#0", text="Record")
+        self.tree.column("#0", width=250)
+        self.tree.heading("details", text="Details")
+        self.tree.column("details", width=400)
+        self.tree.heading("match", text="Matched On")
+        self.tree.column("match", width=120, stretch=False)
+        self.tree.pack(fill="both", expand=True)
+
+        self.tree.bind('<Double-1>', self.on_row_double_click)
+        self.tree.bind('<Return>', lambda event: self.open_hit(self.tree.focus()))
+
+        self.message_label = ctk.CTkLabel(
+            results_frame,
+            text="Type to search every record",
+            text_color="#444444"
+        )
+        self.message_label.place(relx=0.5, rely=0.5, anchor="center")
+
+    def find_records(self, search_text, cancelled):
+        """Search every record type; runs on the search worker thread"""
+        if not search_text.strip():
+            return None
+        return self.search_index.search(search_text, limit=self.RESULT_LIMIT)
+
+    def handle_search(self, search_text, results):
+        """Show the hits of the latest search, grouped by record type"""
+        self.tree.delete(*self.tree.get_children())
+        self.hits = {}
+
+        if not results:
+            self.message_label.configure(
+                text="Type to search every record" if results is None else "No results found")
+            self.message_label.place(relx=0.5, rely=0.5, anchor="center")
+            return
+        self.message_label.place_forget()
+
+        for record_type, (title, _) in self.GROUPS.items():
+            hits = results.get(record_type)
+            if not hits:
+                continue
+            group = self.tree.insert("", "end", iid=f"group:{record_type}", text=f"{title} ({len(hits)})", open=True)
+            for hit in hits:
+                item = self.tree.insert(
+                    group,
+                    "end",
+                    text=self.describe(record_type, hit.record),
+                    values=(self.details(record_type, hit.record), self.FIELD_NAMES.get(hit.field, hit.field))
+                )
+                self.hits[item] = hit
+
+        # Select the best hit, so Enter opens it
+        first_hit = next(iter(self.hits), None)
+        if first_hit:
+            self.tree.selection_set(first_hit)
+            self.tree.focus(first_hit)
+
+    @staticmethod
+    def describe(record_type, record):
+        """Get the title of a hit"""
+        if record_type == "client":
+            return f"{record.get('name', '')}  ·  {record.get('id', '')}"
+        if record_type == "airline":
+            return f"{record.get('company_name', '')}  ·  {record.get('id', '')}"
+        return f"{record.get('departure', '')} → {record.get('destination', '')}  ·  {record.get('id', '')}"
+
+    @staticmethod
+    def details(record_type, record):
+        """Get the details shown for a hit"""
+        if record_type == "client":
+            fields = [record.get("email"), record.get("phone"), record.get("city"), record.get("country")]
+        elif record_type == "airline":
+            fields = [record.get("country")]
+        else:
+            fields = [record.get("client"), record.get("airline"),
+                      DateFormatter.to_display_format(record.get("depart_date", ""))]
+        return "  ·  ".join(str(field) for field in fields if field)
+
+    def on_row_double_click(self, event):
+        """Handle double-click on a hit"""
+        self.open_hit(self.tree.identify_row(event.y))
+
+    def open_hit(self, item):
+        """Open the edit page of a hit"""
+        hit = self.hits.get(item)
+        if hit:
+            self.navigation_callback({
+                "route": self.GROUPS[hit.record_type][1],
+                "data": hit.record
+            })
@@ -18,8 +18,11 @@ Created Date: 16 March 2025
 """
 import sys
 import os
+import queue
+import threading
 from os.path import dirname, abspath, join
 import tkinter as tk
+from tkinter import filedialog, messagebox
 import customtkinter as ctk
 from src.gui.pages.flights import FlightsPage
 from src.gui.pages.flights import NewFlightForm
@@ -30,8 +33,15 @@ from src.gui.pages.clients.edit_clients import EditClientPage
 from src.gui.pages.airlines import AirlinesPage
 from src.gui.pages.airlines import NewAirlineForm
 from src.gui.pages.airlines.edit_airlines import EditAirlinePage
+from src.gui.pages.search import GlobalSearchPage
 from src.gui.components.sidebar import Sidebar
+from src.gui.components.progress import ProgressDialog
 from src.data.record_manager import RecordManager
+from src.data.remote import RemoteRecordManager
+from src.data.importer import import_records
+from src.data.search import SearchService
+from src.data.global_search import GlobalSearchIndex
+from src.data.facets import FacetIndex
 
 # Add the parent directory to the system path
 sys.path.append(abspath(join(dirname(__file__), '..')))
@@ -43,7 +53,13 @@ class RecordMgmtSystem:
     This class handles the creation and management of the main GUI components
     including the sidebar, main content area, and data displays.
     """
-    def __init__(self, root):
+    # Page showing each record type
+    RECORD_PAGES = {"flight": "flights", "client": "clients", "airline": "airlines"}
+
+    # How often background task progress is checked (milliseconds)
+    POLL_INTERVAL_MS = 100
+
+    def __init__(self, root, server_url=None):
         self.root = root
         self.root.title("Record Management System")
         self.root.geometry("1280x768")
@@ -55,7 +71,24 @@ class RecordMgmtSystem:
         ctk.set_appearance_mode("light")
         ctk.set_default_color_theme("blue")
         
-        self.record_manager = RecordManager(data_folder="src/record", file_format="json")
+        # Work against a shared record server when one is given, otherwise the local folder
+        if server_url:
+            self.record_manager = RemoteRecordManager(server_url)
+        else:
+            # Thread-safe, as exports read the records on a background thread
+            self.record_manager = RecordManager(data_folder="src/record", file_format="json", journal=True,
+                                                thread_safe=True)
+
+        # Searches of every page, each narrowing the previous results as the text grows,
+        # the index of every record type behind the global search, and the facet bitmaps
+        self.search_service = SearchService(self.record_manager)
+        self.global_search = GlobalSearchIndex(self.record_manager)
+        self.facet_index = FacetIndex(self.record_manager)
+        if hasattr(self.record_manager, "register_index"):
+            # All follow every change, so only deletions start a page search over
+            self.record_manager.register_index(self.search_service)
+            self.record_manager.register_index(self.global_search)
+            self.record_manager.register_index(self.facet_index)
         
         # Initialize GUI components
         self.create_menu()
@@ -108,6 +141,8 @@ class RecordMgmtSystem:
         Create and configure the application's main menu bar.
     
         Creates a menu bar with 'File' menu containing options for:
+        - Import: Bulk imports clients, flights or airlines from CSV or JSONL
+        - Export: Exports clients, flights or airlines to CSV or JSONL
         - Restart: Restarts the application
         - Exit: Closes the application
         """        
@@ -117,10 +152,113 @@ class RecordMgmtSystem:
         # File menu
         file_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="File", menu=file_menu)
+
+        # Import submenu
+        import_menu = tk.Menu(file_menu, tearoff=0)
+        file_menu.add_cascade(label="Import", menu=import_menu)
+        import_menu.add_command(label="Flights...", command=lambda: self.import_file("flight"))
+        import_menu.add_command(label="Clients...", command=lambda: self.import_file("client"))
+        import_menu.add_command(label="Airlines...", command=lambda: self.import_file("airline"))
+
+        # Export submenu
+        export_menu = tk.Menu(file_menu, tearoff=0)
+        file_menu.add_cascade(label="Export", menu=export_menu)
+        export_menu.add_command(label="Flights...", command=lambda: self.export_file("flight"))
+        export_menu.add_command(label="Clients...", command=lambda: self.export_file("client"))
+        export_menu.add_command(label="Airlines...", command=lambda: self.export_file("airline"))
+        file_menu.add_separator()
+
         file_menu.add_command(label="Restart", command=self.restart_app)
         file_menu.add_separator()
         file_menu.add_command(label="Exit", command=self.root.quit)
 
+    def import_file(self, record_type):
+        """
+        Bulk import records of a type from a CSV or JSONL file chosen by the user.
+
+        Shows a summary with the rows that were skipped and opens the matching page.
+        """
+        file_path = filedialog.askopenfilename(
+            title=f"Import {record_type.capitalize()} Records",
+            filetypes=[("CSV or JSON Lines", "*.csv *.jsonl"), ("All Files", "*.*")]
+        )
+        if not file_path:
+            return
+
+        try:
+            result = import_records(self.record_manager, record_type, file_path)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Import Failed", str(e))
+            return
+
+        message = f"Imported {result.imported} {record_type} records."
+        if result.errors:
+            skipped_rows = "\n".join(f"Row {row}: {error}" for row, error in result.errors[:10])
+            message += f"\n\n{result.failed} rows were skipped:\n{skipped_rows}"
+        messagebox.showinfo("Import Complete", message)
+
+        self.show_page(self.RECORD_PAGES[record_type])
+
+    def export_file(self, record_type):
+        """
+        Export records of a type to a CSV or JSONL file chosen by the user.
+
+        The export streams a snapshot of the records on a worker thread, and its progress
+        is passed back to the Tk event loop through a queue polled with after().
+        """
+        file_path = filedialog.asksaveasfilename(
+            title=f"Export {record_type.capitalize()} Records",
+            defaultextension=".csv",
+            filetypes=[("CSV", "*.csv"), ("JSON Lines", "*.jsonl")]
+        )
+        if not file_path:
+            return
+
+        records = self.record_manager.snapshot(record_type)
+        progress = ProgressDialog(
+            self.root,
+            title="Exporting",
+            message=f"Exporting {len(records)} {record_type} records..."
+        )
+        updates = queue.Queue()
+
+        def export_worker():
+            try:
+                count = self.record_manager.export_records(
+                    record_type,
+                    file_path,
+                    records=records,
+                    progress_callback=lambda done: updates.put(("progress", done))
+                )
+                updates.put(("done", count))
+            except Exception as e:
+                updates.put(("error", e))
+
+        threading.Thread(target=export_worker, daemon=True).start()
+        self.root.after(self.POLL_INTERVAL_MS, self.poll_export, updates, progress, len(records), file_path)
+
+    def poll_export(self, updates, progress, total, file_path):
+        """Apply progress updates from the export worker on the Tk thread"""
+        while True:
+            try:
+                status, value = updates.get_nowait()
+            except queue.Empty:
+                break
+
+            if status == "progress":
+                progress.update_progress(value, total)
+                continue
+
+            # Export finished or failed
+            progress.destroy()
+            if status == "done":
+                messagebox.showinfo("Export Complete", f"Exported {value} records to {file_path}.")
+            else:
+                messagebox.showerror("Export Failed", str(value))
+            return
+
+        self.root.after(self.POLL_INTERVAL_MS, self.poll_export, updates, progress, total, file_path)
+
     def restart_app(self):
         """
          Restart the application by re-executing the current process.
@@ -149,7 +287,8 @@ class RecordMgmtSystem:
         # Show new page
         if page_name == "flights":
             self.current_page = FlightsPage(
-                self.main_content, self.handle_navigation, self.record_manager)
+                self.main_content, self.handle_navigation, self.record_manager, self.search_service,
+                self.facet_index)
         elif page_name == "add_new_flight":
             self.current_page = NewFlightForm(
                 self.main_content, self.handle_navigation, self.record_manager)
@@ -158,7 +297,8 @@ class RecordMgmtSystem:
                 self.main_content, self.handle_navigation, self.record_manager, record_data)
         elif page_name == "clients":
             self.current_page = ClientsPage(
-                self.main_content, self.handle_navigation, self.record_manager)
+                self.main_content, self.handle_navigation, self.record_manager, self.search_service,
+                self.facet_index)
         elif page_name == "add_new_client":
             self.current_page = NewClientForm(
                 self.main_content, self.handle_navigation, self.record_manager)
@@ -167,13 +307,17 @@ class RecordMgmtSystem:
                 self.main_content, self.handle_navigation, self.record_manager, record_data)
         elif page_name == "airlines":
             self.current_page = AirlinesPage(
-                self.main_content, self.handle_navigation, self.record_manager)
+                self.main_content, self.handle_navigation, self.record_manager, self.search_service,
+                self.facet_index)
         elif page_name == "add_new_airline":
             self.current_page = NewAirlineForm(
                 self.main_content, self.handle_navigation, self.record_manager)
         elif page_name == "edit_airline":
             self.current_page = EditAirlinePage(
                 self.main_content, self.handle_navigation, self.record_manager, record_data)
+        elif page_name == "search":
+            self.current_page = GlobalSearchPage(
+                self.main_content, self.handle_navigation, self.record_manager, self.global_search)
 
 
         self.current_page.pack(fill="both", expand=True)
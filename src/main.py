@@ -1,4 +1,5 @@
 """Record Management System GUI Application"""
+import argparse
 import tkinter as tk
 import sys
 from pathlib import Path
@@ -11,8 +12,12 @@ from src.gui.record_gui import RecordMgmtSystem
 
 def main():
     """Create and start application"""
+    parser = argparse.ArgumentParser(description="Record Management System")
+    parser.add_argument("--server", help="URL of a record server (python -m src.server) to use instead of the local records")
+    args = parser.parse_args()
+
     root = tk.Tk()
-    app = RecordMgmtSystem(root)
+    app = RecordMgmtSystem(root, server_url=args.server)
     app.run()
 
 
@@ -0,0 +1,390 @@
+"""
+Record Server
+Headless HTTP/JSON server that shares one RecordManager between several desks.
+
+Built on the standard library `asyncio` streams. Writes are queued to a single writer task
+that applies them one at a time through an AsyncRecordManager, so saving never blocks the
+event loop. Reads run concurrently against snapshots of the shared records, with searches and
+filters scanning them on the executor, and record lists are streamed in chunks so large results
+are never encoded in one piece. Full record lists carry their snapshot version as an ETag, so
+clients holding that version are answered 304 Not Modified.
+
+Endpoints:
+    GET    /records/<type>?<field>=<value>   List records, optionally filtered by exact field values
+    POST   /records/<type>                   Add a record (object) or records (array)
+    GET    /records/<type>/<id>              Get one record
+    PUT    /records/<type>/<id>              Replace a record
+    PATCH  /records/<type>/<id>              Change some fields of a record
+    DELETE /records/<type>/<id>              Delete a record
+    GET    /search/<type>?q=<text>&fields=<field>,<field>   Case-insensitive text search
+    GET    /pages/<type>?order_by=<field>&limit=<n>&after=<cursor>&descending=1
+                                             Page of records after the JSON cursor of the previous page
+                                             (or from position `start=<n>` of the order); order_by
+                                             may also be JSON [[field, descending], ...] pairs
+    GET    /catalogs/<name>                  Sorted distinct values, e.g. client_names or countries
+
+Usage:
+    python -m src.server --folder src/record --format json --port 8080
+"""
+import argparse
+import asyncio
+import functools
+import json
+import uuid
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from urllib.parse import parse_qsl, unquote, urlsplit
+from src.data.async_record_manager import AsyncRecordManager
+from src.data.catalogs import CATALOGS
+from src.data.record_manager import RecordManager
+from src.data.remote import VERSION_HEADER
+from src.data.schema import ValidationError
+from src.data.search import search_records
+from src.data.snapshot import RecordSnapshot
+from src.data.storage import FILE_FORMATS
+
+STATUS_TEXT = {200: "OK", 201: "Created", 304: "Not Modified", 400: "Bad Request", 404: "Not Found",
+               405: "Method Not Allowed", 411: "Length Required", 413: "Payload Too Large",
+               422: "Unprocessable Entity", 500: "Internal Server Error"}
+
+# Largest request body accepted, in bytes
+MAX_BODY_SIZE = 32 * 1024 * 1024
+
+# Records encoded per chunk of a streamed response
+STREAM_CHUNK_RECORDS = 500
+
+
+class HTTPError(Exception):
+    """Error returned to the client with an HTTP status code."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class RecordServer:
+    """Serve the records of a RecordManager over HTTP."""
+
+    def __init__(self, record_manager: RecordManager, host: str = "127.0.0.1", port: int = 8080,
+                 max_body_size: int = MAX_BODY_SIZE):
+        self.record_manager = AsyncRecordManager(record_manager)
+        self.host = host
+        self.port = port
+        self.max_body_size = max_body_size
+        # Versions restart with the server, so ETags name the server run they belong to
+        self.instance = uuid.uuid4().hex[:12]
+        self.server: Optional[asyncio.AbstractServer] = None
+
+        self._writes: Optional[asyncio.Queue] = None
+        self._writer_task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """Start listening and start the writer task."""
+        self._writes = asyncio.Queue()
+        self._writer_task = asyncio.create_task(self._write_loop())
+        self.server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        # Report the real port when an ephemeral port (0) was requested
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self) -> None:
+        """Start the server and serve until cancelled."""
+        await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def stop(self) -> None:
+        """Stop accepting connections and finish the queued writes."""
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        if self._writer_task is not None:
+            await self._writes.join()
+            self._writer_task.cancel()
+
+    async def _write_loop(self) -> None:
+        """Apply queued writes one at a time."""
+        while True:
+            operation, future = await self._writes.get()
+            try:
+                result = await operation()
+                if not future.cancelled():
+                    future.set_result(result)
+            except Exception as e:
+                if not future.cancelled():
+                    future.set_exception(e)
+            finally:
+                self._writes.task_done()
+
+    async def write(self, method: Callable, *args: Any) -> Any:
+        """Queue an AsyncRecordManager mutation for the writer task and wait for its result."""
+        future = asyncio.get_running_loop().create_future()
+        await self._writes.put((functools.partial(method, *args), future))
+        return await future
+
+    def get_snapshot(self, record_type: str) -> RecordSnapshot:
+        """Get the current snapshot of a record type."""
+        if record_type not in RecordManager.RECORD_TYPES:
+            raise HTTPError(404, f"Record type '{record_type}' is not supported.")
+        return self.record_manager.snapshot(record_type)
+
+    def find_record(self, record_type: str, record_id: str) -> Optional[Dict[str, Any]]:
+        """Find a record by ID using the record manager's ID index."""
+        self.get_snapshot(record_type)
+        return self.record_manager.get_record(record_type, record_id)
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve the requests of one keep-alive connection."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                try:
+                    body = await self.read_body(reader, headers)
+                except HTTPError as e:
+                    # The end of the body is unknown, so the connection cannot be used again
+                    await self.send_json(writer, e.status, {"error": e.message})
+                    break
+
+                try:
+                    method, target, _ = request_line.decode('latin-1').split()
+                except ValueError:
+                    await self.send_json(writer, 400, {"error": "Malformed request line."})
+                    break
+
+                try:
+                    await self.dispatch(method.upper(), target, body, writer, headers)
+                except HTTPError as e:
+                    await self.send_json(writer, e.status, {"error": e.message})
+                except Exception as e:
+                    await self.send_json(writer, 500, {"error": str(e)})
+
+                if headers.get('connection', '').lower() == 'close':
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def read_body(self, reader: asyncio.StreamReader, headers: Dict[str, str]) -> bytes:
+        """Read a request body of the length given by its Content-Length header."""
+        if 'content-length' not in headers:
+            if 'transfer-encoding' in headers:
+                raise HTTPError(411, "Request bodies need a Content-Length header.")
+            return b''
+        try:
+            length = int(headers['content-length'])
+        except ValueError:
+            length = -1
+        if length < 0:
+            raise HTTPError(400, f"Invalid Content-Length '{headers['content-length']}'.")
+        if length > self.max_body_size:
+            raise HTTPError(413, f"Request body is larger than {self.max_body_size} bytes.")
+        return await reader.readexactly(length)
+
+    async def dispatch(self, method: str, target: str, body: bytes, writer: asyncio.StreamWriter,
+                       headers: Optional[Dict[str, str]] = None) -> None:
+        """Route a request to its handler."""
+        url = urlsplit(target)
+        parts = [unquote(part) for part in url.path.split('/') if part]
+        params = dict(parse_qsl(url.query))
+
+        if len(parts) == 2 and parts[0] == "records":
+            record_type = parts[1]
+            if method == "GET":
+                snapshot = self.get_snapshot(record_type)
+                if params:
+                    records = await self.scan(lambda: [
+                        record for record in snapshot
+                        if all(str(record.get(field)) == value for field, value in params.items())])
+                    await self.send_records(writer, records, snapshot.version)
+                    return
+                etag = self.etag(snapshot.version)
+                if (headers or {}).get('if-none-match') == etag:
+                    writer.write(self.response_head(304, {"ETag": etag, VERSION_HEADER: snapshot.version}))
+                    await writer.drain()
+                else:
+                    await self.send_records(writer, snapshot, snapshot.version, etag)
+            elif method == "POST":
+                await self.add(record_type, self.parse_body(body), writer)
+            else:
+                raise HTTPError(405, f"Method '{method}' is not allowed.")
+
+        elif len(parts) == 3 and parts[0] == "records":
+            await self.handle_record(method, parts[1], parts[2], body, writer)
+
+        elif len(parts) == 2 and parts[0] == "search" and method == "GET":
+            snapshot = self.get_snapshot(parts[1])
+            fields = params["fields"].split(',') if params.get("fields") else None
+            records = await self.scan(lambda: list(search_records(snapshot, params.get("q", ""), fields)))
+            await self.send_records(writer, records, snapshot.version)
+
+        elif len(parts) == 2 and parts[0] == "pages" and method == "GET":
+            await self.send_page(writer, parts[1], params)
+
+        elif len(parts) == 2 and parts[0] == "catalogs" and method == "GET":
+            if parts[1] not in CATALOGS:
+                raise HTTPError(404, f"Catalog '{parts[1]}' is not supported.")
+            await self.send_json(writer, 200, self.record_manager.get_catalog(parts[1]))
+
+        else:
+            raise HTTPError(404, f"No endpoint for '{url.path}'.")
+
+    async def scan(self, function: Callable[[], List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Run a scan over a snapshot on the executor, so other requests are served meanwhile."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.record_manager.executor, function)
+
+    async def send_page(self, writer: asyncio.StreamWriter, record_type: str, params: Dict[str, str]) -> None:
+        """Send a page of records with the cursor of the next page."""
+        self.get_snapshot(record_type)
+        try:
+            order_by, limit = params.get("order_by", "id"), int(params.get("limit", 100))
+            if order_by.startswith("["):
+                order_by = [(field, bool(descending)) for field, descending in json.loads(order_by)]
+            descending = bool(params.get("descending"))
+            if params.get("start"):
+                page = self.record_manager.window(record_type, order_by, int(params["start"]), limit, descending)
+            else:
+                after = json.loads(params["after"]) if params.get("after") else None
+                page = self.record_manager.page(record_type, order_by, after, limit, descending)
+        except (ValueError, TypeError) as e:
+            raise HTTPError(400, f"Invalid page request: {e}")
+        await self.send_json(writer, 200, {"records": page.records, "cursor": page.cursor, "total": page.total})
+
+    async def add(self, record_type: str, data: Any, writer: asyncio.StreamWriter) -> None:
+        """Add one record (object) or many records (array)."""
+        self.get_snapshot(record_type)
+        if isinstance(data, list):
+            await self.run_write(self.record_manager.add_records, record_type, data)
+            await self.send_json(writer, 201, data)
+        elif isinstance(data, dict):
+            await self.run_write(self.record_manager.add_record, record_type, data)
+            await self.send_json(writer, 201, data)
+        else:
+            raise HTTPError(400, "Expected a record object or an array of records.")
+
+    async def handle_record(self, method: str, record_type: str, record_id: str, body: bytes,
+                            writer: asyncio.StreamWriter) -> None:
+        """Handle the requests on a single record."""
+        record = self.find_record(record_type, record_id)
+        if record is None:
+            raise HTTPError(404, f"Record with ID '{record_id}' not found in '{record_type}' records.")
+
+        if method == "GET":
+            await self.send_json(writer, 200, record)
+        elif method == "PUT":
+            updated_record = self.parse_body(body)
+            if not isinstance(updated_record, dict):
+                raise HTTPError(400, "Expected a record object.")
+            if updated_record.setdefault('id', record['id']) != record['id']:
+                raise HTTPError(400, f"Record ID '{updated_record['id']}' does not match '{record['id']}'.")
+            await self.run_write(self.record_manager.update_record, record_type, record_id, updated_record)
+            await self.send_json(writer, 200, updated_record)
+        elif method == "PATCH":
+            changes = self.parse_body(body)
+            if not isinstance(changes, dict):
+                raise HTTPError(400, "Expected an object of changed fields.")
+            patched_record = await self.run_write(self.record_manager.patch_record, record_type, record_id, changes)
+            await self.send_json(writer, 200, patched_record)
+        elif method == "DELETE":
+            await self.run_write(self.record_manager.delete_record, record_type, record_id)
+            await self.send_json(writer, 200, record)
+        else:
+            raise HTTPError(405, f"Method '{method}' is not allowed.")
+
+    async def run_write(self, method: Callable, *args: Any) -> Any:
+        """Run a write, turning rejected records into HTTP errors."""
+        try:
+            return await self.write(method, *args)
+        except ValidationError as e:
+            raise HTTPError(422, e.message)
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+
+    @staticmethod
+    def parse_body(body: bytes) -> Any:
+        """Decode a JSON request body."""
+        try:
+            return json.loads(body or b'null')
+        except ValueError as e:
+            raise HTTPError(400, f"Invalid JSON body: {e}")
+
+    def etag(self, version: int) -> str:
+        """Get the ETag of the full record list of a snapshot version."""
+        return f'"{self.instance}-{version}"'
+
+    @staticmethod
+    def response_head(status: int, headers: Dict[str, Any]) -> bytes:
+        """Encode the status line and headers of a response."""
+        lines = [f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}"]
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+    async def send_json(self, writer: asyncio.StreamWriter, status: int, data: Any) -> None:
+        """Send a small JSON response in one piece."""
+        body = json.dumps(data).encode('utf-8')
+        writer.write(self.response_head(status, {"Content-Type": "application/json",
+                                                 "Content-Length": len(body)}) + body)
+        await writer.drain()
+
+    async def send_records(self, writer: asyncio.StreamWriter, records: Iterable[Dict[str, Any]],
+                           version: int, etag: Optional[str] = None) -> None:
+        """Stream records as a JSON array using chunked transfer encoding."""
+        headers = {"Content-Type": "application/json", "Transfer-Encoding": "chunked", VERSION_HEADER: version}
+        if etag is not None:
+            headers["ETag"] = etag
+        writer.write(self.response_head(200, headers))
+
+        def write_chunk(text: str) -> None:
+            data = text.encode('utf-8')
+            writer.write(f"{len(data):x}\r\n".encode('latin-1') + data + b'\r\n')
+
+        encode = json.JSONEncoder().encode
+        separator, batch = '[', []
+        for record in records:
+            batch.append(encode(record))
+            if len(batch) >= STREAM_CHUNK_RECORDS:
+                write_chunk(separator + ','.join(batch))
+                separator, batch = ',', []
+                # Let other requests run while the client reads this chunk
+                await writer.drain()
+                await asyncio.sleep(0)
+
+        if batch:
+            write_chunk(separator + ','.join(batch) + ']')
+        else:
+            write_chunk('[]' if separator == '[' else ']')
+        writer.write(b'0\r\n\r\n')
+        await writer.drain()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Serve records over HTTP.")
+    parser.add_argument("--folder", default="src/record", help="Folder holding the records")
+    parser.add_argument("--format", default="json", choices=FILE_FORMATS)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args(argv)
+
+    record_manager = RecordManager(data_folder=args.folder, file_format=args.format, journal=True)
+    server = RecordServer(record_manager, args.host, args.port)
+    print(f"Serving records from {args.folder} on http://{args.host}:{args.port}")
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+""" 
+Async Record Manager Tests
+"""
+import sys
+import os
+from os.path import dirname, abspath, join
+# Add the project root directory to Python path
+project_root = abspath(join(dirname(__file__), '..', '..'))
+sys.path.append(project_root)
+
+import unittest
+import asyncio
+import shutil
+import threading
+from unittest.mock import patch
+from src.data.async_record_manager import AsyncRecordManager
+from src.data.record_manager import RecordManager
+from src.data.schema import ValidationError
+
+
+class TestAsyncRecordManager(unittest.IsolatedAsyncioTestCase):
+    """Async Record Manager Test Cases"""
+
+    def setUp(self):
+        """Set up the test environment."""
+        self.test_folder = "test_async_data"
+        self.manager = AsyncRecordManager(data_folder=self.test_folder, file_format="jsonl")
+
+    def tearDown(self):
+        """Clean up test files."""
+        if os.path.exists(self.test_folder):
+            shutil.rmtree(self.test_folder)
+
+    def make_airline(self, name):
+        """Create a valid airline record."""
+        return {"company_name": name, "country": "Australia"}
+
+    async def test_concurrent_writers_are_serialized(self):
+        """Test that concurrent adds all get unique IDs and reach the disk."""
+        await asyncio.gather(*(self.manager.add_record("airline", self.make_airline(f"Airline {i}"))
+                               for i in range(20)))
+        ids = [airline["id"] for airline in self.manager.records["airline"]]
+        self.assertEqual(sorted(ids), [f"A{i:04d}" for i in range(1, 21)])
+
+        reloaded = AsyncRecordManager(data_folder=self.test_folder, file_format="jsonl")
+        await reloaded.load_records()
+        self.assertEqual(reloaded.records["airline"], self.manager.records["airline"])
+
+    async def test_saves_run_on_the_executor(self):
+        """Test that file writes leave the event loop thread while records change on it."""
+        sync_manager = self.manager.record_manager
+        save_records = sync_manager.save_records
+        save_threads = []
+
+        def save():
+            save_threads.append(threading.current_thread())
+            save_records()
+
+        with patch.object(sync_manager, 'save_records', side_effect=save):
+            await self.manager.add_record("airline", self.make_airline("Qantas Airways"))
+        self.assertEqual(len(save_threads), 1)
+        self.assertIsNot(save_threads[0], threading.current_thread())
+        # The ID index of the shared RecordManager was updated in place
+        self.assertEqual(self.manager.get_record("airline", "A0001")["company_name"], "Qantas Airways")
+
+    async def test_query_search_and_errors(self):
+        """Test reads against snapshots and rejected writes."""
+        await self.manager.add_records("airline", [self.make_airline(name) for name in ["Qantas", "Emirates"]])
+        self.assertEqual([a["id"] for a in await self.manager.query("airline", company_name="Emirates")], ["A0002"])
+        self.assertEqual(len(await self.manager.search("airline", "qan")), 1)
+
+        with self.assertRaises(ValidationError):
+            await self.manager.patch_record("airline", "A0001", {"company_name": ""})
+        patched = await self.manager.patch_record("airline", "A0001", {"country": "New Zealand"})
+        self.assertEqual(patched["country"], "New Zealand")
+
+        await self.manager.delete_record("airline", "A0002")
+        reloaded = RecordManager(data_folder=self.test_folder, file_format="jsonl")
+        self.assertEqual([a["country"] for a in reloaded.records["airline"]], ["New Zealand"])
+
+
+if __name__ == "__main__":
+    unittest.main()
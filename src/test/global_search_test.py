@@ -0,0 +1,139 @@
+"""
+Global Search Tests
+Tests for the token-prefix index searching every record type at once.
+"""
+import sys
+import os
+from os.path import dirname, abspath, join
+# Add the project root directory to Python path
+project_root = abspath(join(dirname(__file__), '..', '..'))
+sys.path.append(project_root)
+
+import unittest
+import shutil
+import random
+import time
+from src.data.global_search import GlobalSearchIndex, field_tokens
+from src.data.record_manager import RecordManager
+
+
+class TestGlobalSearchIndex(unittest.TestCase):
+    """Global Search Index Test Cases"""
+
+    def setUp(self):
+        """Set up a manager holding a few records of every type, with the index registered."""
+        self.test_folder = "test_global_search_data"
+        self.manager = RecordManager(data_folder=self.test_folder, file_format="jsonl", fsync="never", validate=False)
+        self.manager.add_records("client", [
+            {"name": "Leona Wong", "email": "leona@example.com", "phone": "+852 9123 4567",
+             "city": "Hong Kong", "country": "China"},
+            {"name": "Zoë London", "email": "zoe@example.com", "phone": "+44 7700 900123",
+             "city": "Manchester", "country": "United Kingdom"},
+            {"name": "Tommy Bowden", "email": "tommy@leonardo.org", "phone": "+44 7700 900456",
+             "city": "London", "country": "United Kingdom"},
+        ])
+        self.manager.add_records("airline", [
+            {"company_name": "Qantas", "country": "Australia"},
+            {"company_name": "British Airways", "country": "United Kingdom"},
+        ])
+        self.manager.add_records("flight", [
+            {"client": "Leona Wong", "airline": "Qantas", "departure": "Hong Kong", "destination": "London",
+             "depart_date": "01/05/2025", "return_date": "10/05/2025"},
+            {"client": "Tommy Bowden", "airline": "British Airways", "departure": "London", "destination": "Tokyo",
+             "depart_date": "02/06/2025", "return_date": "12/06/2025"},
+        ])
+        self.index = GlobalSearchIndex(self.manager)
+        self.manager.register_index(self.index)
+
+    def tearDown(self):
+        """Clean up test files."""
+        if os.path.exists(self.test_folder):
+            shutil.rmtree(self.test_folder)
+
+    def hit_ids(self, text, index=None):
+        """Search and return the IDs of the hits of each record type."""
+        return {record_type: [hit.record["id"] for hit in hits]
+                for record_type, hits in (index or self.index).search(text).items()}
+
+    def test_tokens(self):
+        """Test that values are found by their words, the whole value, and phone digits run together."""
+        self.assertEqual(field_tokens("Zoë London"), ["zoe", "london", "zoe london"])
+        self.assertEqual(field_tokens("+852 9123 4567"),
+                         ["852", "9123", "4567", "+852 9123 4567", "85291234567", "91234567"])
+        self.assertEqual(field_tokens(None), [])
+
+    def test_hits_are_grouped_and_ranked(self):
+        """Test that hits of every type are found by any searched field, best matches first."""
+        hits = self.index.search("london")
+        self.assertEqual(list(hits), ["client", "flight"])
+        # A name counts more than a city
+        self.assertEqual([hit.record["id"] for hit in hits["client"]], ["C0002", "C0003"])
+        self.assertEqual([hit.field for hit in hits["client"]], ["name", "city"])
+        # A destination counts more than a departure
+        self.assertEqual([hit.record["id"] for hit in hits["flight"]], ["F0001", "F0002"])
+
+        # Every word must match the start of a word; whole words rank first
+        self.assertEqual(self.hit_ids("leon"), {"client": ["C0001", "C0003"], "flight": ["F0001"]})
+        self.assertEqual(self.hit_ids("leona wong"), {"client": ["C0001"], "flight": ["F0001"]})
+        self.assertEqual(self.hit_ids("brit lond"), {"flight": ["F0002"]})
+
+    def test_fields_and_accents(self):
+        """Test searching by email, phone, ID and text without accents."""
+        self.assertEqual(self.hit_ids("tommy@leonardo.org"), {"client": ["C0003"]})
+        self.assertEqual(self.hit_ids("7700900"), {"client": ["C0002", "C0003"]})
+        self.assertEqual(self.hit_ids("+44 7700 900456"), {"client": ["C0003"]})
+        self.assertEqual(self.hit_ids("a0002"), {"airline": ["A0002"]})
+        self.assertEqual(self.hit_ids("ZOE"), {"client": ["C0002"]})
+        self.assertEqual(self.hit_ids("nowhere"), {})
+        self.assertEqual(self.hit_ids("  "), {})
+
+    def test_index_follows_changes(self):
+        """Test that adds, edits and deletions are reflected in the next search."""
+        self.manager.add_record("airline", {"company_name": "Cathay Pacific", "country": "Hong Kong"})
+        self.assertEqual(self.hit_ids("cathay"), {"airline": ["A0003"]})
+
+        self.manager.patch_record("client", "C0001", {"city": "Tokyo"})
+        self.assertEqual(self.hit_ids("tokyo"), {"client": ["C0001"], "flight": ["F0002"]})
+        self.assertEqual(self.hit_ids("hong"), {"airline": ["A0003"], "flight": ["F0001"]})
+        # Edits to other fields still give hits the current record
+        self.manager.patch_record("client", "C0001", {"address_line1": "1 Queen's Road"})
+        self.assertEqual(self.index.search("tokyo")["client"][0].record["address_line1"], "1 Queen's Road")
+
+        self.manager.delete_record("client", "C0001")
+        self.assertEqual(self.hit_ids("leona"), {"client": ["C0003"], "flight": ["F0001"]})
+
+    def test_unregistered_index_follows_versions(self):
+        """Test that an index without hooks builds itself again when the records change."""
+        index = GlobalSearchIndex(self.manager)
+        self.assertEqual(self.hit_ids("qantas", index), {"airline": ["A0001"], "flight": ["F0001"]})
+        self.manager.patch_record("airline", "A0001", {"company_name": "Jetstar"})
+        self.assertEqual(self.hit_ids("jetstar", index), {"airline": ["A0001"]})
+
+    def test_search_latency(self):
+        """Measure search latency over 100,000 records; prints the mean and slowest search."""
+        random.seed(1)
+        names = ["Leona", "Tommy", "Sude", "Zoë", "Alice", "Omar", "Priya", "Kenji"]
+        cities = ["London", "Hong Kong", "Tokyo", "Paris", "Dubai", "Sydney"]
+        self.manager.add_records("client", [
+            {"name": f"{random.choice(names)} {random.choice(names)}son", "email": f"client{i}@example.com",
+             "phone": f"+44 7700 {random.randint(100000, 999999)}", "city": random.choice(cities)}
+            for i in range(50000)])
+        self.manager.add_records("flight", [
+            {"client": f"{random.choice(names)} {random.choice(names)}son", "airline": "Qantas",
+             "departure": random.choice(cities), "destination": random.choice(cities)}
+            for i in range(50000)])
+
+        latencies = []
+        for text in ["l", "le", "leo", "leona", "leona tommyson", "tok", "client123", "7700 9", "zoe", "c00042"]:
+            start = time.perf_counter()
+            hits = self.index.search(text)
+            latencies.append((time.perf_counter() - start) * 1000)
+            self.assertLessEqual(max((len(type_hits) for type_hits in hits.values()), default=0), 10)
+
+        print(f"\nGlobal search over 100,000 records: {sum(latencies) / len(latencies):.1f} ms mean, "
+              f"{max(latencies):.1f} ms slowest")
+        self.assertEqual(self.hit_ids("client123@example.com"), {"client": ["C0127"]})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+""" 
+Bulk Import and Export Tests
+"""
+import sys
+import os
+from os.path import dirname, abspath, join
+# Add the project root directory to Python path
+project_root = abspath(join(dirname(__file__), '..', '..'))
+sys.path.append(project_root)
+
+import unittest
+import csv
+import json
+import shutil
+from src.data.record_manager import RecordManager
+from src.data.importer import import_records
+
+
+class TestImport(unittest.TestCase):
+    """Bulk Import Test Cases"""
+
+    def setUp(self):
+        """Set up an empty record manager and an import folder."""
+        self.test_folder = "test_import_data"
+        self.manager = RecordManager(data_folder=self.test_folder, file_format="json")
+
+    def tearDown(self):
+        """Clean up test files."""
+        if os.path.exists(self.test_folder):
+            shutil.rmtree(self.test_folder)
+
+    def write_file(self, name, content):
+        """Write an import file into the test folder."""
+        file_path = os.path.join(self.test_folder, name)
+        with open(file_path, "w", encoding="utf-8") as file:
+            file.write(content)
+        return file_path
+
+    def test_import_jsonl(self):
+        """Test importing airlines from JSONL with per-row errors."""
+        file_path = self.write_file("airlines.jsonl", "\n".join([
+            json.dumps({"id": "X1", "company_name": "Qantas Airways", "country": "Australia"}),
+            "{not json",
+            json.dumps({"company_name": "No Country"}),
+            json.dumps({"company_name": "British Airways", "country": "United Kingdom",
+                        "created_at": "2024-03-15T10:30:00.00"}),
+        ]))
+
+        result = import_records(self.manager, "airline", file_path)
+
+        self.assertEqual(result.imported, 2)
+        self.assertEqual([row for row, _ in result.errors], [2, 3])
+        airlines = self.manager.records["airline"]
+        self.assertEqual([a["id"] for a in airlines], ["A0001", "A0002"])
+        self.assertEqual(airlines[0]["type"], "Airline")
+        self.assertEqual(airlines[1]["created_at"], "2024-03-15T10:30:00.00")
+        self.assertEqual(self.manager.get_record("airline", "A0002")["company_name"], "British Airways")
+        # Indexes are updated for the whole batch at once
+        self.assertEqual(self.manager.get_catalog("countries"), ["Australia", "United Kingdom"])
+        self.assertEqual(self.manager.get_catalog("airline_names"), ["British Airways", "Qantas Airways"])
+
+    def test_import_csv(self):
+        """Test importing flights from CSV and persisting them."""
+        file_path = self.write_file("flights.csv", "\n".join([
+            "client,airline,departure,destination,depart_date,return_date",
+            "Leona Wong,Cathay Pacific Airways,London,Hong Kong,30/04/2025,",
+            "Tommy Bowden,,London,Paris,01/05/2025,",
+        ]))
+
+        result = import_records(self.manager, "flight", file_path)
+
+        self.assertEqual(result.imported, 1)
+        self.assertEqual(result.errors, [(3, "Missing required field 'airline'")])
+        new_manager = RecordManager(data_folder=self.test_folder, file_format="json")
+        self.assertEqual(new_manager.records["flight"][0]["destination"], "Hong Kong")
+
+
+class TestExport(unittest.TestCase):
+    """Export Test Cases"""
+
+    def setUp(self):
+        """Set up a record manager holding a few flights."""
+        self.test_folder = "test_export_data"
+        self.manager = RecordManager(data_folder=self.test_folder, file_format="json")
+        self.manager.add_records("flight", [
+            {"client": client, "airline": airline, "departure": "London", "destination": destination,
+             "depart_date": "30/04/2025", "return_date": ""}
+            for client, airline, destination in [
+                ("Leona Wong", "Cathay Pacific Airways", "Hong Kong"),
+                ("Tommy Bowden", "British Airways", "Paris"),
+                ("Sude Simsek", "British Airways", "Tokyo"),
+            ]
+        ])
+
+    def tearDown(self):
+        """Clean up test files."""
+        if os.path.exists(self.test_folder):
+            shutil.rmtree(self.test_folder)
+
+    def test_export_csv(self):
+        """Test exporting a record type to CSV in chunks with progress."""
+        file_path = os.path.join(self.test_folder, "flights.csv")
+        progress = []
+        count = self.manager.export_records("flight", file_path, progress_callback=progress.append)
+
+        with open(file_path, newline="") as file:
+            rows = list(csv.DictReader(file))
+        self.assertEqual(count, 3)
+        self.assertEqual(progress[-1], 3)
+        self.assertEqual([row["id"] for row in rows], ["F0001", "F0002", "F0003"])
+        self.assertEqual(rows[0]["return_date"], "")
+
+    def test_export_query_jsonl(self):
+        """Test exporting a filtered query result to JSONL."""
+        file_path = os.path.join(self.test_folder, "british.jsonl")
+        query = self.manager.query("flight", airline="British Airways")
+        count = self.manager.export_records("flight", file_path, records=query)
+
+        with open(file_path) as file:
+            destinations = [json.loads(line)["destination"] for line in file]
+        self.assertEqual(count, 2)
+        self.assertEqual(destinations, ["Paris", "Tokyo"])
+
+
+if __name__ == "__main__":
+    unittest.main()
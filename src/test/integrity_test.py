@@ -0,0 +1,85 @@
+""" 
+Integrity Verification Tests
+"""
+import sys
+import os
+from os.path import dirname, abspath, join
+# Add the project root directory to Python path
+project_root = abspath(join(dirname(__file__), '..', '..'))
+sys.path.append(project_root)
+
+import unittest
+import shutil
+from unittest.mock import patch
+from src.data import storage
+from src.data.record_manager import RecordManager
+from src.data.integrity import verify_file, main
+
+
+class TestIntegrity(unittest.TestCase):
+    """Checksum Verification and Salvage Test Cases"""
+
+    def setUp(self):
+        """Set up the test environment."""
+        self.test_folder = "test_integrity_data"
+        self.clients = [
+            {"name": f"Client {i}", "phone": "+44 7700 900123", "email": f"client{i}@example.com",
+             "address_line1": "42 Oxford Street", "city": "London", "country": "United Kingdom"}
+            for i in range(20)
+        ]
+
+    def tearDown(self):
+        """Clean up test files."""
+        if os.path.exists(self.test_folder):
+            shutil.rmtree(self.test_folder)
+
+    def make_manager(self, file_format):
+        """Create a manager holding the sample clients."""
+        manager = RecordManager(data_folder=self.test_folder, file_format=file_format)
+        manager.add_records("client", [dict(client) for client in self.clients])
+        return manager
+
+    def truncate(self, file_path, fraction):
+        """Cut a file off part of the way through, as a crash during a save would."""
+        with open(file_path, "r+b") as file:
+            file.truncate(int(os.path.getsize(file_path) * fraction))
+
+    def test_verify_clean_and_corrupt_file(self):
+        """Test that verification flags a record changed on disk."""
+        manager = self.make_manager("jsonl")
+        file_path = manager._get_file_path("client")
+        self.assertTrue(verify_file(file_path, "jsonl").ok)
+
+        with open(file_path, "r") as file:
+            text = file.read()
+        with open(file_path, "w") as file:
+            file.write(text.replace("Client 7", "Client X"))
+
+        result = verify_file(file_path, "jsonl")
+        self.assertFalse(result.ok)
+        self.assertEqual((result.valid, result.corrupt, result.missing), (19, 1, 0))
+
+    def test_salvage_truncated_files(self):
+        """Test that loading a truncated file keeps every complete record (every complete batch of a pickle)."""
+        for file_format in ["json", "jsonl", "pickle"]:
+            with self.subTest(file_format=file_format), patch.object(storage, "PICKLE_BATCH_SIZE", 5):
+                manager = self.make_manager(file_format)
+                self.truncate(manager._get_file_path("client"), 0.5)
+
+                records = RecordManager(data_folder=self.test_folder, file_format=file_format).records["client"]
+                self.assertGreater(len(records), 5)
+                self.assertEqual(records, manager.records["client"][:len(records)])
+                shutil.rmtree(self.test_folder)
+
+    def test_verify_command(self):
+        """Test the parallel verification command on intact and damaged files."""
+        manager = self.make_manager("json")
+        argv = ["--folder", self.test_folder, "--format", "json", "--workers", "3"]
+        self.assertEqual(main(argv), 0)
+
+        self.truncate(manager._get_file_path("client"), 0.9)
+        self.assertEqual(main(argv), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+""" 
+Format Migration Tests
+"""
+import sys
+import os
+from os.path import dirname, abspath, join
+# Add the project root directory to Python path
+project_root = abspath(join(dirname(__file__), '..', '..'))
+sys.path.append(project_root)
+
+import unittest
+import json
+import shutil
+from src.data.record_manager import RecordManager
+from src.data.migrate import migrate_records, main
+
+
+class TestMigration(unittest.TestCase):
+    """Format Migration Test Cases"""
+
+    def setUp(self):
+        """Set up a JSON source folder holding clients."""
+        self.test_folder = "test_migrate_data"
+        self.manager = RecordManager(data_folder=self.test_folder, file_format="json")
+        self.manager.add_records("client", [
+            {"name": f"Client {i}", "phone": "+44 7700 900123", "email": f"client{i}@example.com",
+             "address_line1": "42 Oxford Street", "city": "London", "country": "United Kingdom"}
+            for i in range(25)
+        ])
+
+    def tearDown(self):
+        """Clean up test files."""
+        if os.path.exists(self.test_folder):
+            shutil.rmtree(self.test_folder)
+
+    def test_migrate_between_backends(self):
+        """Test migrating json -> sharded gzip jsonl -> pickle keeps every record."""
+        source = RecordManager(data_folder=self.test_folder, file_format="json", auto_load=False)
+        sharded = RecordManager(data_folder=os.path.join(self.test_folder, "sharded"), file_format="jsonl",
+                                sharded=True, shard_size=10, compression="gzip", auto_load=False)
+        results = migrate_records(source, sharded)
+
+        self.assertEqual([r.status for r in results], ["migrated", "no source records", "no source records"])
+        self.assertTrue(results[0].verified)
+        self.assertEqual(len(sharded.load_shard_manifest("client")["shards"]), 3)
+
+        pickled = RecordManager(data_folder=self.test_folder, file_format="pickle", auto_load=False)
+        migrate_records(sharded, pickled)
+        pickled.load_records()
+        self.assertEqual(pickled.records["client"], self.manager.records["client"])
+
+    def test_rerun_is_safe(self):
+        """Test that a second run leaves an already migrated target alone."""
+        argv = ["--source-folder", self.test_folder, "--source-format", "json", "--target-format", "jsonl"]
+        self.assertEqual(main(argv), 0)
+        source = RecordManager(data_folder=self.test_folder, file_format="json", auto_load=False)
+        target = RecordManager(data_folder=self.test_folder, file_format="jsonl", auto_load=False)
+        self.assertEqual(migrate_records(source, target)[0].status, "up to date")
+
+    def test_migrate_journaled_patches(self):
+        """Test that patches still in the journal are migrated and survive for both formats."""
+        manager = RecordManager(data_folder=self.test_folder, file_format="json", journal=True)
+        manager.add_record("airline", {"company_name": "British Airways", "country": "UK"})
+        airline = manager.records["airline"][-1]
+        manager.patch_record("airline", airline["id"], {"country": "France"})
+
+        source = RecordManager(data_folder=self.test_folder, file_format="json", auto_load=False)
+        target = RecordManager(data_folder=self.test_folder, file_format="jsonl", auto_load=False)
+        results = migrate_records(source, target)
+        self.assertTrue(all(result.verified for result in results))
+
+        for file_format in ("json", "jsonl"):
+            reloaded = RecordManager(data_folder=self.test_folder, file_format=file_format)
+            self.assertEqual(reloaded.get_record("airline", airline["id"])["country"], "France")
+
+    def test_load_legacy_jsonl_file(self):
+        """Test that JSON Lines saved under the old '.json' name are still loaded."""
+        legacy_folder = os.path.join(self.test_folder, "legacy")
+        os.makedirs(legacy_folder)
+        with open(os.path.join(legacy_folder, "airline.json"), "w") as file:
+            file.write(json.dumps({"id": "A0001", "company_name": "Qantas Airways"}) + "\n")
+
+        manager = RecordManager(data_folder=legacy_folder, file_format="jsonl")
+        self.assertEqual(manager.records["airline"][0]["company_name"], "Qantas Airways")
+        self.assertTrue(manager._get_file_path("airline").endswith("airline.jsonl"))
+
+
+if __name__ == "__main__":
+    unittest.main()
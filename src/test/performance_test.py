@@ -5,11 +5,24 @@ import os
 import sys
 import time
 import random
+import json
+import shutil
+import tempfile
 
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
 sys.path.append(project_root)
 
-from src.data.record_manager import RecordManager
+from src.data.record_manager import RecordManager, FSYNC_POLICIES
+from src.data.storage import FILE_FORMATS
+from src.data.importer import import_records
+from src.data.schema import VALIDATORS
+from src.data.ordering import OrderingCache, date_ordinal
+from src.data.search import filter_records
+from src.data.columnar import ColumnTable, numpy_available
+from src.data.facets import FacetIndex
+
+# Bulk import throughput to reach, in rows per second including the save
+IMPORT_TARGET_ROWS_PER_SECOND = 100000
 
 class PerformanceTest:
     """Performance test class for benchmarking RecordManager operations."""
@@ -23,6 +36,24 @@ class PerformanceTest:
             "name": f"Client_{random.choice(['A', 'B', 'C', 'D'])}{random.randint(1, 100)}",
             "email": f"client{random.randint(1, 100)}@example.com",
             "phone": f"+1{random.randint(1000000000, 9999999999)}",
+            "address_line1": f"{random.randint(1, 999)} {random.choice(['Main St', 'Park Ave', 'Broadway'])}",
+            "city": random.choice(['New York', 'London', 'Hong Kong']),
+            "country": random.choice(['United States', 'United Kingdom', 'Hong Kong']),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S")
+        }
+
+    def generate_random_flight(self):
+        """Generate random flight data."""
+        departure, destination = random.sample(['London', 'Hong Kong', 'Tokyo', 'Paris', 'Dubai', 'Sydney'], 2)
+        return {
+            "id": f"F{random.randint(1000, 9999)}",
+            "type": "Flight",
+            "client": f"Client_{random.choice(['A', 'B', 'C', 'D'])}{random.randint(1, 100)}",
+            "airline": random.choice(['British Airways', 'Cathay Pacific Airways', 'Qantas Airways']),
+            "departure": departure,
+            "destination": destination,
+            "depart_date": f"{random.randint(1, 28):02d}/{random.randint(1, 12):02d}/{random.randint(2023, 2026)}",
+            "return_date": f"{random.randint(1, 28):02d}/{random.randint(1, 12):02d}/{random.randint(2023, 2026)}",
             "created_at": time.strftime("%Y-%m-%dT%H:%M:%S")
         }
 
@@ -79,6 +110,187 @@ class PerformanceTest:
 
         print(f"Saved records in {end_time - start_time:.4f} seconds.")
 
+    def benchmark_compression(self, num_records: int = 20000, levels=(1, 6, 9)):
+        """Benchmark file size, save time and load time per format, codec and level."""
+        dataset = {
+            "client": [self.generate_random_client() for _ in range(num_records)],
+            "flight": [self.generate_random_flight() for _ in range(num_records)],
+            "airline": []
+        }
+        settings = [(None, None)] + [(codec, level) for codec in ("gzip", "zlib", "lzma") for level in levels]
+
+        print(f"{'format':<8}{'codec':<8}{'level':>6}{'size (KB)':>12}{'save (s)':>10}{'load (s)':>10}")
+        for file_format in FILE_FORMATS:
+            for compression, level in settings:
+                folder = tempfile.mkdtemp()
+                try:
+                    manager = RecordManager(data_folder=folder, file_format=file_format,
+                                            compression=compression, compression_level=level)
+                    manager.records = dict(dataset)
+
+                    start_time = time.time()
+                    manager.save_records()
+                    save_time = time.time() - start_time
+
+                    start_time = time.time()
+                    manager.load_records()
+                    load_time = time.time() - start_time
+
+                    size = sum(os.path.getsize(os.path.join(folder, name)) for name in os.listdir(folder))
+                    print(f"{file_format:<8}{compression or '-':<8}{level if level is not None else '-':>6}"
+                          f"{size / 1024:>12.1f}{save_time:>10.4f}{load_time:>10.4f}")
+                finally:
+                    shutil.rmtree(folder)
+
+    def benchmark_import(self, num_rows: int = 100000, repeat: int = 3):
+        """Benchmark bulk importing flights from a JSONL file, keeping the best of `repeat` runs."""
+        folder = tempfile.mkdtemp()
+        try:
+            file_path = os.path.join(folder, "flights.jsonl")
+            with open(file_path, "w") as file:
+                for _ in range(num_rows):
+                    file.write(json.dumps(self.generate_random_flight()) + "\n")
+
+            times = []
+            for run in range(repeat):
+                manager = RecordManager(data_folder=os.path.join(folder, f"run{run}"), file_format="jsonl")
+                start_time = time.time()
+                result = import_records(manager, "flight", file_path)
+                times.append(time.time() - start_time)
+
+            rows_per_second = num_rows / min(times)
+            print(f"Imported {result.imported} flights in {min(times):.4f} seconds, best of {repeat} "
+                  f"({rows_per_second:,.0f} rows/second including save).")
+            print(f"Target of {IMPORT_TARGET_ROWS_PER_SECOND:,} rows/second "
+                  f"{'met' if rows_per_second >= IMPORT_TARGET_ROWS_PER_SECOND else 'NOT met'}.")
+            return rows_per_second
+        finally:
+            shutil.rmtree(folder)
+
+    def benchmark_validation(self, num_records: int = 200000):
+        """Benchmark schema validation of client and flight records in bulk."""
+        for record_type, generate in (("client", self.generate_random_client), ("flight", self.generate_random_flight)):
+            records = [generate() for _ in range(num_records)]
+            validator = VALIDATORS[record_type]
+
+            start_time = time.time()
+            invalid = sum(1 for record in records if validator(record))
+            end_time = time.time()
+
+            print(f"Validated {num_records} {record_type} records ({invalid} invalid) in "
+                  f"{end_time - start_time:.4f} seconds ({num_records / (end_time - start_time):,.0f} records/second).")
+
+    def benchmark_fsync_policies(self, num_records: int = 1000, num_saves: int = 100, interval_ms: int = 100):
+        """Benchmark the latency of an atomic save under each fsync policy."""
+        clients = [self.generate_random_client() for _ in range(num_records)]
+
+        print(f"{'policy':<10}{'mean (ms)':>12}{'p50 (ms)':>12}{'p99 (ms)':>12}{'max (ms)':>12}")
+        for policy in FSYNC_POLICIES:
+            folder = tempfile.mkdtemp()
+            try:
+                manager = RecordManager(data_folder=folder, file_format="jsonl", fsync=policy,
+                                        fsync_interval_ms=interval_ms)
+                manager.records["client"] = list(clients)
+
+                latencies = []
+                for _ in range(num_saves):
+                    start_time = time.perf_counter()
+                    manager.save_records()
+                    latencies.append((time.perf_counter() - start_time) * 1000)
+                manager.sync()
+
+                latencies.sort()
+                print(f"{policy:<10}{sum(latencies) / num_saves:>12.2f}{latencies[num_saves // 2]:>12.2f}"
+                      f"{latencies[int(num_saves * 0.99)]:>12.2f}{latencies[-1]:>12.2f}")
+            finally:
+                shutil.rmtree(folder)
+
+    def benchmark_multi_column_sort(self, num_records: int = 100000):
+        """Benchmark sorting flights by several columns once the single-column orders are cached."""
+        flights = [dict(self.generate_random_flight(), id=f"F{i:06d}") for i in range(num_records)]
+        orderings = OrderingCache(flights)
+        start_time = time.perf_counter()
+        for field in ("id", "airline", "destination", "depart_date"):
+            orderings.get(field).ranks()
+        print(f"Sorted {num_records} flights by 4 single columns in {time.perf_counter() - start_time:.4f} seconds.")
+
+        for order_by in ((("airline", False), ("depart_date", True)),
+                         (("destination", True), ("airline", False), ("depart_date", False))):
+            start_time = time.perf_counter()
+            orderings.get(order_by).window(0, 100)
+            columns = ", ".join(f"{field} {'desc' if descending else 'asc'}" for field, descending in order_by)
+            print(f"Sorted {num_records} flights by {columns} in {(time.perf_counter() - start_time) * 1000:.1f} ms.")
+
+    def benchmark_column_filters(self, num_records: int = 200000, repeats: int = 5):
+        """Benchmark a date range, destination and airline filter and a group-by count, on dicts and on NumPy columns."""
+        if not numpy_available():
+            print("NumPy is not installed; skipping the column filter benchmark.")
+            return
+        flights = [dict(self.generate_random_flight(), id=f"F{i:06d}") for i in range(num_records)]
+        low, high = date_ordinal("01/03/2025"), date_ordinal("30/09/2025")
+        destinations = {"London", "Tokyo"}
+
+        start_time = time.perf_counter()
+        for _ in range(repeats):
+            matches = list(filter_records(
+                flights, lambda flight: flight["destination"] in destinations and
+                low <= date_ordinal(flight["depart_date"]) <= high, {"airline": "Qantas Airways"}))
+            counts = {}
+            for flight in matches:
+                counts[flight["destination"]] = counts.get(flight["destination"], 0) + 1
+        dict_time = (time.perf_counter() - start_time) / repeats
+        print(f"Filtered and counted {num_records} flights as dicts in {dict_time * 1000:.1f} ms.")
+
+        start_time = time.perf_counter()
+        columns = ColumnTable(flights)
+        for field in ("depart_date", "destination", "airline"):
+            columns.column(field)
+        print(f"Built the columns of {num_records} flights in {time.perf_counter() - start_time:.4f} seconds.")
+
+        start_time = time.perf_counter()
+        for _ in range(repeats):
+            mask = columns.mask({"depart_date": ("01/03/2025", "30/09/2025")},
+                                destination=list(destinations), airline="Qantas Airways")
+            column_matches = columns.select(mask)
+            column_counts = columns.count_by("destination", mask)
+        column_time = (time.perf_counter() - start_time) / repeats
+        print(f"Filtered and counted {num_records} flights as columns in {column_time * 1000:.1f} ms "
+              f"({dict_time / column_time:.0f}x faster, {len(column_matches)} flights).")
+        assert column_matches == matches and column_counts == counts
+
+    def benchmark_facets(self, num_records: int = 200000):
+        """Benchmark facet counts and filters on bitmaps against loops over the flights."""
+        manager = RecordManager(data_folder=tempfile.mkdtemp(), file_format="jsonl", fsync="never",
+                                validate=False)
+        try:
+            manager.add_records("flight", [self.generate_random_flight() for _ in range(num_records)])
+            start_time = time.perf_counter()
+            facets = FacetIndex(manager)
+            manager.register_index(facets)
+            print(f"Built the facet bitmaps of {num_records} flights in {time.perf_counter() - start_time:.4f} seconds.")
+
+            selections = {"airline": ["Qantas Airways"], "destination": ["London", "Tokyo"]}
+            start_time = time.perf_counter()
+            counts = {}
+            for flight in manager.records["flight"]:
+                if flight["airline"] == "Qantas Airways":
+                    counts[flight["destination"]] = counts.get(flight["destination"], 0) + 1
+            matches = [flight for flight in manager.records["flight"] if FacetIndex.matches(flight, selections)]
+            loop_time = time.perf_counter() - start_time
+            print(f"Counted destinations and filtered {num_records} flights in a loop in {loop_time * 1000:.1f} ms.")
+
+            start_time = time.perf_counter()
+            facet_counts = facets.counts("flight", "destination", selections)
+            bitmap_count = facets.count("flight", selections)
+            count_time = time.perf_counter() - start_time
+            facet_matches = facets.select("flight", selections)
+            select_time = time.perf_counter() - start_time - count_time
+            print(f"Counted destinations on bitmaps in {count_time * 1000:.2f} ms and selected "
+                  f"{len(facet_matches)} flights in {select_time * 1000:.1f} ms.")
+            assert dict(facet_counts) == counts and facet_matches == matches and bitmap_count == len(matches)
+        finally:
+            shutil.rmtree(manager.data_folder, ignore_errors=True)
+
 # Example Usage
 if __name__ == "__main__":
     # Initialize RecordManager
@@ -97,3 +309,17 @@ if __name__ == "__main__":
     performance_test.benchmark_delete_record(record_id="C1001")
     # Save records to the file system
     performance_test.benchmark_save_records()
+    # Compare compression codecs and levels
+    performance_test.benchmark_compression()
+    # Bulk import flights from JSONL
+    performance_test.benchmark_import()
+    # Validate records in bulk
+    performance_test.benchmark_validation()
+    # Compare save latency per fsync policy
+    performance_test.benchmark_fsync_policies()
+    # Resort by several columns, reusing the cached single-column orders
+    performance_test.benchmark_multi_column_sort()
+    # Filter and count flights on dicts and on NumPy columns
+    performance_test.benchmark_column_filters()
+    # Count and filter flights by facets on bitmaps
+    performance_test.benchmark_facets()
@@ -4,6 +4,7 @@ GUI Unit Tests
 import sys
 import os
 from os.path import dirname, abspath, join
+import time
 import unittest
 from unittest.mock import MagicMock, patch
 import tkinter as tk
@@ -14,6 +15,7 @@ project_root = abspath(join(dirname(__file__), '..', '..'))
 sys.path.append(project_root)
 
 from src.gui.record_gui import RecordMgmtSystem
+from src.gui.components.search import Search
 
 
 class TestRecordMgmtSystem(unittest.TestCase):
@@ -79,7 +81,7 @@ class TestRecordMgmtSystem(unittest.TestCase):
         """Navigation Test"""
         self.app.show_page = MagicMock()
 
-        test_pages = ['flights', 'clients', 'airlines']
+        test_pages = ['flights', 'clients', 'airlines', 'search']
         for page in test_pages:
             self.app.handle_navigation(page)
             self.app.show_page.assert_called_with(page)
@@ -112,5 +114,60 @@ class TestRecordMgmtSystem(unittest.TestCase):
             pass
 
 
+class TestSearch(unittest.TestCase):
+    """Test Cases for the debounced background search"""
+
+    def setUp(self):
+        """Setup a search bar whose searches take a while"""
+        self.root = ctk.CTk()
+        self.started = []
+        self.results = []
+
+        def search_function(text, cancelled):
+            self.started.append(text)
+            time.sleep(0.05)
+            return text.upper()
+
+        self.search = Search(
+            self.root,
+            search_callback=lambda text, result: self.results.append((text, result)),
+            search_function=search_function
+        )
+
+    def tearDown(self):
+        """Destroy the window"""
+        self.root.destroy()
+
+    def type_text(self, text):
+        """Type text into the search entry, one key at a time"""
+        for char in text:
+            self.search.search_entry.insert("end", char)
+            self.search._on_search()
+
+    def wait(self, seconds):
+        """Run the event loop for a while"""
+        deadline = time.time() + seconds
+        while time.time() < deadline:
+            self.root.update()
+            time.sleep(0.01)
+
+    def test_typing_is_debounced(self):
+        """Test that fast typing searches once, for the final text"""
+        self.type_text("leo")
+        self.wait(0.5)
+        self.assertEqual(self.started, ["leo"])
+        self.assertEqual(self.results, [("leo", "LEO")])
+
+    def test_only_latest_result_is_delivered(self):
+        """Test that a newer search supersedes the one still running"""
+        self.type_text("le")
+        self.search.start_search()
+        self.type_text("o")
+        self.search.start_search()
+        self.wait(0.5)
+        self.assertEqual(self.started, ["le", "leo"])
+        self.assertEqual(self.results, [("leo", "LEO")])
+
+
 if __name__ == "__main__":
     unittest.main()
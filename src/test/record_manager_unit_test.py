@@ -12,7 +12,17 @@ import unittest
 import json
 import pickle
 import shutil  # Import shutil to remove the test folder
+from datetime import datetime
+from unittest.mock import patch
 from src.data.record_manager import RecordManager
+from src.data.indexes import IdIndex
+from src.data import storage
+from src.data.search import SearchService, search_key
+from src.data.columnar import numpy_available
+from src.data.facets import FacetIndex, bit_positions
+from src.data.catalogs import CATALOGS
+from src.data.ordering import date_ordinal
+from src.data.schema import ValidationError, is_valid_date
 
 class TestRecordManager(unittest.TestCase):
     def setUp(self):
@@ -46,5 +56,653 @@ class TestRecordManager(unittest.TestCase):
         expected_path = os.path.join(self.test_folder, "client.json")
         self.assertEqual(self.manager._get_file_path("client"), expected_path)
 
+    def test_snapshot_is_isolated_from_mutations(self):
+        """Test that snapshots keep their point-in-time view."""
+        snapshot = self.manager.snapshot("client")
+        new_client = {"name": "New Client", "phone": "+44 7700 900123", "email": "new@example.com",
+                      "address_line1": "42 Oxford Street", "city": "London", "country": "United Kingdom"}
+        self.manager.add_record("client", new_client)
+        self.manager.update_record("client", "123", dict(new_client, id="123", name="Renamed"))
+
+        self.assertEqual(list(snapshot), [self.sample_record])
+        self.assertEqual(len(self.manager.records["client"]), 2)
+        self.assertGreater(self.manager.get_version("client"), snapshot.version)
+
+    def test_invalid_records_are_rejected(self):
+        """Test that records failing schema validation are not added or updated."""
+        with self.assertRaises(ValidationError):
+            self.manager.add_record("airline", {"company_name": "Qantas Airways"})
+        with self.assertRaisesRegex(ValidationError, "Record 2: Field 'depart_date'"):
+            self.manager.add_records("flight", [
+                {"client": "A", "airline": "B", "departure": "C", "destination": "D", "depart_date": "01/01/2025"},
+                {"client": "A", "airline": "B", "departure": "C", "destination": "D", "depart_date": "2025-01-01"},
+            ])
+        with self.assertRaises(ValidationError):
+            self.manager.update_record("client", "123", {"id": "123", "name": "Test Client", "email": "invalid"})
+
+        self.assertEqual(self.manager.records["airline"], [])
+        self.assertEqual(self.manager.records["flight"], [])
+        self.assertEqual(self.manager.records["client"], [self.sample_record])
+
+    def test_date_validation(self):
+        """Test the DD/MM/YYYY date format check."""
+        self.assertTrue(is_valid_date("30/04/2025"))
+        self.assertTrue(is_valid_date("1/2/2025"))
+        self.assertFalse(is_valid_date("32/01/2025"))
+        self.assertFalse(is_valid_date("01/13/2025"))
+        self.assertFalse(is_valid_date(""))
+
+class TestShardedRecordManager(unittest.TestCase):
+    def setUp(self):
+        """Set up a sharded manager holding two shards of flights."""
+        self.test_folder = "test_sharded_data"
+        self.manager = RecordManager(data_folder=self.test_folder, file_format="jsonl", sharded=True, shard_size=2)
+        for city in ["London", "Paris", "Tokyo"]:
+            self.manager.add_record("flight", self.make_flight(city))
+
+    def make_flight(self, destination):
+        """Create a valid flight record."""
+        return {"client": "Leona Wong", "airline": "British Airways", "departure": "Hong Kong",
+                "destination": destination, "depart_date": "30/04/2025", "return_date": ""}
+
+    def tearDown(self):
+        """Clean up test files."""
+        if os.path.exists(self.test_folder):
+            shutil.rmtree(self.test_folder)
+
+    def test_manifest(self):
+        """Test that the manifest records counts and ID ranges per shard."""
+        shards = self.manager.load_shard_manifest("flight")["shards"]
+        self.assertEqual(shards["0"]["count"], 1)
+        self.assertEqual(shards["1"]["min_id"], "F0002")
+        self.assertEqual(shards["1"]["max_id"], "F0003")
+
+    def test_only_changed_shard_is_rewritten(self):
+        """Test that saving rewrites only the shard holding the changed record."""
+        with patch('src.data.record_manager.write_records', wraps=storage.write_records) as mock_write:
+            self.manager.update_record("flight", "F0001", dict(self.make_flight("Dubai"), id="F0001"))
+        written = [call.args[0] for call in mock_write.call_args_list]
+        # Shards are written to a temporary file first, then moved into place
+        self.assertEqual(len(written), 1)
+        self.assertTrue(written[0].startswith(self.manager._get_shard_path("flight", 0) + "."))
+
+    def test_load_records_and_shards(self):
+        """Test reloading all shards and loading a pruned ID range."""
+        new_manager = RecordManager(data_folder=self.test_folder, file_format="jsonl", sharded=True)
+        self.assertEqual(new_manager.records["flight"], self.manager.records["flight"])
+        self.assertEqual([r["id"] for r in new_manager.load_shards("flight", min_id="F0002")], ["F0002", "F0003"])
+
+    def test_load_shards_salvages_damaged_shard(self):
+        """Test that loading a damaged shard keeps its valid records instead of failing."""
+        with open(self.manager.get_record_files("flight")[1], "a") as file:
+            file.write('{"id": "F0004", "destination": \n')
+        with patch('builtins.print'):
+            records = self.manager.load_shards("flight", min_id="F0002")
+        self.assertEqual([r["id"] for r in records], ["F0002", "F0003"])
+
+class Crash(BaseException):
+    """Simulates the application stopping in the middle of a save."""
+
+class TestAtomicSaves(unittest.TestCase):
+    def setUp(self):
+        """Set up a manager holding one saved airline."""
+        self.test_folder = "test_atomic_data"
+        self.manager = RecordManager(data_folder=self.test_folder, file_format="json")
+        self.manager.add_record("airline", {"company_name": "Qantas Airways", "country": "Australia"})
+
+    def tearDown(self):
+        """Clean up test files."""
+        if os.path.exists(self.test_folder):
+            shutil.rmtree(self.test_folder)
+
+    def add_client_and_crash(self, crash_point):
+        """Add a client, stopping the save at the given step."""
+        with patch.object(RecordManager, crash_point, side_effect=Crash):
+            with self.assertRaises(Crash):
+                self.manager.add_record("client", {
+                    "name": "Leona Wong", "phone": "+852 9123 4567", "email": "leona@example.com",
+                    "address_line1": "1 Queen's Road", "city": "Hong Kong", "country": "China"})
+
+    def test_one_generation_per_save(self):
+        """Test that every save commits all record types under the next generation."""
+        generation = self.manager.generation
+        self.manager.save_records()
+        self.assertEqual(self.manager.generation, generation + 1)
+        committed = storage.read_json(os.path.join(self.test_folder, "generation.json"))
+        self.assertEqual(committed["generation"], generation + 1)
+        self.assertEqual(sorted(committed["files"]), sorted(
+            name + suffix for name in ["client.json", "flight.json", "airline.json"] for suffix in ["", ".crc"]))
+        self.assertFalse([name for name in os.listdir(self.test_folder) if name.endswith(".tmp")])
+
+    def test_crash_before_commit_keeps_old_records(self):
+        """Test that a save interrupted before its commit point is discarded on load."""
+        self.add_client_and_crash("_write_generation")
+        new_manager = RecordManager(data_folder=self.test_folder, file_format="json")
+        self.assertEqual(new_manager.records["client"], [])
+        self.assertEqual(len(new_manager.records["airline"]), 1)
+        self.assertFalse([name for name in os.listdir(self.test_folder) if name.endswith(".tmp")])
+
+    def test_crash_after_commit_is_completed(self):
+        """Test that a committed save interrupted while moving files is finished on load."""
+        self.add_client_and_crash("_move_staged_files")
+        new_manager = RecordManager(data_folder=self.test_folder, file_format="json")
+        self.assertEqual(new_manager.records["client"][0]["name"], "Leona Wong")
+        self.assertEqual(new_manager.generation, self.manager.generation + 1)
+
+    def test_fsync_policies(self):
+        """Test when each fsync policy flushes files to disk."""
+        for policy, expect_fsync in [("always", True), ("batched", False), ("never", False)]:
+            with self.subTest(policy=policy):
+                manager = RecordManager(data_folder=self.test_folder, file_format="json", fsync=policy,
+                                        fsync_interval_ms=60000)
+                with patch('src.data.storage.os.fsync') as mock_fsync:
+                    manager.save_records()
+                    self.assertEqual(mock_fsync.called, expect_fsync)
+                    # A batched fsync waits for the interval, or an explicit sync
+                    manager.sync()
+                    self.assertEqual(mock_fsync.called, policy != "never")
+
+class TestPatchRecord(unittest.TestCase):
+    def setUp(self):
+        """Set up a journaled manager holding one client."""
+        self.test_folder = "test_patch_data"
+        self.manager = RecordManager(data_folder=self.test_folder, file_format="json", journal=True)
+        self.manager.add_record("client", {
+            "name": "Leona Wong", "phone": "+852 9123 4567", "email": "leona@example.com",
+            "address_line1": "1 Queen's Road", "city": "Hong Kong", "country": "China"})
+
+    def tearDown(self):
+        """Clean up test files."""
+        if os.path.exists(self.test_folder):
+            shutil.rmtree(self.test_folder)
+
+    def test_patch_updates_only_affected_indexes(self):
+        """Test that a patch merges the changes and skips indexes on unchanged fields."""
+        class EmailIndex(IdIndex):
+            fields = frozenset({'email'})
+        email_index = EmailIndex()
+        self.manager.register_index(email_index)
+        snapshot = self.manager.snapshot("client")
+
+        with patch.object(email_index, 'on_update') as on_update:
+            record = self.manager.patch_record("client", "C0001", {"phone": "+852 9000 0000"})
+            on_update.assert_not_called()
+            self.manager.patch_record("client", "C0001", {"email": "leona@example.org"})
+            on_update.assert_called_once()
+
+        self.assertEqual(record["phone"], "+852 9000 0000")
+        self.assertEqual(record["name"], "Leona Wong")
+        self.assertEqual(snapshot[0]["phone"], "+852 9123 4567")
+        with self.assertRaises(ValidationError):
+            self.manager.patch_record("client", "C0001", {"email": "invalid"})
+
+    def test_journal_persists_only_the_changes(self):
+        """Test that journaled patches skip the full save and are replayed on load."""
+        with patch('src.data.record_manager.write_records') as mock_write:
+            self.manager.patch_record("client", "C0001", {"phone": "+852 9000 0000"})
+        mock_write.assert_not_called()
+        self.assertLess(os.path.getsize(self.manager._get_journal_path()), 200)
+
+        new_manager = RecordManager(data_folder=self.test_folder, file_format="json", journal=True)
+        self.assertEqual(new_manager.get_record("client", "C0001")["phone"], "+852 9000 0000")
+
+        # A full save includes the patch and empties the journal
+        new_manager.save_records()
+        self.assertEqual(os.path.getsize(self.manager._get_journal_path()), 0)
+        new_manager = RecordManager(data_folder=self.test_folder, file_format="json")
+        self.assertEqual(new_manager.get_record("client", "C0001")["phone"], "+852 9000 0000")
+
+    def test_failed_save_keeps_the_journal(self):
+        """Test that a save failing to write one record type commits nothing and keeps the journaled patch."""
+        self.manager.patch_record("client", "C0001", {"name": "Leona Chan"})
+        generation = self.manager.generation
+        client_path = self.manager._get_file_path("client")
+
+        def write_records(file_path, *args, **kwargs):
+            if file_path.startswith(client_path + "."):
+                raise OSError("Disk full")
+            return storage.write_records(file_path, *args, **kwargs)
+
+        with patch('src.data.record_manager.write_records', side_effect=write_records):
+            with self.assertRaises(OSError):
+                self.manager.save_records()
+        self.assertEqual(self.manager.generation, generation)
+        self.assertGreater(os.path.getsize(self.manager._get_journal_path()), 0)
+        self.assertTrue(self.manager._save_pending)
+        self.assertFalse([name for name in os.listdir(self.test_folder) if name.endswith(".tmp")])
+
+        new_manager = RecordManager(data_folder=self.test_folder, file_format="json", journal=True)
+        self.assertEqual(new_manager.get_record("client", "C0001")["name"], "Leona Chan")
+
+        # The pending save is done by the next flush
+        self.manager.flush_writes()
+        self.assertEqual(os.path.getsize(self.manager._get_journal_path()), 0)
+        new_manager = RecordManager(data_folder=self.test_folder, file_format="json")
+        self.assertEqual(new_manager.get_record("client", "C0001")["name"], "Leona Chan")
+
+    def test_journal_entries_of_older_generations_are_ignored(self):
+        """Test that patches already included in a committed save are not replayed over it."""
+        self.manager.patch_record("client", "C0001", {"phone": "+852 9000 0000"})
+        # A full save that committed, then crashed before emptying the journal
+        with patch.object(RecordManager, '_clear_journal'):
+            self.manager.update_record("client", "C0001",
+                                       dict(self.manager.get_record("client", "C0001"), phone="+852 9111 1111"))
+
+        new_manager = RecordManager(data_folder=self.test_folder, file_format="json", journal=True)
+        self.assertEqual(new_manager.get_record("client", "C0001")["phone"], "+852 9111 1111")
+
+class TestPagination(unittest.TestCase):
+    def setUp(self):
+        """Set up a manager holding flights added out of date order."""
+        self.test_folder = "test_page_data"
+        self.manager = RecordManager(data_folder=self.test_folder, file_format="jsonl", fsync="never")
+        self.dates = ["02/02/2025", "01/01/2026", "15/06/2025", "03/02/2025", "01/01/2026"] * 5
+        self.manager.add_records("flight", [
+            {"client": f"Client {i}", "airline": "Qantas", "departure": "Sydney", "destination": "Tokyo",
+             "depart_date": date} for i, date in enumerate(self.dates)])
+
+    def tearDown(self):
+        """Clean up test files."""
+        if os.path.exists(self.test_folder):
+            shutil.rmtree(self.test_folder)
+
+    def read_pages(self, **kwargs):
+        """Follow the cursors through every page and return the records in order."""
+        records, after = [], None
+        while True:
+            page = self.manager.page("flight", after=after, limit=7, **kwargs)
+            self.assertLessEqual(len(page.records), 7)
+            records += page.records
+            if page.cursor is None:
+                return records
+            after = page.cursor
+
+    def test_pages_follow_typed_order(self):
+        """Test that pages cover every record once, ordering dates by day and IDs by number."""
+        self.assertEqual(self.read_pages(), self.manager.records["flight"])
+
+        by_date = self.read_pages(order_by="depart_date")
+        self.assertEqual(len(by_date), len(self.dates))
+        self.assertEqual([flight["depart_date"] for flight in by_date[:5]], ["02/02/2025"] * 5)
+        self.assertEqual([flight["depart_date"] for flight in by_date[-10:]], ["01/01/2026"] * 10)
+        # Equal dates keep ID order
+        self.assertEqual(by_date[:5], [flight for flight in self.manager.records["flight"]
+                                      if flight["depart_date"] == "02/02/2025"])
+
+        self.assertEqual(self.read_pages(order_by="depart_date", descending=True), by_date[::-1])
+
+    def test_windows_by_position(self):
+        """Test that windows slice the typed order by position, from either end."""
+        by_date = self.read_pages(order_by="depart_date")
+        window = self.manager.window("flight", order_by="depart_date", start=20, count=10)
+        self.assertEqual(window.records, by_date[20:])
+        self.assertIsNone(window.cursor)
+        window = self.manager.window("flight", order_by="depart_date", start=3, count=4, descending=True)
+        self.assertEqual(window.records, by_date[::-1][3:7])
+        self.assertEqual(window.total, len(self.dates))
+
+    def test_multi_column_order(self):
+        """Test that ordering by several columns matches stable sorts by each column in turn."""
+        for i, flight in enumerate(list(self.manager.records["flight"])):
+            self.manager.patch_record("flight", flight["id"], {"airline": ["Qantas", "emirates", "KLM"][i % 3]})
+        flights = sorted(self.manager.records["flight"], key=lambda flight: int(flight["id"][1:]))
+        expected = sorted(flights, key=lambda flight: datetime.strptime(flight["depart_date"], "%d/%m/%Y"),
+                          reverse=True)
+        expected = sorted(expected, key=lambda flight: flight["airline"].casefold())
+
+        order_by = [("airline", False), ("depart_date", True)]
+        self.assertEqual(self.read_pages(order_by=order_by), expected)
+        window = self.manager.window("flight", order_by=order_by, start=5, count=6, descending=True)
+        self.assertEqual(window.records, expected[::-1][5:11])
+        # A single ascending column is the same order as the field itself
+        self.assertEqual(self.read_pages(order_by=[("depart_date", False)]), self.read_pages(order_by="depart_date"))
+
+        # Changing a record sorts again
+        self.manager.patch_record("flight", expected[0]["id"], {"airline": "Zip"})
+        self.assertEqual(self.read_pages(order_by=order_by)[-1]["id"], expected[0]["id"])
+
+    def test_cursor_survives_changes(self):
+        """Test that a cursor continues after its record even when records are deleted and added."""
+        first = self.manager.page("flight", limit=10)
+        self.manager.delete_record("flight", first.records[-1]["id"])
+        self.manager.delete_record("flight", "F0011")
+        self.manager.add_record("flight", {key: value for key, value in first.records[0].items()
+                                           if key not in ("id", "created_at")})
+
+        second = self.manager.page("flight", after=first.cursor, limit=10)
+        self.assertEqual(second.records[0]["id"], "F0012")
+        self.assertEqual(second.total, len(self.dates) - 1)
+        with self.assertRaises(ValueError):
+            self.manager.page("flight", limit=0)
+
+    def test_multi_column_cursor_survives_changes(self):
+        """Test that a cursor of an order by several columns continues after its record when records are added."""
+        for flight in list(self.manager.records["flight"])[4:]:
+            self.manager.delete_record("flight", flight["id"])
+        for flight, airline in zip(list(self.manager.records["flight"]), ["Qantas", "KLM", "Qantas", "KLM"]):
+            self.manager.patch_record("flight", flight["id"], {"airline": airline})
+        order_by = [("airline", False), ("client", True)]
+        first = self.manager.page("flight", order_by=order_by, limit=2)
+        self.assertEqual([flight["client"] for flight in first.records], ["Client 3", "Client 1"])
+
+        new_flight = {key: value for key, value in first.records[0].items() if key not in ("id", "created_at")}
+        self.manager.add_record("flight", dict(new_flight, airline="A"))
+        self.manager.add_record("flight", dict(new_flight, client="Client 9"))
+        # The cursor round-trips through JSON, as it does through the server
+        cursor = json.loads(json.dumps(first.cursor))
+        second = self.manager.page("flight", order_by=order_by, after=cursor, limit=2)
+        self.assertEqual([flight["client"] for flight in second.records], ["Client 2", "Client 0"])
+        self.assertIsNone(second.cursor)
+
+        backwards = self.manager.page("flight", order_by=order_by, after=cursor, limit=10, descending=True)
+        self.assertEqual([(flight["airline"], flight["client"]) for flight in backwards.records],
+                         [("KLM", "Client 3"), ("KLM", "Client 9"), ("A", "Client 3")])
+        with self.assertRaises(ValueError):
+            self.manager.page("flight", order_by=order_by, after=[0, 0], limit=2)
+
+class TestSearchService(unittest.TestCase):
+    def setUp(self):
+        """Set up a manager holding airlines, with a search service registered."""
+        self.test_folder = "test_search_data"
+        self.manager = RecordManager(data_folder=self.test_folder, file_format="jsonl", fsync="never")
+        self.manager.add_records("airline", [{"company_name": name, "country": "Australia"} for name in
+                                             ["Qantas", "Qatar Airways", "Jetstar", "Virgin", "Air Asia"] * 4])
+        self.service = SearchService(self.manager)
+        self.manager.register_index(self.service)
+
+    def tearDown(self):
+        """Clean up test files."""
+        if os.path.exists(self.test_folder):
+            shutil.rmtree(self.test_folder)
+
+    def search(self, text, service=None):
+        """Search airline names, returning the matching IDs and how many search keys were checked."""
+        service = service or self.service
+        checked = []
+
+        class CheckedKeys(list):
+            def __getitem__(self, position):
+                checked.append(position)
+                return super().__getitem__(position)
+
+        get_keys = service.keys.get
+        with patch.object(service.keys, 'get', lambda *args: CheckedKeys(get_keys(*args))):
+            matches = service.search("airline", text, ["company_name"])
+        return [airline["id"] for airline in matches], len(checked)
+
+    def expected(self, text):
+        """Get the IDs of the airlines whose names contain the text."""
+        return [airline["id"] for airline in self.manager.records["airline"]
+                if text.casefold() in airline["company_name"].casefold()]
+
+    def test_longer_text_narrows_previous_results(self):
+        """Test that extending the text only checks the previous matches."""
+        self.assertEqual(self.search("QA"), (self.expected("qa"), 20))
+        self.assertEqual(self.search("qat"), (self.expected("qat"), 8))
+        self.assertEqual(self.search("qata"), (self.expected("qata"), 4))
+        # Text that does not extend the previous text searches everything again
+        self.assertEqual(self.search("jet"), (self.expected("jet"), 20))
+
+    def test_additions_and_edits_are_checked_again(self):
+        """Test that narrowing also checks records added or edited since the previous search."""
+        self.search("qa")
+        self.manager.add_record("airline", {"company_name": "Qatar Cargo", "country": "Qatar"})
+        self.manager.patch_record("airline", "A0001", {"company_name": "Bonza"})
+        self.manager.patch_record("airline", "A0003", {"company_name": "Qatar Executive"})
+        self.assertEqual(self.search("qat"), (self.expected("qat"), 10))
+
+        # Deletions shift positions, so the next search starts over
+        self.manager.delete_record("airline", "A0002")
+        self.assertEqual(self.search("qata"), (self.expected("qata"), 20))
+
+    def test_unregistered_service_narrows_unchanged_records(self):
+        """Test that a service unaware of changes only narrows while the records are unchanged."""
+        service = SearchService(self.manager)
+        service.search("airline", "qa", ["company_name"])
+        self.assertEqual(self.search("qat", service), (self.expected("qat"), 8))
+        self.manager.patch_record("airline", "A0001", {"company_name": "Qatar Regional"})
+        self.assertEqual(self.search("qata", service), (self.expected("qata"), 20))
+
+    def test_search_keys_ignore_case_and_accents(self):
+        """Test that search keys fold case and accents, and follow edits to the records."""
+        self.assertEqual(search_key("Zoë ÅSTRÖM"), "zoe astrom")
+        self.assertEqual(search_key(None), "")
+        self.manager.patch_record("airline", "A0004", {"company_name": "Zoë Air"})
+        self.assertEqual(self.search("zoe"), (["A0004"], 20))
+        self.assertEqual(self.search("ZOË A"), (["A0004"], 1))
+        self.assertEqual(self.service.keys.get("airline", "company_name", self.manager.records["airline"])[3],
+                         "zoe air")
+        self.assertEqual([airline["id"] for airline in self.manager.search("airline", "zoe")], ["A0004"])
+
+    def test_cancelled_search_is_not_reused(self):
+        """Test that a cancelled search returns early and the next search does not narrow it."""
+        self.assertEqual(self.service.search("airline", "a", ["company_name"], cancelled=lambda: True), [])
+        self.assertEqual(self.search("ai"), (self.expected("ai"), 20))
+
+@unittest.skipUnless(numpy_available(), "NumPy is not installed")
+class TestColumnTable(unittest.TestCase):
+    def setUp(self):
+        """Set up a manager holding flights on several days, to several destinations."""
+        self.test_folder = "test_columns_data"
+        self.manager = RecordManager(data_folder=self.test_folder, file_format="jsonl", fsync="never")
+        self.manager.add_records("flight", [
+            {"client": f"Client {number}", "airline": ["Qantas", "Jetstar", "Virgin"][number % 3],
+             "departure": "Sydney", "destination": ["London", "Tokyo", "Paris", "Dubai"][number % 4],
+             "depart_date": f"{number % 28 + 1:02d}/{number % 12 + 1:02d}/2025",
+             "return_date": f"{number % 28 + 1:02d}/{number % 12 + 1:02d}/2026"}
+            for number in range(200)])
+
+    def tearDown(self):
+        """Clean up test files."""
+        if os.path.exists(self.test_folder):
+            shutil.rmtree(self.test_folder)
+
+    def test_filters_match_record_loops(self):
+        """Test that date ranges, value sets and exact values give the same records as a loop over them."""
+        columns = self.manager.columns("flight")
+        flights = columns.filter(between={"depart_date": ("01/03/2025", "30/06/2025")},
+                                 destination=["London", "Paris"], airline="Jetstar")
+        low, high = date_ordinal("01/03/2025"), date_ordinal("30/06/2025")
+        expected = list(self.manager.query(
+            "flight", lambda flight: low <= date_ordinal(flight["depart_date"]) <= high and
+            flight["destination"] in ("London", "Paris"), airline="Jetstar"))
+        self.assertTrue(flights)
+        self.assertEqual(flights, expected)
+
+        # Masks combine, and unknown values match nothing
+        mask = columns.equals("destination", "Tokyo") | columns.equals("destination", "Nowhere")
+        self.assertEqual(columns.select(mask), list(self.manager.query("flight", destination="Tokyo")))
+        self.assertEqual(columns.filter(between={"id": ("F0010", 12)}), self.manager.records["flight"][9:12])
+        with self.assertRaises(ValueError):
+            columns.between("destination", "London", "Tokyo")
+
+    def test_count_by(self):
+        """Test group-by counts of values and days, over every record or a mask."""
+        columns = self.manager.columns("flight")
+        self.assertEqual(columns.count_by("destination"), {"London": 50, "Tokyo": 50, "Paris": 50, "Dubai": 50})
+        qantas = columns.equals("airline", "Qantas")
+        self.assertEqual(sum(columns.count_by("destination", qantas).values()), 67)
+        self.assertEqual(columns.count_by("depart_date", columns.equals("id", "F0001")),
+                         {datetime(2025, 1, 1).date(): 1})
+
+    def test_columns_are_rebuilt_after_changes(self):
+        """Test that the columns are cached until the records change."""
+        columns = self.manager.columns("flight")
+        self.assertIs(self.manager.columns("flight"), columns)
+        self.manager.patch_record("flight", "F0001", {"destination": "Tokyo"})
+        self.assertIsNot(self.manager.columns("flight"), columns)
+        self.assertEqual(self.manager.columns("flight").count_by("destination")["Tokyo"], 51)
+        self.manager.delete_record("flight", "F0002")
+        self.assertEqual(len(self.manager.columns("flight").column("depart_date")), 199)
+
+class TestFacetIndex(unittest.TestCase):
+    def setUp(self):
+        """Set up a manager holding flights of a few airlines to a few destinations, with facets registered."""
+        self.test_folder = "test_facets_data"
+        self.manager = RecordManager(data_folder=self.test_folder, file_format="jsonl", fsync="never", validate=False)
+        self.manager.add_records("flight", [
+            {"client": f"Client {number}", "airline": ["Qantas", "Jetstar", "Virgin"][number % 3],
+             "departure": "Sydney", "destination": ["London", "Tokyo", "Paris", "Dubai"][number % 4]}
+            for number in range(60)])
+        self.facets = FacetIndex(self.manager)
+        self.manager.register_index(self.facets)
+
+    def tearDown(self):
+        """Clean up test files."""
+        if os.path.exists(self.test_folder):
+            shutil.rmtree(self.test_folder)
+
+    def expected(self, selections):
+        """Get the flights matching the selections, by looping over every flight."""
+        return [flight for flight in self.manager.records["flight"] if FacetIndex.matches(flight, selections)]
+
+    def test_bit_positions(self):
+        """Test reading the set bits of a bitmap."""
+        self.assertEqual(list(bit_positions(0b1000010011)), [0, 1, 4, 9])
+        self.assertEqual(list(bit_positions(0)), [])
+
+    def test_values_are_ored_and_fields_anded(self):
+        """Test that facets select the same flights as a loop over them."""
+        for selections in ({"airline": ["Qantas"]},
+                           {"airline": ["Qantas", "Virgin"], "destination": ["Tokyo"]},
+                           {"airline": [], "destination": ["Paris", "Nowhere"]},
+                           {}):
+            self.assertEqual(self.facets.select("flight", selections), self.expected(selections))
+            self.assertEqual(self.facets.count("flight", selections), len(self.expected(selections)))
+        with self.assertRaises(ValueError):
+            self.facets.select("flight", {"client": ["Client 1"]})
+
+    def test_counts_ignore_their_own_field(self):
+        """Test that each value's count applies the other fields' choices only."""
+        selections = {"airline": ["Qantas"], "destination": ["London"]}
+        self.assertEqual(self.facets.counts("flight", "airline", selections),
+                         [("Jetstar", 5), ("Qantas", 5), ("Virgin", 5)])
+        self.assertEqual(self.facets.counts("flight", "destination", selections),
+                         [("Dubai", 5), ("London", 5), ("Paris", 5), ("Tokyo", 5)])
+        self.manager.patch_record("flight", "F0001", {"destination": "Paris"})
+        self.assertEqual(self.facets.counts("flight", "destination", selections),
+                         [("Dubai", 5), ("London", 4), ("Paris", 6), ("Tokyo", 5)])
+        self.assertEqual(self.facets.counts("flight", "airline", {"destination": ["Rome"]}), [])
+
+    def test_facets_follow_changes(self):
+        """Test that adds, edits and deletions are reflected in the bitmaps."""
+        self.manager.add_record("flight", {"client": "Leona Wong", "airline": "Cathay", "destination": "London"})
+        self.manager.patch_record("flight", "F0001", {"airline": "Cathay"})
+        self.manager.update_record("flight", "F0002", dict(self.manager.records["flight"][1], destination="Rome"))
+        self.manager.delete_record("flight", "F0004")
+        for selections in ({"airline": ["Cathay"]}, {"destination": ["Rome", "London"]}, {"airline": ["Qantas"]}):
+            self.assertEqual(self.facets.select("flight", selections), self.expected(selections))
+
+        # An unregistered index builds its bitmaps again for each version
+        facets = FacetIndex(self.manager)
+        self.assertEqual(facets.count("flight", {"airline": ["Cathay"]}), 2)
+        self.manager.patch_record("flight", "F0003", {"airline": "Cathay"})
+        self.assertEqual(facets.count("flight", {"airline": ["Cathay"]}), 3)
+
+class TestCatalogs(unittest.TestCase):
+    def setUp(self):
+        """Set up a manager holding clients, airlines and flights."""
+        self.test_folder = "test_catalogs_data"
+        self.manager = RecordManager(data_folder=self.test_folder, file_format="jsonl", fsync="never", validate=False)
+        self.manager.add_records("client", [{"name": name, "country": country} for name, country in
+                                            [("Tommy", "United Kingdom"), ("leona", "Hong Kong"),
+                                             ("Sude", "Turkey"), ("Tommy", "United Kingdom")]])
+        self.manager.add_records("airline", [{"company_name": "Qantas", "country": "Australia"},
+                                             {"company_name": "Cathay Pacific", "country": "Hong Kong"}])
+        self.manager.add_records("flight", [{"departure": "London", "destination": "Hong Kong"},
+                                            {"departure": "Hong Kong", "destination": "sydney"}])
+
+    def tearDown(self):
+        """Clean up test files."""
+        if os.path.exists(self.test_folder):
+            shutil.rmtree(self.test_folder)
+
+    def expected(self, *sources):
+        """Get the sorted distinct values of fields, by reading every record."""
+        values = {record.get(field) for record_type, field in sources
+                  for record in self.manager.records[record_type]} - {None, ""}
+        return sorted(values, key=lambda value: (value.casefold(), value))
+
+    def assert_catalogs(self):
+        """Check every catalog against the records."""
+        for name, sources in CATALOGS.items():
+            self.assertEqual(self.manager.get_catalog(name), self.expected(*sources), name)
+
+    def test_catalogs_are_sorted_and_distinct(self):
+        """Test that catalogs hold each value once, sorted ignoring case, across record types."""
+        self.assertEqual(self.manager.get_catalog("client_names"), ["leona", "Sude", "Tommy"])
+        self.assertEqual(self.manager.get_catalog("flight_cities"), ["Hong Kong", "London", "sydney"])
+        self.assertEqual(self.manager.get_catalog("countries"), ["Australia", "Hong Kong", "Turkey", "United Kingdom"])
+        with self.assertRaises(ValueError):
+            self.manager.get_catalog("unknown")
+
+    def test_catalogs_follow_changes(self):
+        """Test that adds, edits and deletions update the catalogs without losing shared values."""
+        catalog = self.manager.get_catalog("client_names")
+        self.manager.add_record("client", {"name": "Alice", "country": "France"})
+        self.manager.patch_record("client", "C0001", {"name": "Tom"})
+        self.assertIn("Tommy", self.manager.get_catalog("client_names"))
+        self.manager.update_record("client", "C0004", {"id": "C0004", "name": "Zoë", "country": "Hong Kong"})
+        self.manager.delete_record("client", "C0003")
+        self.manager.patch_record("airline", "A0002", {"country": "China"})
+        self.assert_catalogs()
+        # Lists handed out are replaced, not changed
+        self.assertEqual(catalog, ["leona", "Sude", "Tommy"])
+        self.assertEqual(self.manager.get_catalog("countries"), ["Australia", "China", "France", "Hong Kong", "United Kingdom"])
+
+        # Many new values at once are sorted together
+        self.manager.add_records("client", [{"name": f"Client {number}", "country": "Japan"} for number in range(150)])
+        self.assert_catalogs()
+
+class TestCompressedRecordManager(unittest.TestCase):
+    def setUp(self):
+        """Set up the test environment."""
+        self.test_folder = "test_compressed_data"
+        self.sample_records = [{"id": f"C{i:04d}", "name": f"Client {i}"} for i in range(1, 500)]
+
+    def tearDown(self):
+        """Clean up test files."""
+        if os.path.exists(self.test_folder):
+            shutil.rmtree(self.test_folder)
+
+    def test_round_trip(self):
+        """Test that every format reloads its records with every codec."""
+        for file_format in storage.FILE_FORMATS:
+            for compression in ["gzip", "zlib", "lzma"]:
+                with self.subTest(file_format=file_format, compression=compression):
+                    manager = RecordManager(data_folder=self.test_folder, file_format=file_format,
+                                            compression=compression)
+                    manager.records["client"] = self.sample_records
+                    manager.save_records()
+
+                    self.assertTrue(manager._get_file_path("client").endswith(storage.COMPRESSIONS[compression]))
+                    new_manager = RecordManager(data_folder=self.test_folder, file_format=file_format,
+                                                compression=compression)
+                    self.assertEqual(new_manager.records["client"], self.sample_records)
+
+    def test_records_are_streamed(self):
+        """Test that JSON arrays are parsed in chunks and pickles written in batches, reading older files too."""
+        os.makedirs(self.test_folder)
+        records = [dict(record, note='a "quoted", [bracketed] {note}\n') for record in self.sample_records]
+        file_path = os.path.join(self.test_folder, "client")
+        with patch.object(storage, "JSON_CHUNK_SIZE", 16), patch.object(storage, "PICKLE_BATCH_SIZE", 100):
+            for file_format in ["json", "pickle"]:
+                for compression in [None, "gzip"]:
+                    with self.subTest(file_format=file_format, compression=compression):
+                        storage.write_records(file_path, iter(records), file_format, compression)
+                        self.assertEqual(storage.read_records(file_path, file_format, compression), records)
+
+            with open(file_path, "wb") as file:
+                pickle.dump(records, file)
+            self.assertEqual(storage.read_records(file_path, "pickle"), records)
+            with open(file_path, "w") as file:
+                json.dump(records, file)
+            self.assertEqual(storage.read_records(file_path, "json"), records)
+
+            with open(file_path, "w") as file:
+                file.write('[{"id": "C0001"}, {"id": "C0002"')
+            with self.assertRaises(ValueError):
+                storage.read_records(file_path, "json")
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,201 @@
+""" 
+Record Server Tests
+"""
+import sys
+import os
+from os.path import dirname, abspath, join
+# Add the project root directory to Python path
+project_root = abspath(join(dirname(__file__), '..', '..'))
+sys.path.append(project_root)
+
+import unittest
+import asyncio
+import http.client
+import json
+import shutil
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+from src.data.record_manager import RecordManager
+from src.data.remote import RemoteRecordManager
+from src.data.schema import ValidationError
+from src.server import RecordServer
+
+
+class TestRecordServer(unittest.TestCase):
+    """Record Server Test Cases"""
+
+    def setUp(self):
+        """Start a server on an ephemeral port, running its event loop on a thread."""
+        self.test_folder = "test_server_data"
+        self.server = RecordServer(RecordManager(data_folder=self.test_folder, file_format="jsonl"), port=0)
+        self.loop = asyncio.new_event_loop()
+        started = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(self.loop)
+            self.loop.run_until_complete(self.server.start())
+            started.set()
+            self.loop.run_forever()
+
+        self.thread = threading.Thread(target=run, daemon=True)
+        self.thread.start()
+        started.wait(5)
+        self.remote = RemoteRecordManager(f"http://127.0.0.1:{self.server.port}")
+
+    def tearDown(self):
+        """Stop the server and clean up test files."""
+        self.remote.close()
+        asyncio.run_coroutine_threadsafe(self.server.stop(), self.loop).result(5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(5)
+        self.loop.close()
+        if os.path.exists(self.test_folder):
+            shutil.rmtree(self.test_folder)
+
+    def make_client(self, name):
+        """Create a valid client record."""
+        return {"name": name, "phone": "+44 7700 900123", "email": f"{name.lower()}@example.com",
+                "address_line1": "42 Oxford Street", "city": "London", "country": "United Kingdom"}
+
+    def test_crud(self):
+        """Test adding, reading, patching and deleting through the server."""
+        client = self.make_client("Alice")
+        self.remote.add_record("client", client)
+        self.assertEqual(client["id"], "C0001")
+
+        self.assertEqual(self.remote.patch_record("client", "C0001", {"city": "Leeds"})["city"], "Leeds")
+        self.assertEqual(self.remote.get_record("client", "C0001")["city"], "Leeds")
+        self.assertEqual(self.remote.records["client"][0]["name"], "Alice")
+        with self.assertRaises(ValidationError):
+            self.remote.patch_record("client", "C0001", {"email": "invalid"})
+
+        self.remote.delete_record("client", "C0001")
+        self.assertIsNone(self.remote.get_record("client", "C0001"))
+        self.assertEqual(RecordManager(data_folder=self.test_folder, file_format="jsonl").records["client"], [])
+
+    def test_query_and_search_stream_large_results(self):
+        """Test that large results are streamed in chunks and filtered by the server."""
+        self.remote.add_records("client", [self.make_client(f"Client{i}") for i in range(1200)])
+        self.assertEqual(len(self.remote.snapshot("client")), 1200)
+        self.assertEqual([c["id"] for c in self.remote.query("client", name="Client7")], ["C0008"])
+        self.assertEqual(len(list(self.remote.search("client", "CLIENT11", fields=["name"]))), 111)
+
+    def test_unchanged_records_are_not_sent_again(self):
+        """Test that reading records again reuses the last snapshot until the server's records change."""
+        self.remote.add_records("client", [self.make_client(f"Client{i}") for i in range(3)])
+        snapshot = self.remote.snapshot("client")
+        with patch.object(RecordServer, 'send_records', wraps=self.server.send_records) as send_records:
+            self.assertIs(self.remote.snapshot("client"), snapshot)
+            self.assertEqual(len(self.remote.records["client"]), 3)
+            self.assertEqual(send_records.call_count, 0)
+
+            self.remote.patch_record("client", "C0001", {"city": "Leeds"})
+            self.assertEqual(self.remote.records["client"][0]["city"], "Leeds")
+            self.assertEqual(send_records.call_count, 1)
+        self.assertGreater(self.remote.get_version("client"), snapshot.version)
+
+    def test_search_does_not_block_other_requests(self):
+        """Test that a record is served while a search is still scanning."""
+        self.remote.add_records("client", [self.make_client(f"Client{i}") for i in range(3)])
+        scanning, finish = threading.Event(), threading.Event()
+
+        def slow_search(records, text, fields=None):
+            scanning.set()
+            finish.wait(5)
+            return iter(records)
+
+        searcher = RemoteRecordManager(f"http://127.0.0.1:{self.server.port}")
+        with patch('src.server.search_records', side_effect=slow_search), ThreadPoolExecutor(1) as executor:
+            search = executor.submit(lambda: list(searcher.search("client", "client")))
+            self.assertTrue(scanning.wait(5))
+            self.assertEqual(self.remote.get_record("client", "C0002")["name"], "Client1")
+            self.assertFalse(search.done())
+            finish.set()
+            self.assertEqual(len(search.result(5)), 3)
+        searcher.close()
+
+    def test_pages(self):
+        """Test that pages and their cursors round-trip through the server."""
+        self.remote.add_records("client", [self.make_client(f"Client{i}") for i in range(25)])
+        names = []
+        page = self.remote.page("client", order_by="name", limit=10, descending=True)
+        while True:
+            names += [client["name"] for client in page.records]
+            if page.cursor is None:
+                break
+            page = self.remote.page("client", order_by="name", after=page.cursor, limit=10, descending=True)
+        self.assertEqual(page.total, 25)
+        self.assertEqual(names, sorted((f"Client{i}" for i in range(25)), reverse=True))
+
+        # Orders by several columns are sent as JSON
+        page = self.remote.window("client", order_by=[("country", False), ("name", True)], start=0, count=3)
+        self.assertEqual([client["name"] for client in page.records], ["Client9", "Client8", "Client7"])
+
+    def test_catalogs(self):
+        """Test that catalogs are read from the server."""
+        self.remote.add_records("client", [self.make_client(name) for name in ["Zoe", "alice", "Bob", "Bob"]])
+        self.assertEqual(self.remote.get_catalog("client_names"), ["alice", "Bob", "Zoe"])
+        self.assertEqual(self.remote.get_catalog("countries"), ["United Kingdom"])
+        with self.assertRaises(ValueError):
+            self.remote.get_catalog("unknown")
+
+    def send_raw(self, request):
+        """Send raw request bytes and return the status code of the response."""
+        with socket.create_connection(("127.0.0.1", self.server.port), timeout=5) as connection:
+            connection.sendall(request)
+            return int(connection.makefile('rb').readline().split()[1])
+
+    def test_request_body_length(self):
+        """Test that request bodies without a valid or acceptable length are refused."""
+        self.server.max_body_size = 1024
+        head = b"POST /records/client HTTP/1.1\r\nHost: localhost\r\n"
+        self.assertEqual(self.send_raw(head + b"Content-Length: ten\r\n\r\n"), 400)
+        self.assertEqual(self.send_raw(head + b"Content-Length: -1\r\n\r\n"), 400)
+        self.assertEqual(self.send_raw(head + b"Content-Length: 2048\r\n\r\n"), 413)
+        self.assertEqual(self.send_raw(head + b"Transfer-Encoding: chunked\r\n\r\n"), 411)
+        self.assertEqual(self.send_raw(head + b"Content-Length: 2\r\n\r\n{}"), 422)
+
+    def test_put_checks_record(self):
+        """Test that a replaced record must be an object keeping the ID of its URL."""
+        self.remote.add_records("client", [self.make_client("Alice"), self.make_client("Bob")])
+        head = b"PUT /records/client/C0001 HTTP/1.1\r\nHost: localhost\r\nContent-Length: %d\r\n\r\n"
+        for body, status in [(b'[]', 400), (json.dumps(dict(self.make_client("Carol"), id="C0002")).encode(), 400),
+                             (json.dumps(self.make_client("Carol")).encode(), 200)]:
+            self.assertEqual(self.send_raw(head % len(body) + body), status)
+
+        self.assertEqual(self.remote.get_record("client", "C0001")["name"], "Carol")
+        self.assertEqual(self.remote.get_record("client", "C0002")["name"], "Bob")
+        self.assertEqual(len(self.remote.records["client"]), 2)
+
+    def test_retries_only_safe_requests(self):
+        """Test that a request the server may have applied without answering is only resent if idempotent."""
+        with patch('src.data.remote.http.client.HTTPConnection') as connection_class:
+            connection = connection_class.return_value
+            connection.sock = None
+            connection.getresponse.side_effect = http.client.RemoteDisconnected("Connection closed")
+            remote = RemoteRecordManager("http://127.0.0.1:8080")
+
+            with self.assertRaises(http.client.RemoteDisconnected):
+                remote.add_record("client", self.make_client("Alice"))
+            self.assertEqual(connection.request.call_count, 1)
+            with self.assertRaises(http.client.RemoteDisconnected):
+                remote.delete_record("client", "C0001")
+            self.assertEqual(connection.request.call_count, 3)
+
+    def test_concurrent_writers(self):
+        """Test that concurrent writes are serialized without losing records."""
+        remotes = [RemoteRecordManager(f"http://127.0.0.1:{self.server.port}") for _ in range(4)]
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(lambda i: remotes[i % 4].add_record("client", self.make_client(f"Client{i}")),
+                              range(40)))
+        for remote in remotes:
+            remote.close()
+
+        ids = [client["id"] for client in self.remote.records["client"]]
+        self.assertEqual(len(set(ids)), 40)
+
+
+if __name__ == "__main__":
+    unittest.main()
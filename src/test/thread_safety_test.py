@@ -0,0 +1,182 @@
+"""
+Thread Safety Tests
+Stress tests for RecordManager's thread-safe mode and its reader-writer lock.
+"""
+import sys
+import os
+from os.path import dirname, abspath, join
+# Add the project root directory to Python path
+project_root = abspath(join(dirname(__file__), '..', '..'))
+sys.path.append(project_root)
+
+import unittest
+import shutil
+import threading
+import time
+from src.data.locks import ReadWriteLock
+from src.data.record_manager import RecordManager
+
+
+class TestReadWriteLock(unittest.TestCase):
+    """Reader-Writer Lock Test Cases"""
+
+    def test_readers_share_the_lock(self):
+        """Test that several threads can hold the read lock at once."""
+        lock = ReadWriteLock()
+        barrier = threading.Barrier(3, timeout=5)
+
+        def read():
+            with lock.reading():
+                # Only passes once all three readers are inside together
+                barrier.wait()
+
+        threads = [threading.Thread(target=read) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        self.assertFalse(barrier.broken)
+
+    def test_writer_excludes_readers(self):
+        """Test that a reader waits for the writer to finish."""
+        lock = ReadWriteLock()
+        events = []
+
+        def read():
+            with lock.reading():
+                events.append("read")
+
+        with lock.writing():
+            reader = threading.Thread(target=read)
+            reader.start()
+            time.sleep(0.05)
+            events.append("write done")
+        reader.join(5)
+        self.assertEqual(events, ["write done", "read"])
+
+    def test_reentrant(self):
+        """Test that a writer may read and acquire the lock again, but a reader may not upgrade."""
+        lock = ReadWriteLock()
+        with lock.writing(), lock.writing(), lock.reading():
+            pass
+        with lock.reading():
+            with self.assertRaises(RuntimeError):
+                lock.acquire_write()
+        # The lock is free again
+        with lock.writing():
+            pass
+
+
+class TestThreadSafeRecordManager(unittest.TestCase):
+    """Thread-Safe Record Manager Stress Test Cases"""
+
+    WRITERS = 4
+    READERS = 4
+    OPERATIONS = 60
+
+    def setUp(self):
+        """Set up the test environment."""
+        self.test_folder = "test_thread_safe_data"
+        self.settings = dict(data_folder=self.test_folder, file_format="jsonl", fsync="never", journal=True)
+        self.manager = RecordManager(thread_safe=True, **self.settings)
+
+    def tearDown(self):
+        """Clean up test files."""
+        if os.path.exists(self.test_folder):
+            shutil.rmtree(self.test_folder)
+
+    def check_consistent(self, records):
+        """Check that record IDs are unique and the ID index points at them."""
+        ids = [record["id"] for record in records]
+        self.assertEqual(len(ids), len(set(ids)))
+        for position, record_id in enumerate(ids):
+            self.assertEqual(self.manager.id_index.get("airline", record_id), position)
+
+    def test_deferred_writes_belong_to_their_thread(self):
+        """Test that a thread deferring its writes does not defer the writes of other threads."""
+        with self.manager.deferred_writes():
+            deferred = {"company_name": "Deferred Air", "country": "Australia"}
+            self.manager.add_record("airline", deferred)
+
+            other = {"company_name": "Other Air", "country": "Australia"}
+            thread = threading.Thread(target=self.manager.add_record, args=("airline", other))
+            thread.start()
+            thread.join(5)
+            # The other thread saved its record, which includes the deferred one already in memory
+            self.assertEqual(len(RecordManager(**self.settings).records["airline"]), 2)
+
+            self.manager.patch_record("airline", deferred["id"], {"country": "Fiji"})
+            self.assertEqual(RecordManager(**self.settings).get_record("airline", deferred["id"])["country"],
+                             "Australia")
+        self.manager.flush_writes()
+        self.assertEqual(RecordManager(**self.settings).get_record("airline", deferred["id"])["country"], "Fiji")
+
+    def test_concurrent_readers_and_writers(self):
+        """Test that concurrent adds, patches and deletes keep the records consistent."""
+        errors = []
+        done = threading.Event()
+        counts = {"added": 0, "deleted": 0, "reads": 0}
+        counts_lock = threading.Lock()
+
+        def write(writer):
+            try:
+                added_ids = []
+                for i in range(self.OPERATIONS):
+                    airline = {"company_name": f"Airline {writer}-{i}", "country": "Australia"}
+                    self.manager.add_record("airline", airline)
+                    added_ids.append(airline["id"])
+                    self.manager.patch_record("airline", airline["id"], {"country": f"Country {i}"})
+                    # Delete every third record this writer added
+                    if i % 3 == 2:
+                        self.manager.delete_record("airline", added_ids.pop(0))
+                        with counts_lock:
+                            counts["deleted"] += 1
+                    with counts_lock:
+                        counts["added"] += 1
+            except Exception as e:
+                errors.append(e)
+
+        def read():
+            try:
+                while not done.is_set():
+                    with self.manager.lock.reading():
+                        self.check_consistent(self.manager.records["airline"])
+                    self.manager.query("airline", country="Australia")
+                    with counts_lock:
+                        counts["reads"] += 1
+                    # Readers pause between reads like real users of the records
+                    time.sleep(0.001)
+            except Exception as e:
+                errors.append(e)
+
+        readers = [threading.Thread(target=read) for _ in range(self.READERS)]
+        writers = [threading.Thread(target=write, args=(writer,)) for writer in range(self.WRITERS)]
+        start = time.perf_counter()
+        for thread in readers + writers:
+            thread.start()
+        for thread in writers:
+            thread.join(60)
+        done.set()
+        for thread in readers:
+            thread.join(60)
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(errors, [])
+        records = self.manager.records["airline"]
+        self.assertEqual(len(records), counts["added"] - counts["deleted"])
+        self.check_consistent(records)
+        self.assertTrue(all(record["country"].startswith("Country") for record in records))
+
+        # Every change reached the files or the journal
+        reloaded = RecordManager(**self.settings)
+        self.assertEqual(reloaded.records["airline"], records)
+
+        writes = counts["added"] * 2 + counts["deleted"]
+        print(f"\n{writes / elapsed:,.0f} writes/s and {counts['reads'] / elapsed:,.0f} reads/s "
+              f"with {self.WRITERS} writers and {self.READERS} readers")
+        self.assertGreater(writes / elapsed, 0)
+        self.assertGreater(counts["reads"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()